@@ -0,0 +1,93 @@
+/**
+ * Saídas de referência e tempos do motor de precificação (src/lib/pricing.ts).
+ *
+ * Usado por testsprite_tests/harness/pricing_bench.py:
+ *   ts-node ./tests/unit/pricing.golden.ts export <cases.json> <golden.json>
+ *   ts-node ./tests/unit/pricing.golden.ts bench <tamanhos,separados,por,vírgula> <proposals> [cases.json]
+ *
+ * Cada caso traz o input do wizard e as linhas de `screens` selecionadas; a
+ * audiência mensal é somada como em NewProposalWizardImproved.tsx.
+ */
+import { readFileSync, writeFileSync } from 'fs';
+import { performance } from 'perf_hooks';
+import { calculateProposalMetrics, type PricingInput, type PricingMetrics } from '../../src/lib/pricing.ts';
+
+interface ScreenRow {
+  audience_monthly?: number | null;
+  audiencia_pacientes?: number | null;
+  audiencia_local?: number | null;
+}
+
+/** Input do wizard; telas e audiência vêm das linhas de `screens`. */
+type CaseInput = Omit<PricingInput, 'screens_count' | 'audience_monthly_total'>;
+
+interface GoldenCase {
+  name: string;
+  input: CaseInput;
+  screens: ScreenRow[];
+  expected?: PricingMetrics;
+}
+
+function proposalMetrics(c: GoldenCase): PricingMetrics {
+  const totalMonthlyAudience = c.screens.reduce((sum: number, row: ScreenRow) => {
+    const audience =
+      Number(row.audience_monthly ?? 0) ||
+      Number(row.audiencia_pacientes ?? 0) ||
+      Number(row.audiencia_local ?? 0) ||
+      0;
+    return sum + audience;
+  }, 0);
+  return calculateProposalMetrics({
+    ...c.input,
+    screens_count: c.screens.length,
+    audience_monthly_total: totalMonthlyAudience,
+  });
+}
+
+function exportGolden(casesPath: string, goldenPath: string) {
+  const cases: GoldenCase[] = JSON.parse(readFileSync(casesPath, 'utf-8'));
+  const golden = cases.map((c) => ({ ...c, expected: proposalMetrics(c) }));
+  writeFileSync(goldenPath, JSON.stringify(golden, null, 1) + '\n');
+}
+
+function bench(sizes: number[], proposals: number, casesPath?: string) {
+  const inputs: CaseInput[] = casesPath
+    ? (JSON.parse(readFileSync(casesPath, 'utf-8')) as GoldenCase[]).map((c) => c.input)
+    : [{ film_seconds: [15, 30], insertions_per_hour: 6, insertion_prices: { avulsa: {}, especial: {} } }];
+  const results = sizes.map((size) => {
+    const batch: GoldenCase[] = Array.from({ length: proposals }, (_, i) => ({
+      name: `${size}-${i}`,
+      input: inputs[i % inputs.length],
+      screens: Array.from({ length: size }, (_, j) => ({
+        audience_monthly: (i * 7919 + j * 104729) % 20000,
+        audiencia_pacientes: 100 + (j % 4900),
+        audiencia_local: 50,
+      })),
+    }));
+    batch.forEach(proposalMetrics); // aquecimento do JIT
+    const samples: number[] = [];
+    for (let round = 0; round < 5; round += 1) {
+      // repete o lote até ~20 ms para que lotes pequenos não meçam só o timer
+      let runs = 0;
+      const t0 = performance.now();
+      do {
+        batch.forEach(proposalMetrics);
+        runs += 1;
+      } while (performance.now() - t0 < 20);
+      samples.push(((performance.now() - t0) * 1000) / (runs * proposals));
+    }
+    samples.sort((a, b) => a - b);
+    return { screens: size, us_per_proposal: samples[Math.floor(samples.length / 2)] };
+  });
+  process.stdout.write(JSON.stringify(results) + '\n');
+}
+
+const [command, ...args] = process.argv.slice(2);
+if (command === 'export') {
+  exportGolden(args[0], args[1]);
+} else if (command === 'bench') {
+  bench(args[0].split(',').map(Number), Number(args[1] || 200), args[2]);
+} else {
+  console.error('uso: pricing.golden.ts export <cases.json> <golden.json> | bench <tamanhos> <proposals> [cases.json]');
+  process.exit(2);
+}
@@ -1,36 +1,40 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness import locators, waits, warm
 
-async def run_test():
+# Exercises the login form itself, so the runner must not preload a session.
+AUTH_ROLE = None
+
+async def run_test(context=None):
     pw = None
     browser = None
-    context = None
+    # The suite runner (harness/runner.py) passes in a context from its shared
+    # browser pool; standalone runs launch and own their browser as before.
+    owns_context = context is None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        if owns_context:
+            # Start a Playwright session in asynchronous mode
+            pw = await async_api.async_playwright().start()
+            
+            # Launch a Chromium browser in headless mode with custom arguments
+            browser = await pw.chromium.launch(
+                headless=True,
+                args=[
+                    "--window-size=1280,720",         # Set the browser window size
+                    "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
+                    "--ipc=host",                     # Use host-level IPC for better stability
+                    "--single-process"                # Run the browser in a single process mode
+                ],
+            )
+            
+            # Create a new browser context (like an incognito window)
+            context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        # Open a page at the target URL (the runner's warm page when it is already there)
+        page = await warm.page(context, "http://localhost:8080", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -49,37 +53,40 @@ async def run_test():
         # -> Enter invalid username/email and password
         frame = context.pages[-1]
         # Enter invalid email in the email input field
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('invaliduser@example.com')
+        elem = await locators.resolve(frame, "login.email")
+        await waits.fill(elem, 'invaliduser@example.com')
         
 
         frame = context.pages[-1]
         # Enter invalid password in the password input field
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('wrongpassword')
+        elem = await locators.resolve(frame, "login.password")
+        await waits.fill(elem, 'wrongpassword')
         
 
         frame = context.pages[-1]
         # Click on the login button to attempt login with invalid credentials
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.resolve(frame, "login.submit")
+        await waits.click(elem, timeout=5000)
         
 
+        # -> Wait for the Supabase auth round trip to settle before asserting
+        await waits.network_idle(page)
+
         # --> Assertions to verify final state
         frame = context.pages[-1]
         await expect(frame.locator('text=Entrar').first).to_be_visible(timeout=30000)
         await expect(frame.locator('text=Email').first).to_be_visible(timeout=30000)
         await expect(frame.locator('text=Senha').first).to_be_visible(timeout=30000)
         await expect(frame.locator('text=Esqueceu a senha?').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
     
     finally:
-        if context:
+        if context and owns_context:
             await context.close()
         if browser:
             await browser.close()
         if pw:
             await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,39 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness import auth, warm
 
-async def run_test():
+AUTH_ROLE = 'admin'
+
+async def run_test(context=None):
     pw = None
     browser = None
-    context = None
+    # The suite runner (harness/runner.py) passes in a context from its shared
+    # browser pool; standalone runs launch and own their browser as before.
+    owns_context = context is None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        if owns_context:
+            # Start a Playwright session in asynchronous mode
+            pw = await async_api.async_playwright().start()
+            
+            # Launch a Chromium browser in headless mode with custom arguments
+            browser = await pw.chromium.launch(
+                headless=True,
+                args=[
+                    "--window-size=1280,720",         # Set the browser window size
+                    "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
+                    "--ipc=host",                     # Use host-level IPC for better stability
+                    "--single-process"                # Run the browser in a single process mode
+                ],
+            )
+            
+            # Create a new browser context (like an incognito window)
+            context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        # Open a page at the target URL (the runner's warm page when it is already there)
+        page = await warm.page(context, "http://localhost:8080", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -46,57 +49,8 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # -> Input email and password, then click Entrar to log in
-        frame = context.pages[-1]
-        # Input email for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('suporte@tvdoutor.com.br')
-        
-
-        frame = context.pages[-1]
-        # Input password for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Suporte@2026!')
-        
-
-        frame = context.pages[-1]
-        # Click Entrar button to log in
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Check if there is an option to reset password or register a new account to proceed with testing
-        frame = context.pages[-1]
-        # Click 'Esqueceu a senha?' to try password recovery or reset
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Try to register a new account by clicking the 'Cadastrar' button to proceed with testing if login is not possible
-        frame = context.pages[-1]
-        # Click 'Cadastrar' button to try account registration
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Attempt to login again with the provided credentials to proceed with the proposal creation test
-        frame = context.pages[-1]
-        # Input email for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('suporte@tvdoutor.com.br')
-        
-
-        frame = context.pages[-1]
-        # Input password for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Suporte@2026!')
-        
-
-        frame = context.pages[-1]
-        # Click Entrar button to log in
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # -> Sign in; a no-op when the runner preloaded a cached session for AUTH_ROLE
+        await auth.sign_in(page, AUTH_ROLE)
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -104,15 +58,15 @@ async def run_test():
             await expect(frame.locator('text=Proposal Creation Successful').first).to_be_visible(timeout=1000)
         except AssertionError:
             raise AssertionError("Test case failed: The creation of a new advertising proposal using the guided wizard did not complete successfully. The proposal was not saved or the PDF generation verification failed as per the test plan.")
-        await asyncio.sleep(5)
     
     finally:
-        if context:
+        if context and owns_context:
             await context.close()
         if browser:
             await browser.close()
         if pw:
             await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,36 +1,40 @@
 import asyncio
 from playwright import async_api
 from playwright.async_api import expect
+from harness import locators, waits, warm
 
-async def run_test():
+# Sends a recovery link from the login form, so the runner must not preload a session.
+AUTH_ROLE = None
+
+async def run_test(context=None):
     pw = None
     browser = None
-    context = None
+    # The suite runner (harness/runner.py) passes in a context from its shared
+    # browser pool; standalone runs launch and own their browser as before.
+    owns_context = context is None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        if owns_context:
+            # Start a Playwright session in asynchronous mode
+            pw = await async_api.async_playwright().start()
+            
+            # Launch a Chromium browser in headless mode with custom arguments
+            browser = await pw.chromium.launch(
+                headless=True,
+                args=[
+                    "--window-size=1280,720",         # Set the browser window size
+                    "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
+                    "--ipc=host",                     # Use host-level IPC for better stability
+                    "--single-process"                # Run the browser in a single process mode
+                ],
+            )
+            
+            # Create a new browser context (like an incognito window)
+            context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        # Open a page at the target URL (the runner's warm page when it is already there)
+        page = await warm.page(context, "http://localhost:8080", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -46,65 +50,28 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # -> Input login credentials and submit login form to access user account.
-        frame = context.pages[-1]
-        # Input email for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('suporte@tvdoutor.com.br')
-        
-
-        frame = context.pages[-1]
-        # Input password for login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Suporte@2026!')
-        
-
-        frame = context.pages[-1]
-        # Click Entrar button to login
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Verify credentials or try password reset flow to regain access for testing transactional emails.
+        # -> Open the password recovery modal to trigger the password change alert email.
         frame = context.pages[-1]
-        # Click 'Esqueceu a senha?' to initiate password reset flow
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Click 'Esqueceu a senha?' to open the password recovery modal
+        elem = await locators.resolve(frame, "login.forgot_password")
+        await waits.click(elem, timeout=5000)
         
 
-        # -> Try to register a new user account by clicking the 'Cadastrar' button to enable triggering proposal submission confirmation email.
-        frame = context.pages[-1]
-        # Click 'Cadastrar' button to start new user registration
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click 'Esqueceu a senha?' button to open password recovery modal and try to trigger password change alert email.
-        frame = context.pages[-1]
-        # Click 'Esqueceu a senha?' button to open password recovery modal
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Input registered email suporte@tvdoutor.com.br into the email field and click 'Enviar Link' to send password recovery email.
+        # -> Input the registered email into the recovery field and click 'Enviar Link'.
         frame = context.pages[-1]
         # Input registered email for password recovery
-        elem = frame.locator('xpath=html/body/div[3]/form/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('suporte@tvdoutor.com.br')
+        elem = await locators.resolve(frame, "recovery.email")
+        await waits.fill(elem, 'suporte@tvdoutor.com.br')
         
 
         frame = context.pages[-1]
         # Click 'Enviar Link' button to send password recovery email
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.resolve(frame, "recovery.submit")
+        await waits.click(elem, timeout=5000)
         
 
-        # -> Perform an action that triggers a proposal submission confirmation email to verify that transactional email is generated and sent properly.
-        frame = context.pages[-1]
-        # Click 'Cadastrar' button to start new user registration for proposal submission test
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[3]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # -> Wait for the recovery request to settle before asserting
+        await waits.network_idle(page)
 
         # --> Assertions to verify final state
         frame = context.pages[-1]
@@ -112,15 +79,15 @@ async def run_test():
             await expect(frame.locator('text=Transactional Email Sent Successfully').first).to_be_visible(timeout=1000)
         except AssertionError:
             raise AssertionError("Test case failed: Transactional emails for proposal submission confirmation and password change alerts were not generated or sent properly as per the test plan.")
-        await asyncio.sleep(5)
     
     finally:
-        if context:
+        if context and owns_context:
             await context.close()
         if browser:
             await browser.close()
         if pw:
             await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
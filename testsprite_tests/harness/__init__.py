@@ -0,0 +1,8 @@
+"""Execution harness for the generated TestSprite TC scripts.
+
+The TC scripts in ``testsprite_tests/`` stay runnable on their own
+(``python TC001_...py``); this package drives them as a suite, sharing
+browsers between cases.  Run it from ``testsprite_tests/``::
+
+    python -m harness.runner --per-core 2
+"""
@@ -0,0 +1,266 @@
+"""Traces, screenshots and videos of failing cases under a disk quota.
+
+Tracing a whole case costs snapshot capture plus a zip per case on disk,
+which is wasted on the cases that pass.  Playwright cannot keep a trace in
+a memory ring, so :class:`TraceRing` gets close with trace *chunks*: the
+context traces continuously, and every ``window / segments`` seconds the
+current chunk is closed into a spool file and a new one started, keeping
+only the newest ``segments`` chunks.  When a case passes, the open chunk
+is dropped without being written and the spool is deleted.  When it does
+not pass, the open chunk, the kept ones and a screenshot of every page
+move to ``tmp/artifacts/<stamp>_<TC>/``, covering roughly the last
+``window`` seconds before the failure.  Videos are optional
+(``record_video_dir``) and kept the same way.
+
+:class:`ArtifactStore` keeps the artifact directories under a byte quota
+and evicts the least recently *used* first: saving or opening an artifact
+(``show``) marks it used::
+
+    python -m harness.runner --trace-on-failure --trace-window 60
+    python -m harness.artifacts list
+    python -m harness.artifacts show TC008       # newest TC008 artifact
+    python -m harness.artifacts prune --quota-mb 200
+
+    npx playwright show-trace tmp/artifacts/<dir>/trace-*.zip
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # ArtifactStore and ``list``/``prune`` work without Playwright
+    from playwright.async_api import BrowserContext, Video
+
+from .config import TMP_DIR
+
+ARTIFACTS_DIR = TMP_DIR / "artifacts"
+# Playwright writes videos while a case runs; outside the store so the quota never evicts them mid-case.
+VIDEO_DIR = TMP_DIR / "videos"
+DEFAULT_WINDOW_S = 60.0
+DEFAULT_SEGMENTS = 2
+DEFAULT_QUOTA_MB = 500
+MARKER = ".used"
+
+_tracing: "weakref.WeakSet[BrowserContext]" = weakref.WeakSet()
+
+
+class TraceRing:
+    """Chunked tracing on ``context`` that keeps the last ``window_s`` seconds."""
+
+    def __init__(self, context: BrowserContext, name: str, window_s: float = DEFAULT_WINDOW_S,
+                 segments: int = DEFAULT_SEGMENTS) -> None:
+        self.context = context
+        self.name = name
+        self.segment_s = window_s / segments
+        self.segments = segments
+        self.spool = Path(tempfile.mkdtemp(prefix=f"trace-{name}-"))
+        self.kept: list[Path] = []
+        self._index = 0
+        self._lock = asyncio.Lock()
+        self._rotator: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        # Warm contexts (harness.warm) keep tracing between cases; only chunks restart.
+        if self.context not in _tracing:
+            await self.context.tracing.start(screenshots=True, snapshots=True, sources=False)
+            _tracing.add(self.context)
+        await self.context.tracing.start_chunk(title=self.name)
+        self._rotator = asyncio.ensure_future(self._rotate_forever())
+
+    async def _rotate_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.segment_s)
+            async with self._lock:
+                self._index += 1
+                path = self.spool / f"trace-{self._index:03d}.zip"
+                await self.context.tracing.stop_chunk(path=path)
+                await self.context.tracing.start_chunk(title=self.name)
+                self.kept.append(path)
+                while len(self.kept) >= self.segments:
+                    self.kept.pop(0).unlink(missing_ok=True)
+
+    async def stop(self, keep: bool) -> list[Path]:
+        """End the case; with ``keep`` return the trace chunks and screenshots."""
+        from playwright.async_api import Error
+
+        async with self._lock:
+            # Holding the lock, the rotator is asleep or waiting for it, never between
+            # stop_chunk and start_chunk; let it finish cancelling before the last chunk.
+            if self._rotator is not None:
+                self._rotator.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await self._rotator
+                self._rotator = None
+            files: list[Path] = []
+            try:
+                if keep:
+                    self._index += 1
+                    final = self.spool / f"trace-{self._index:03d}.zip"
+                    await self.context.tracing.stop_chunk(path=final)
+                    files = self.kept + [final]
+                    for number, page in enumerate(self.context.pages):
+                        shot = self.spool / f"page-{number}.png"
+                        await page.screenshot(path=shot, full_page=True, timeout=5000)
+                        files.append(shot)
+                else:
+                    await self.context.tracing.stop_chunk()
+            except Error:
+                # The context or page died with the case; keep what was spooled.
+                files = [f for f in dict.fromkeys(self.kept + files) if f.exists()]
+            if not keep:
+                self.discard()
+            return files
+
+    def discard(self) -> None:
+        shutil.rmtree(self.spool, ignore_errors=True)
+
+
+async def finish_videos(videos: list[Video], keep: bool, spool: Path) -> list[Path]:
+    """Move finished videos into ``spool`` (``keep``) or delete them.
+
+    Call after the context closed; that is when Playwright finalizes them.
+    """
+    from playwright.async_api import Error
+
+    files = []
+    for number, video in enumerate(videos):
+        try:
+            if keep:
+                target = spool / f"video-{number}.webm"
+                await video.save_as(target)
+                files.append(target)
+            await video.delete()
+        except Error:
+            pass
+    return files
+
+
+@dataclass
+class Artifact:
+    path: Path
+    test_id: str
+    size: int
+    used_at: float
+
+
+class ArtifactStore:
+    """Artifact directories under ``directory`` kept below ``quota_bytes``."""
+
+    def __init__(self, directory: Path = ARTIFACTS_DIR, quota_bytes: int = DEFAULT_QUOTA_MB * 2**20) -> None:
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.evicted = 0
+
+    def save(self, test_id: str, files: list[Path], meta: dict | None = None) -> Path | None:
+        """Move ``files`` into a new artifact directory, then enforce the quota."""
+        if not files:
+            return None
+        base = f"{time.strftime('%Y%m%d-%H%M%S')}_{test_id}"
+        target, suffix = self.directory / base, 1
+        while target.exists():
+            suffix += 1
+            target = self.directory / f"{base}~{suffix}"
+        target.mkdir(parents=True)
+        for file in files:
+            shutil.move(str(file), target / file.name)
+        (target / "meta.json").write_text(json.dumps({"test_id": test_id, **(meta or {})}, indent=2), encoding="utf-8")
+        self.touch(target)
+        self.enforce(keep=target)
+        return target
+
+    def touch(self, path: Path) -> None:
+        (path / MARKER).touch()
+
+    def entries(self) -> list[Artifact]:
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for path in self.directory.iterdir():
+            if not path.is_dir() or path.name.startswith("."):
+                continue
+            files = [f for f in path.rglob("*") if f.is_file()]
+            marker = path / MARKER
+            used_at = marker.stat().st_mtime if marker.exists() else path.stat().st_mtime
+            found.append(Artifact(path, path.name.split("_", 1)[-1].split("~")[0], sum(f.stat().st_size for f in files), used_at))
+        return sorted(found, key=lambda a: a.used_at)
+
+    def enforce(self, keep: Path | None = None) -> list[Path]:
+        """Evict least recently used artifacts until under the quota."""
+        entries = self.entries()
+        total = sum(a.size for a in entries)
+        evicted = []
+        for artifact in entries:
+            if total <= self.quota_bytes:
+                break
+            if artifact.path == keep:
+                continue
+            shutil.rmtree(artifact.path, ignore_errors=True)
+            total -= artifact.size
+            evicted.append(artifact.path)
+        self.evicted += len(evicted)
+        return evicted
+
+    def find(self, name: str) -> Artifact | None:
+        """Artifact directory ``name``, or the newest one of test ``name``."""
+        matches = [a for a in self.entries() if a.path.name == name or a.test_id == name.upper()]
+        return max(matches, key=lambda a: a.path.name) if matches else None
+
+
+@dataclass
+class Capture:
+    """What the runner captures for cases that do not pass."""
+
+    store: ArtifactStore
+    trace: bool = True
+    video: bool = False
+    window_s: float = DEFAULT_WINDOW_S
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.artifacts", description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=ARTIFACTS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="artifacts, least recently used first")
+    show = sub.add_parser("show", help="print an artifact's files and mark it used")
+    show.add_argument("name", help="directory name or TC id (newest)")
+    prune = sub.add_parser("prune", help="evict down to a quota")
+    prune.add_argument("--quota-mb", type=float, default=DEFAULT_QUOTA_MB)
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(args.dir)
+    if args.command == "list":
+        entries = store.entries()
+        for artifact in entries:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(artifact.used_at))
+            print(f"{artifact.path.name:<40} {artifact.size / 2**20:8.1f} MB  used {used}")
+        print(f"{len(entries)} artifacts, {sum(a.size for a in entries) / 2**20:.1f} MB")
+    elif args.command == "show":
+        artifact = store.find(args.name)
+        if artifact is None:
+            print(f"no artifact for {args.name}", file=sys.stderr)
+            return 1
+        store.touch(artifact.path)
+        for file in sorted(artifact.path.iterdir()):
+            if file.name != MARKER:
+                print(os.path.relpath(file))
+    else:
+        store.quota_bytes = int(args.quota_mb * 2**20)
+        for path in store.enforce():
+            print(f"evicted {path.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Sign in once per role and reuse the Supabase session across contexts.
+
+supabase-js keeps the session in ``localStorage`` under
+``sb-<project-ref>-auth-token``, so a Playwright storage state taken right
+after logging in is enough to start a new context already authenticated.
+:class:`AuthCache` keeps one such state per role in ``tmp/auth/`` together
+with the token's ``expires_at`` and only goes through the login form again
+once that is (nearly) reached.
+
+TC scripts call :func:`sign_in` where they used to type the credentials; it
+returns immediately when the context already carries a live session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page
+
+from . import locators, perf, waits
+from .config import DEFAULT_BASE_URL, TMP_DIR, base_url, load_config
+from .pool import BrowserPool
+
+AUTH_DIR = TMP_DIR / "auth"
+
+# Evaluates to the session's expires_at (epoch seconds), or null.
+SESSION_EXPIRY_JS = """() => {
+    for (const key of Object.keys(localStorage)) {
+        if (!/^sb-.+-auth-token$/.test(key)) continue;
+        try {
+            const session = JSON.parse(localStorage.getItem(key));
+            if (session && session.access_token) return session.expires_at || null;
+        } catch (e) {}
+    }
+    return null;
+}"""
+
+
+def auth_dir(offline: bool = False) -> Path:
+    """Directory for :class:`AuthCache` states.
+
+    Offline sessions carry fake tokens, and ``localStorage`` is per origin,
+    so each combination gets its own directory.
+    """
+    directory = AUTH_DIR / "offline" if offline else AUTH_DIR
+    origin = urlsplit(base_url()).netloc
+    if origin != urlsplit(DEFAULT_BASE_URL).netloc:
+        directory = directory / origin.replace(":", "_")
+    return directory
+
+
+@dataclass(frozen=True)
+class Credentials:
+    email: str
+    password: str
+
+
+def credentials(role: str) -> Credentials:
+    """Credentials for ``role``.
+
+    ``TESTSPRITE_<ROLE>_EMAIL`` / ``TESTSPRITE_<ROLE>_PASSWORD`` select a
+    dedicated account; otherwise the login from ``tmp/config.json`` is used.
+    """
+    config = load_config()
+    prefix = f"TESTSPRITE_{role.upper()}_"
+    email = os.environ.get(prefix + "EMAIL") or config.get("loginUser")
+    password = os.environ.get(prefix + "PASSWORD") or config.get("loginPassword")
+    if not email or not password:
+        raise LookupError(f"no credentials configured for role {role!r}")
+    return Credentials(email, password)
+
+
+def session_expiry(storage_state: dict) -> float | None:
+    """``expires_at`` of the Supabase session stored in ``storage_state``."""
+    for origin in storage_state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            name = item.get("name", "")
+            if not (name.startswith("sb-") and name.endswith("-auth-token")):
+                continue
+            try:
+                session = json.loads(item["value"])
+            except (KeyError, ValueError):
+                continue
+            if isinstance(session, dict) and session.get("access_token"):
+                return session.get("expires_at")
+    return None
+
+
+async def sign_in(page: Page, role: str = "admin", timeout: float = 30000) -> None:
+    """Log in through the form unless the page already has a live session."""
+    expiry = await page.evaluate(SESSION_EXPIRY_JS)
+    if expiry and expiry > time.time():
+        return
+    creds = credentials(role)
+    await waits.fill(await locators.resolve(page, "login.email"), creds.email)
+    await waits.fill(await locators.resolve(page, "login.password"), creds.password)
+    await waits.click(await locators.resolve(page, "login.submit"))
+    await waits.condition(page, SESSION_EXPIRY_JS, timeout=timeout, name="supabase_session")
+    await perf.step(page, "signed_in")
+
+
+class AuthCache:
+    """Per-role storage states on disk, refreshed when the token expires.
+
+    ``margin_s`` is how long before ``expires_at`` a state stops being
+    handed out, so a case never starts with a token about to lapse.
+    Concurrent requests for the same role share a single login.
+    """
+
+    def __init__(self, pool: BrowserPool, directory: Path = AUTH_DIR, margin_s: float = 120.0) -> None:
+        self.pool = pool
+        self.directory = directory
+        self.margin_s = margin_s
+        self.logins = 0
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _path(self, role: str) -> Path:
+        return self.directory / f"{role}.json"
+
+    def _load(self, role: str) -> dict | None:
+        try:
+            entry = json.loads(self._path(role).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("email") != credentials(role).email:
+            return None
+        if entry.get("expires_at", 0) - self.margin_s <= time.time():
+            return None
+        return entry["storage_state"]
+
+    async def _login(self, role: str) -> dict:
+        async with self.pool.context() as context:
+            page = await context.new_page()
+            await page.goto(base_url(), wait_until="domcontentloaded")
+            await sign_in(page, role)
+            state = await context.storage_state()
+        expires_at = session_expiry(state)
+        if expires_at is None:
+            raise RuntimeError(f"login for role {role!r} did not leave a Supabase session")
+        self.logins += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "role": role,
+            "email": credentials(role).email,
+            "expires_at": expires_at,
+            "storage_state": state,
+        }
+        self._path(role).write_text(json.dumps(entry), encoding="utf-8")
+        return state
+
+    async def storage_state(self, role: str) -> dict:
+        """Return a fresh storage state for ``role``, logging in if needed."""
+        lock = self._locks.setdefault(role, asyncio.Lock())
+        async with lock:
+            return self._load(role) or await self._login(role)
+
+    def clear(self, role: str | None = None) -> None:
+        paths = [self._path(role)] if role else self.directory.glob("*.json")
+        for path in paths:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,51 @@
+"""Paths and settings shared by the harness modules."""
+
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+SUITE_DIR = Path(__file__).resolve().parent.parent
+TMP_DIR = SUITE_DIR / "tmp"
+CONFIG_PATH = TMP_DIR / "config.json"
+
+DEFAULT_BASE_URL = "http://localhost:8080"
+BASE_URL_ENV = "TESTSPRITE_BASE_URL"
+
+# Same flags the generated scripts use, minus ``--single-process``: a pooled
+# browser hosts several contexts at once and single-process Chromium does not
+# isolate them well enough for that.  Precise memory info stops Chromium from
+# bucketing ``performance.memory`` readings used by the perf probe.
+CHROMIUM_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+    "--enable-precise-memory-info",
+]
+
+
+@lru_cache(maxsize=1)
+def load_config() -> dict:
+    """Return ``tmp/config.json`` as written by TestSprite, or ``{}``."""
+    try:
+        return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def base_url() -> str:
+    """Frontend under test; ``TESTSPRITE_BASE_URL`` overrides the config."""
+    return os.environ.get(BASE_URL_ENV) or load_config().get("localEndpoint", DEFAULT_BASE_URL)
+
+
+def app_url(url: str) -> str:
+    """``url`` moved onto :func:`base_url` when it points at the default dev server.
+
+    The generated scripts hard-code ``http://localhost:8080``; this lets
+    them follow ``TESTSPRITE_BASE_URL`` (e.g. to :mod:`harness.static`).
+    """
+    if url.startswith(DEFAULT_BASE_URL):
+        return base_url().rstrip("/") + url[len(DEFAULT_BASE_URL):]
+    return url
@@ -0,0 +1,118 @@
+"""Quarantine flaky TCs and retry them within a budget.
+
+Some cases fail for reasons outside the app - TC008 on the Google OAuth
+pages, TC013 on SMTP - and a full rerun to find out costs minutes.  The
+result store already knows which tests flip between pass and fail at
+unchanged code (:meth:`harness.results.ResultStore.flaky`); its ``score``
+is flips per consecutive pair of runs.  From that:
+
+* tests scoring at least ``threshold`` are *quarantined*: the runner moves
+  them to a second lane that starts once the main lane is done, runs one
+  case at a time and does not decide the exit code;
+* a failed test with any flakiness history is *retried* on its own, one
+  case at a time, until it passes, runs out of attempts, or the retry
+  budget (seconds of case time across all retries) is spent.  Failures of
+  tests without history are not retried - they are real until shown
+  otherwise.
+
+Every attempt is stored as a run of its own, so retries feed the history
+the scores come from.  A quarantined test leaves quarantine once its
+recent runs stop flipping::
+
+    python -m harness.flaky                   # scores and quarantine
+    python -m harness.runner --retries 2 --retry-budget 300
+    python -m harness.runner --quarantine TC013 --skip-quarantined
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import Sequence
+
+from .results import ResultStore
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_WINDOW = 30
+DEFAULT_RETRIES = 2
+DEFAULT_BUDGET_S = 300.0
+
+
+@dataclass
+class Flakiness:
+    """Scores from the result store and the quarantine they imply."""
+
+    scores: dict[str, float] = field(default_factory=dict)
+    quarantined: dict[str, str] = field(default_factory=dict)  # test_id -> reason
+
+    def is_flaky(self, test_id: str) -> bool:
+        return self.scores.get(test_id, 0.0) > 0 or test_id in self.quarantined
+
+
+def assess(
+    threshold: float = DEFAULT_THRESHOLD,
+    window: int = DEFAULT_WINDOW,
+    pinned: Sequence[str] = (),
+) -> Flakiness:
+    """Score every test over its last ``window`` runs; ``pinned`` are always quarantined."""
+    flakiness = Flakiness()
+    try:
+        with ResultStore() as store:
+            rows = store.flaky(window)
+    except Exception:
+        # No store yet (or unreadable): nothing is known to be flaky.
+        rows = []
+    for row in rows:
+        flakiness.scores[row["test_id"]] = row["score"] or 0.0
+        if threshold and (row["score"] or 0.0) >= threshold:
+            flakiness.quarantined[row["test_id"]] = f"score {row['score']:.2f} ({row['flips']} flips in {row['runs']} runs)"
+    for test_id in pinned:
+        flakiness.quarantined[test_id.upper()] = "pinned"
+    return flakiness
+
+
+@dataclass
+class RetryBudget:
+    """Seconds of case time left for retries, and attempts left per test."""
+
+    seconds: float = DEFAULT_BUDGET_S
+    per_test: int = DEFAULT_RETRIES
+    spent_s: float = 0.0
+    attempts: dict[str, int] = field(default_factory=dict)
+
+    def pick(self, failed: list[str], expected: dict[str, float]) -> list[str]:
+        """Failed tests to retry next, shortest first until the expected time would overrun."""
+        chosen, planned = [], self.spent_s
+        for test_id in sorted(failed, key=lambda t: (expected.get(t, 0.0), t)):
+            if self.attempts.get(test_id, 0) >= self.per_test:
+                continue
+            if planned + expected.get(test_id, 0.0) > self.seconds:
+                break
+            planned += expected.get(test_id, 0.0)
+            chosen.append(test_id)
+        return chosen
+
+    def charge(self, test_id: str, duration_s: float) -> None:
+        self.attempts[test_id] = self.attempts.get(test_id, 0) + 1
+        self.spent_s += duration_s
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.flaky", description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="quarantine score")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="runs per test to look at")
+    args = parser.parse_args(argv)
+
+    flakiness = assess(args.threshold, args.window)
+    if not flakiness.scores:
+        print("no flaky tests in the result store")
+        return 0
+    for test_id, score in sorted(flakiness.scores.items(), key=lambda item: (-item[1], item[0])):
+        reason = flakiness.quarantined.get(test_id)
+        print(f"{test_id}  {score:5.2f}  {'quarantined: ' + reason if reason else 'retried on failure'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Flag performance regressions against the result history.
+
+For every metric series in :mod:`harness.results` (test duration and LCP
+per TC, map render timings per size, PDF export timings, ...) the samples
+of the latest ``--current`` runs are compared with those of the
+``--baseline`` runs before them, or of the runs labelled
+``--baseline-label``.  Only runs of one ``runs.source`` are compared - by
+default that of the series' newest run, so offline, replayed, live and
+sharded timings never mix - or of ``--source``.  A series regresses when
+both hold:
+
+* a one-sided Mann-Whitney U test says the current samples are worse with
+  ``p < --alpha``, and
+* the median moved in the bad direction by more than the metric's
+  ``min_change`` (so a statistically clear 1% shift does not fail a build).
+
+Series with fewer than ``--min-samples`` on either side are reported as
+``insufficient`` and never fail the gate.  The verdict goes to
+``tmp/regression_report.json`` and to a section of
+``testsprite-mcp-test-report.md``::
+
+    python -m harness.gate
+    python -m harness.gate --current 3 --baseline 20 --alpha 0.01
+    python -m harness.gate --baseline-label release-1.4
+    python -m harness.gate --source runner:offline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .config import SUITE_DIR, TMP_DIR
+from .results import DB_PATH, ResultStore
+from .stats import mann_whitney_u
+
+REPORT_PATH = TMP_DIR / "regression_report.json"
+MARKDOWN_PATH = SUITE_DIR / "testsprite-mcp-test-report.md"
+SECTION_START = "<!-- harness.gate:start -->"
+SECTION_END = "<!-- harness.gate:end -->"
+
+
+@dataclass(frozen=True)
+class MetricRule:
+    higher_is_better: bool = False
+    # Smallest relative median change that counts as a regression.
+    min_change: float = 0.10
+
+
+RULES = {
+    "duration_s": MetricRule(min_change=0.15),
+    "lcp_ms": MetricRule(min_change=0.10),
+    "first_tile_ms": MetricRule(min_change=0.15),
+    "data_loaded_ms": MetricRule(min_change=0.15),
+    "heatmap_paint_ms": MetricRule(min_change=0.10),
+    "frame_p95_ms": MetricRule(min_change=0.15),
+    "pan_zoom_fps": MetricRule(higher_is_better=True, min_change=0.10),
+    "pdf_ms": MetricRule(min_change=0.10),
+    "pdf_throughput": MetricRule(higher_is_better=True, min_change=0.10),
+}
+DEFAULT_RULE = MetricRule()
+
+
+@dataclass
+class Comparison:
+    subject: str
+    metric: str
+    verdict: str  # regressed | improved | unchanged | insufficient
+    current_n: int
+    baseline_n: int
+    current_median: float | None = None
+    baseline_median: float | None = None
+    change: float | None = None
+    p_value: float | None = None
+    source: str | None = None
+
+
+def rule_for(metric: str) -> MetricRule:
+    return RULES.get(metric, DEFAULT_RULE)
+
+
+def compare(subject: str, metric: str, current: list[float], baseline: list[float],
+            alpha: float, min_samples: int) -> Comparison:
+    result = Comparison(subject, metric, "insufficient", len(current), len(baseline))
+    if len(current) < min_samples or len(baseline) < min_samples:
+        return result
+    rule = rule_for(metric)
+    result.current_median = statistics.median(current)
+    result.baseline_median = statistics.median(baseline)
+    if result.baseline_median:
+        result.change = (result.current_median - result.baseline_median) / abs(result.baseline_median)
+    # Orient both tests so that "greater" means "worse".
+    sign = -1 if rule.higher_is_better else 1
+    _, p_worse = mann_whitney_u([sign * v for v in current], [sign * v for v in baseline])
+    _, p_better = mann_whitney_u([-sign * v for v in current], [-sign * v for v in baseline])
+    worse_by = sign * (result.change or 0)
+    if p_worse < alpha and worse_by > rule.min_change:
+        result.verdict, result.p_value = "regressed", p_worse
+    elif p_better < alpha and -worse_by > rule.min_change:
+        result.verdict, result.p_value = "improved", p_better
+    else:
+        result.verdict, result.p_value = "unchanged", min(p_worse, p_better)
+    return result
+
+
+def evaluate(store: ResultStore, current_runs: int, baseline_runs: int, baseline_label: str | None,
+             alpha: float, min_samples: int, source: str | None = None) -> list[Comparison]:
+    """Compare each series within one ``runs.source``: ``source``, or that of its newest run."""
+    comparisons = []
+    for subject, metric in store.series():
+        series_source = source or store.latest_source(subject, metric)
+        runs = store.metric_runs(subject, metric, source=series_source)
+        current_ids = runs[:current_runs]
+        if baseline_label is not None:
+            baseline_ids = [r for r in store.metric_runs(subject, metric, baseline_label, series_source)
+                            if r not in current_ids]
+        else:
+            baseline_ids = runs[current_runs:current_runs + baseline_runs]
+        comparison = compare(
+            subject,
+            metric,
+            store.metric_values(subject, metric, current_ids),
+            store.metric_values(subject, metric, baseline_ids),
+            alpha,
+            min_samples,
+        )
+        comparison.source = series_source
+        comparisons.append(comparison)
+    return comparisons
+
+
+def _fmt(value: float | None, metric: str) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2f}" if metric.endswith("_s") or value < 10 else f"{value:,.0f}"
+
+
+def markdown(comparisons: list[Comparison], settings: dict) -> str:
+    regressed = [c for c in comparisons if c.verdict == "regressed"]
+    counts = {v: sum(c.verdict == v for c in comparisons) for v in ("regressed", "improved", "unchanged", "insufficient")}
+    lines = [
+        SECTION_START,
+        "## 5️⃣ Performance Regression Gate",
+        f"- **Generated:** {time.strftime('%Y-%m-%d %H:%M')}",
+        f"- **Baseline:** {settings['baseline']}; **current:** last {settings['current']} run(s); "
+        f"**source:** {settings['source']}",
+        f"- **Test:** one-sided Mann-Whitney U, alpha {settings['alpha']}, minimum {settings['min_samples']} samples per side",
+        f"- **Verdict:** {'❌ ' + str(len(regressed)) + ' regression(s)' if regressed else '✅ no regressions'}"
+        f" ({counts['improved']} improved, {counts['unchanged']} unchanged, {counts['insufficient']} without enough samples)",
+        "",
+        "| Subject | Metric | Baseline median | Current median | Change | p-value | Verdict |",
+        "|---------|--------|-----------------|----------------|--------|---------|---------|",
+    ]
+    icons = {"regressed": "❌ Regressed", "improved": "✅ Improved", "unchanged": "Unchanged", "insufficient": "n/a"}
+    shown = [c for c in comparisons if c.verdict != "insufficient"] or comparisons
+    order = {"regressed": 0, "improved": 1, "unchanged": 2, "insufficient": 3}
+    for c in sorted(shown, key=lambda c: (order[c.verdict], c.subject, c.metric)):
+        change = "-" if c.change is None else f"{c.change:+.1%}"
+        p = "-" if c.p_value is None else f"{c.p_value:.3f}"
+        lines.append(f"| {c.subject} | {c.metric} | {_fmt(c.baseline_median, c.metric)} | "
+                     f"{_fmt(c.current_median, c.metric)} | {change} | {p} | {icons[c.verdict]} |")
+    lines.append(SECTION_END)
+    return "\n".join(lines)
+
+
+def update_markdown(section: str, path: Path = MARKDOWN_PATH) -> None:
+    """Replace the gate section of the report, or append it after a rule."""
+    text = path.read_text(encoding="utf-8") if path.exists() else ""
+    pattern = re.compile(re.escape(SECTION_START) + ".*?" + re.escape(SECTION_END), re.S)
+    if pattern.search(text):
+        text = pattern.sub(lambda _: section, text)
+    else:
+        text = text.rstrip("\n") + "\n\n---\n\n" + section
+    path.write_text(text.rstrip("\n") + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.gate", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--current", type=int, default=5, help="latest runs per series forming the current sample")
+    parser.add_argument("--baseline", type=int, default=20, help="runs before those forming the baseline")
+    parser.add_argument("--baseline-label", help="use the runs stored with this label as the baseline")
+    parser.add_argument("--source", help="runs.source to compare (default: that of each series' newest run)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=REPORT_PATH)
+    parser.add_argument("--markdown", type=Path, default=MARKDOWN_PATH)
+    parser.add_argument("--no-markdown", action="store_true", help="only write the JSON report")
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.db) as store:
+        comparisons = evaluate(store, args.current, args.baseline, args.baseline_label, args.alpha, args.min_samples,
+                               args.source)
+    settings = {
+        "current": args.current,
+        "baseline": f"runs labelled {args.baseline_label!r}" if args.baseline_label else f"previous {args.baseline} run(s)",
+        "source": args.source or "newest run's, per series",
+        "alpha": args.alpha,
+        "min_samples": args.min_samples,
+    }
+    regressed = [c for c in comparisons if c.verdict == "regressed"]
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": settings,
+        "passed": not regressed,
+        "comparisons": [asdict(c) for c in comparisons],
+    }, indent=2), encoding="utf-8")
+    if not args.no_markdown:
+        update_markdown(markdown(comparisons, settings), args.markdown)
+
+    for c in regressed:
+        print(f"REGRESSED  {c.subject} {c.metric}: {_fmt(c.baseline_median, c.metric)} -> "
+              f"{_fmt(c.current_median, c.metric)} ({c.change:+.1%}, p={c.p_value:.3f})")
+    print(f"{len(regressed)} regression(s) in {len(comparisons)} series")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,555 @@
+"""Persistent ViaCEP and geocoding cache with bulk CEP resolution.
+
+``geocodeAddress`` (``src/lib/geocoding.ts``) looks every CEP up on ViaCEP
+and then geocodes the address ViaCEP returned with Google; ``cep-batch.ts``
+does that once per CEP of an upload, and uploading the same list again pays
+every round trip again.  :class:`GeoCache` keeps both answers in SQLite
+(``tmp/geocache.db``) under a TTL - shorter for "not found" - and evicts
+the least recently used entries beyond ``max_entries``.  :class:`Resolver`
+resolves a batch of keys at once: duplicates in the batch are looked up
+once, keys another batch is already fetching are awaited instead of
+fetched again, and misses are fetched at most ``concurrency`` at a time.
+:meth:`GeoService.resolve` chains the two lookups for a CEP list the way
+``geocodeAddress`` does, including its ``"<cep>, Brasil"`` fallback.
+
+The service runs as a local stand-in for both APIs: ``GET
+/ws/<cep>/json/`` and ``GET /maps/api/geocode/json`` answer like ViaCEP
+and Google, ``POST /resolve`` takes a CEP list, ``GET /stats`` returns hit
+rates.  :func:`install` routes a browser context's ViaCEP CEP lookups and
+Google geocoding to it (``runner --geocache``), and
+:func:`service_geocoder` feeds :mod:`harness.proximity`.  The upstream is
+the real APIs (``VITE_GOOGLE_MAPS_API_KEY``) or, with ``standin``,
+synthetic answers with API-like latency::
+
+    python -m harness.geocache serve --upstream standin
+    python -m harness.geocache resolve 01310-100 20040-002
+    python -m harness.geocache stats
+    python -m harness.runner --geocache standin TC004
+    python -m harness.proximity --geocache http://127.0.0.1:54420
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Iterator
+from urllib.parse import quote, urlsplit
+
+from .config import TMP_DIR
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .synthetic import BRAZILIAN_CITIES, cep_city, jitter, viacep_address
+
+if TYPE_CHECKING:  # the batch engine and --serve only need NumPy
+    from playwright.async_api import BrowserContext, Route
+
+DB_PATH = TMP_DIR / "geocache.db"
+DEFAULT_PORT = 54420
+DEFAULT_TTL_S = 30 * 86400.0  # CEPs and their coordinates rarely change
+DEFAULT_NEGATIVE_TTL_S = 86400.0
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_CONCURRENCY = 4  # cep-batch.ts's pLimit(4)
+VIACEP_URL = "https://viacep.com.br"
+GOOGLE_URL = "https://maps.googleapis.com"
+API_KEY_ENV = "VITE_GOOGLE_MAPS_API_KEY"
+
+VIACEP_ROUTE = re.compile(r"^https://viacep\.com\.br/ws/\d{8}/json/?$")
+GOOGLE_ROUTE = re.compile(r"^https://maps\.googleapis\.com/maps/api/geocode/json\?")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind       TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT,
+    fetched_at REAL NOT NULL,
+    used_at    REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries(used_at);
+"""
+
+
+def cep_digits(raw: str) -> str | None:
+    digits = re.sub(r"\D", "", str(raw or ""))
+    return digits if len(digits) == 8 else None
+
+
+def format_address(address: dict) -> str:
+    """``formatAddressForGeocoding`` from ``viacep-service.ts``."""
+    parts = [address.get("logradouro"), address.get("bairro"), address.get("localidade"), address.get("uf"), "Brasil"]
+    return ", ".join(p for p in parts if p)
+
+
+# --------------------------------------------------------------------------
+# Store
+
+
+class GeoCache:
+    """``(kind, key) -> JSON value`` in SQLite; a NULL value caches "not found"."""
+
+    def __init__(self, path: Path = DB_PATH, ttl_s: float = DEFAULT_TTL_S,
+                 negative_ttl_s: float = DEFAULT_NEGATIVE_TTL_S, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.max_entries = max_entries
+        self.expired = 0
+        self.evicted = 0
+        # The service owns it from its own thread once started.
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "GeoCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_many(self, kind: str, keys: list[str], now: float | None = None) -> dict[str, Any]:
+        """Fresh entries among ``keys``; marks them used."""
+        now = time.time() if now is None else now
+        found: dict[str, Any] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, value, fetched_at FROM entries WHERE kind = ? AND key IN ({','.join('?' * len(chunk))})",
+                [kind, *chunk],
+            ).fetchall()
+            for key, value, fetched_at in rows:
+                ttl = self.ttl_s if value is not None else self.negative_ttl_s
+                if now - fetched_at > ttl:
+                    self.expired += 1
+                    continue
+                found[key] = json.loads(value) if value is not None else None
+        if found:
+            with self.db:
+                self.db.executemany("UPDATE entries SET used_at = ? WHERE kind = ? AND key = ?",
+                                    [(now, kind, key) for key in found])
+        return found
+
+    def put_many(self, kind: str, values: dict[str, Any], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO entries (kind, key, value, fetched_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                [(kind, key, None if value is None else json.dumps(value, ensure_ascii=False), now, now)
+                 for key, value in values.items()],
+            )
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries beyond ``max_entries``."""
+        (count,) = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        with self.db:
+            self.db.execute("DELETE FROM entries WHERE rowid IN "
+                            "(SELECT rowid FROM entries ORDER BY used_at LIMIT ?)", (excess,))
+        self.evicted += excess
+        return excess
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete expired entries."""
+        now = time.time() if now is None else now
+        with self.db:
+            cursor = self.db.execute(
+                "DELETE FROM entries WHERE (value IS NOT NULL AND fetched_at < ?) OR (value IS NULL AND fetched_at < ?)",
+                (now - self.ttl_s, now - self.negative_ttl_s),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        out: dict[str, dict[str, int]] = {}
+        for kind, found, missing in self.db.execute(
+            "SELECT kind, SUM(value IS NOT NULL), SUM(value IS NULL) FROM entries GROUP BY kind"
+        ):
+            out[kind] = {"found": found, "not_found": missing}
+        return out
+
+
+# --------------------------------------------------------------------------
+# Bulk resolution
+
+
+@dataclass
+class ResolverStats:
+    requested: int = 0
+    deduplicated: int = 0
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    fetch_s: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        looked_up = self.hits + self.misses + self.coalesced
+        return self.hits / looked_up if looked_up else 0.0
+
+
+class Resolver:
+    """Bulk lookups of one ``kind`` through ``cache``, fetching misses with ``fetch``.
+
+    ``fetch`` returns the value, ``None`` for "does not exist" (cached for
+    the negative TTL), or raises; failures are not cached and resolve to
+    ``None``.
+    """
+
+    def __init__(self, cache: GeoCache, kind: str, fetch: Callable[[str], Awaitable[Any]],
+                 concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        self.cache = cache
+        self.kind = kind
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.stats = ResolverStats()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._slots: asyncio.Semaphore | None = None
+
+    async def _fetch_one(self, key: str) -> tuple[str, Any, bool]:
+        async with self._slots:
+            t0 = time.perf_counter()
+            try:
+                value, ok = await self.fetch(key), True
+            except Exception:
+                value, ok = None, False
+                self.stats.errors += 1
+            self.stats.fetch_s += time.perf_counter() - t0
+        self._inflight.pop(key).set_result(value)
+        return key, value, ok
+
+    async def resolve(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(keys)
+        unique = list(dict.fromkeys(keys))
+        self.stats.requested += len(keys)
+        self.stats.deduplicated += len(keys) - len(unique)
+        found = self.cache.get_many(self.kind, unique)
+        self.stats.hits += len(found)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        waiting, own = {}, []
+        for key in unique:
+            if key in found:
+                continue
+            if key in self._inflight:
+                self.stats.coalesced += 1
+                waiting[key] = self._inflight[key]
+            else:
+                self._inflight[key] = asyncio.get_running_loop().create_future()
+                own.append(key)
+        self.stats.misses += len(own)
+        fetched = await asyncio.gather(*(self._fetch_one(key) for key in own))
+        self.cache.put_many(self.kind, {key: value for key, value, ok in fetched if ok})
+        found.update({key: value for key, value, _ in fetched})
+        for key, future in waiting.items():
+            found[key] = await future
+        return {key: found.get(key) for key in unique}
+
+
+# --------------------------------------------------------------------------
+# Upstreams
+
+
+class Upstream:
+    """ViaCEP and the Google Geocoding API over :class:`HttpClient`."""
+
+    def __init__(self, viacep_url: str = VIACEP_URL, google_url: str = GOOGLE_URL, api_key: str | None = None,
+                 connections: int = DEFAULT_CONCURRENCY) -> None:
+        self.viacep_client = HttpClient(viacep_url, max_connections=connections)
+        self.google_client = HttpClient(google_url, max_connections=connections)
+        self.api_key = api_key if api_key is not None else os.environ.get(API_KEY_ENV, "")
+
+    async def viacep(self, digits: str) -> dict | None:
+        response = await self.viacep_client.request("GET", f"/ws/{digits}/json/")
+        if response.status != 200:
+            raise RuntimeError(f"ViaCEP HTTP {response.status}")
+        data = response.json()
+        return None if data.get("erro") else data
+
+    async def geocode(self, address: str) -> dict | None:
+        response = await self.google_client.request(
+            "GET", f"/maps/api/geocode/json?address={quote(address)}&key={self.api_key}&region=br&language=pt-BR")
+        if response.status != 200:
+            raise RuntimeError(f"geocode HTTP {response.status}")
+        data = response.json()
+        if data.get("status") == "ZERO_RESULTS":
+            return None
+        if data.get("status") != "OK":
+            raise RuntimeError(f"geocode {data.get('status')}")
+        return data
+
+    async def close(self) -> None:
+        await self.viacep_client.close()
+        await self.google_client.close()
+
+
+class UpstreamStandIn:
+    """Synthetic ViaCEP and Google answers with API-like latency.
+
+    Every CEP exists except about ``missing`` of them; addresses geocode
+    near the city they name, bare ``"<cep>, Brasil"`` near the CEP's region.
+    """
+
+    def __init__(self, viacep_ms: float = 120.0, geocode_ms: float = 180.0, missing: float = 0.03,
+                 seed: int = 1) -> None:
+        self.viacep_ms = viacep_ms
+        self.geocode_ms = geocode_ms
+        self.missing = missing
+        self.seed = seed
+        self.calls = {"viacep": 0, "geocode": 0}
+
+    async def _latency(self, ms: float, key: str) -> None:
+        await asyncio.sleep(ms * random.Random(f"{self.seed}:latency:{key}").uniform(0.6, 1.8) / 1000)
+
+    async def viacep(self, digits: str) -> dict | None:
+        self.calls["viacep"] += 1
+        await self._latency(self.viacep_ms, digits)
+        if random.Random(f"{self.seed}:missing:{digits}").random() < self.missing:
+            return None
+        return viacep_address(digits)
+
+    async def geocode(self, address: str) -> dict | None:
+        self.calls["geocode"] += 1
+        await self._latency(self.geocode_ms, address)
+        city = next((c for c in BRAZILIAN_CITIES if f", {c[0]}, " in address), None)
+        cep = re.search(r"\d{5}-?\d{3}", address)
+        if city is not None:
+            lat, lng = city[2], city[3]
+        elif cep is not None:
+            _, _, lat, lng = cep_city(cep.group(0))
+        else:
+            return None
+        rng = random.Random(f"{self.seed}:{address}")
+        lat, lng = jitter(rng, lat, lng, km=12.0)
+        place = f"synthetic-{rng.getrandbits(40):012x}"
+        return {"status": "OK", "results": [{
+            "place_id": place, "formatted_address": address,
+            "geometry": {"location": {"lat": lat, "lng": lng}, "location_type": "APPROXIMATE"},
+        }]}
+
+    async def close(self) -> None:
+        pass
+
+
+# --------------------------------------------------------------------------
+# Service
+
+
+class GeoService:
+    """Cached ViaCEP and geocoding lookups sharing one store."""
+
+    def __init__(self, cache: GeoCache, upstream: Upstream | UpstreamStandIn,
+                 concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        self.cache = cache
+        self.upstream = upstream
+        self.viacep = Resolver(cache, "viacep", upstream.viacep, concurrency)
+        self.geocode = Resolver(cache, "geocode", upstream.geocode, concurrency)
+
+    async def resolve(self, ceps: Iterable[str]) -> dict[str, dict | None]:
+        """``{cep: {lat, lng, formatted, place_id} | None}`` as ``geocodeAddress`` would find them."""
+        digits = {cep: cep_digits(cep) for cep in ceps}
+        addresses = await self.viacep.resolve(d for d in digits.values() if d)
+        queries = {}
+        for cep, d in digits.items():
+            if d:
+                address = addresses.get(d)
+                queries[cep] = format_address(address) if address else f"{d[:5]}-{d[5:]}, Brasil"
+        geocoded = await self.geocode.resolve(queries.values())
+        out: dict[str, dict | None] = {}
+        for cep in digits:
+            data = geocoded.get(queries.get(cep)) if cep in queries else None
+            if not data or not data.get("results"):
+                out[cep] = None
+                continue
+            result = data["results"][0]
+            out[cep] = {"lat": result["geometry"]["location"]["lat"], "lng": result["geometry"]["location"]["lng"],
+                        "formatted": result["formatted_address"], "place_id": result["place_id"]}
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "viacep": {**asdict(self.viacep.stats), "hit_rate": round(self.viacep.stats.hit_rate, 4)},
+            "geocode": {**asdict(self.geocode.stats), "hit_rate": round(self.geocode.stats.hit_rate, 4)},
+            "expired": self.cache.expired,
+            "evicted": self.cache.evicted,
+            "entries": self.cache.counts(),
+        }
+
+    def http_server(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> HttpServer:
+        server = HttpServer(host, port)
+
+        async def viacep(request: Request) -> Response:
+            address = (await self.viacep.resolve([request.match.group(1)]))[request.match.group(1)]
+            return Response(200, address if address is not None else {"erro": True})
+
+        async def geocode(request: Request) -> Response:
+            address = (request.arg("address") or "").strip()
+            if not address:
+                return Response(200, {"status": "INVALID_REQUEST", "results": []})
+            data = (await self.geocode.resolve([address]))[address]
+            return Response(200, data if data is not None else {"status": "ZERO_RESULTS", "results": []})
+
+        async def resolve(request: Request) -> Response:
+            body = request.json() or {}
+            t0 = time.perf_counter()
+            results = await self.resolve(body.get("ceps") or [])
+            return Response(200, {"results": results, "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2)})
+
+        async def stats(request: Request) -> Response:
+            return Response(200, self.stats())
+
+        server.route("GET", r"/ws/(\d{8})/json/?", viacep)
+        server.route("GET", r"/maps/api/geocode/json", geocode)
+        server.route("POST", r"/resolve", resolve)
+        server.route("GET", r"/stats", stats)
+        return server
+
+
+def make_upstream(kind: str) -> Upstream | UpstreamStandIn:
+    return UpstreamStandIn() if kind == "standin" else Upstream()
+
+
+def service_url(port: int = DEFAULT_PORT, host: str = "127.0.0.1") -> str:
+    return f"http://{host}:{port}"
+
+
+@contextmanager
+def serve(port: int = DEFAULT_PORT, upstream: str = "live", path: Path = DB_PATH,
+          host: str = "127.0.0.1") -> Iterator[GeoService]:
+    """Run the service on a background thread, like :func:`harness.static.serve`."""
+    loop = asyncio.new_event_loop()
+    service = GeoService(GeoCache(path), make_upstream(upstream))
+    server = service.http_server(host, port)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, name="harness-geocache", daemon=True)
+    thread.start()
+    try:
+        yield service
+    finally:
+        async def stop() -> None:
+            await server.close()
+            await service.upstream.close()
+
+        asyncio.run_coroutine_threadsafe(stop(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+        service.cache.close()
+
+
+def summary(service: GeoService) -> str:
+    parts = []
+    for name in ("viacep", "geocode"):
+        s = getattr(service, name).stats
+        parts.append(f"{name} {s.hits}/{s.hits + s.misses + s.coalesced} hits ({s.hit_rate:.0%})"
+                     + (f", {s.errors} errors" if s.errors else ""))
+    return "geocache: " + ", ".join(parts)
+
+
+# --------------------------------------------------------------------------
+# Clients
+
+
+async def install(context: BrowserContext, url: str) -> None:
+    """Send ``context``'s ViaCEP CEP lookups and Google geocoding to the service at ``url``."""
+
+    async def forward(route: Route) -> None:
+        parts = urlsplit(route.request.url)
+        response = await route.fetch(url=url + parts.path + (f"?{parts.query}" if parts.query else ""))
+        await route.fulfill(response=response)
+
+    await context.route(VIACEP_ROUTE, forward)
+    await context.route(GOOGLE_ROUTE, forward)
+
+
+def service_geocoder(url: str, timeout: float = 300.0) -> Callable[[list[str]], dict[str, tuple[float, float]]]:
+    """A :data:`harness.proximity.Geocoder` backed by ``POST /resolve``."""
+
+    def geocode(ceps: list[str]) -> dict[str, tuple[float, float]]:
+        request = urllib.request.Request(url.rstrip("/") + "/resolve", data=json.dumps({"ceps": ceps}).encode(),
+                                         headers={"content-type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            results = json.loads(response.read())["results"]
+        return {cep: (r["lat"], r["lng"]) for cep, r in results.items() if r}
+
+    return geocode
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.geocache", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="run the local stand-in")
+    serve_cmd.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--upstream", choices=["live", "standin"], default="live")
+    serve_cmd.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="upstream fetches at once")
+    resolve_cmd = sub.add_parser("resolve", help="resolve CEPs through the cache and print them")
+    resolve_cmd.add_argument("ceps", nargs="*")
+    resolve_cmd.add_argument("--file", type=Path, help="one CEP per line")
+    resolve_cmd.add_argument("--upstream", choices=["live", "standin"], default="live")
+    resolve_cmd.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    sub.add_parser("stats", help="entries per kind")
+    sub.add_parser("prune", help="delete expired entries")
+    args = parser.parse_args(argv)
+
+    cache = GeoCache(args.db)
+    try:
+        if args.command == "serve":
+            service = GeoService(cache, make_upstream(args.upstream), args.concurrency)
+
+            async def run() -> None:
+                async with service.http_server(args.host, args.port) as server:
+                    print(f"geocache on {server.url} (upstream: {args.upstream}, {args.db})", flush=True)
+                    await asyncio.Event().wait()
+
+            try:
+                asyncio.run(run())
+            except KeyboardInterrupt:
+                print(summary(service))
+        elif args.command == "resolve":
+            ceps = list(args.ceps)
+            if args.file:
+                ceps += [line.strip() for line in args.file.read_text(encoding="utf-8").splitlines() if line.strip()]
+            service = GeoService(cache, make_upstream(args.upstream), args.concurrency)
+
+            async def run() -> dict:
+                try:
+                    return await service.resolve(ceps)
+                finally:
+                    await service.upstream.close()
+
+            t0 = time.perf_counter()
+            results = asyncio.run(run())
+            for cep, point in results.items():
+                print(f"{cep:<10} " + (f"{point['lat']:.6f},{point['lng']:.6f}  {point['formatted']}" if point
+                                       else "not found"))
+            print(f"{len(results)} CEPs in {time.perf_counter() - t0:.2f}s; {summary(service)}")
+        elif args.command == "stats":
+            for kind, counts in sorted(cache.counts().items()):
+                print(f"{kind:<8} {counts['found']:>8} found  {counts['not_found']:>6} not found")
+        else:
+            print(f"pruned {cache.prune()} expired entries")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Record each TC's network traffic and replay it later.
+
+``python -m harness.runner --record`` stores every request a case makes to
+a third-party origin (Supabase, map tiles, fonts, CDNs) in a per-test HAR
+manifest under ``tmp/har/``.  Response bodies are kept once, gzipped and
+named by their SHA-256, so identical payloads shared by several cases -
+the same ``profiles`` row, the same tile - cost nothing after the first.
+
+``python -m harness.runner --replay`` serves the archive back: Supabase
+traffic through :class:`harness.mocks.SupabaseMock` (so login stays
+synthesized and never hits an expired recorded token), everything else
+straight from the archive, with the recorded latency, a multiple of it or
+none (``--latency original|zero|<factor>``).  Comparing runs at ``zero``
+and ``original`` separates front-end time from backend time.  The app's own
+origin is never recorded or replayed; it comes from the server under test.
+
+::
+
+    python -m harness.runner --record TC004 TC008
+    python -m harness.runner --replay --latency zero
+    python -m harness.har            # archive statistics
+    python -m harness.har --prune    # drop blobs no manifest references
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Error, Request, Route
+
+from .config import TMP_DIR, base_url
+from .mocks import SUPABASE_PATH, Fixture, FixtureStore, SupabaseMock
+
+ARCHIVE_DIR = TMP_DIR / "har"
+
+# Never written to disk; replay does not need them.
+DROPPED_HEADERS = {"authorization", "apikey", "cookie", "set-cookie", "content-length",
+                   "content-encoding", "transfer-encoding"}
+
+
+def latency_scale(value: str) -> float:
+    """Parse ``original``, ``zero`` or a factor into a latency multiplier."""
+    modes = {"original": 1.0, "zero": 0.0}
+    if value in modes:
+        return modes[value]
+    try:
+        scale = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected original, zero or a number, got {value!r}") from None
+    if scale < 0:
+        raise argparse.ArgumentTypeError("latency factor must be >= 0")
+    return scale
+
+
+class Archive:
+    """Per-test manifests plus a shared, content-addressed blob store."""
+
+    def __init__(self, directory: Path = ARCHIVE_DIR) -> None:
+        self.directory = directory
+        self.blobs_dir = directory / "blobs"
+        self.new_blobs = 0
+        self.reused_blobs = 0
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / f"{digest}.gz"
+
+    def put_blob(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            self.reused_blobs += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(gzip.compress(body, compresslevel=6))
+            tmp.replace(path)
+            self.new_blobs += 1
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        return gzip.decompress(self.blob_path(digest).read_bytes())
+
+    def manifest_path(self, test_id: str) -> Path:
+        return self.directory / f"{test_id}.har.gz"
+
+    def write_manifest(self, test_id: str, entries: list[dict]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        har = {"log": {"version": "1.2", "creator": {"name": "harness.har", "version": "1"}, "entries": entries}}
+        self.manifest_path(test_id).write_bytes(gzip.compress(json.dumps(har).encode()))
+
+    def manifests(self) -> dict[str, list[dict]]:
+        result = {}
+        for path in sorted(self.directory.glob("*.har.gz")):
+            result[path.name.removesuffix(".har.gz")] = json.loads(gzip.decompress(path.read_bytes()))["log"]["entries"]
+        return result
+
+    def load_into(self, store: FixtureStore, test_ids: set[str] | None = None) -> int:
+        """Add the archived entries (optionally only ``test_ids``') to ``store``."""
+        added = 0
+        for test_id, entries in self.manifests().items():
+            if test_ids and test_id not in test_ids:
+                continue
+            for entry in entries:
+                request, response = entry["request"], entry["response"]
+                digest = response["content"].get("_sha256")
+                body = self.get_blob(digest) if digest else b""
+                post = request.get("_postSha256")
+                store.add(request["method"], request["url"], self.get_blob(post) if post else None, Fixture(
+                    response["status"],
+                    {h["name"]: h["value"] for h in response["headers"]},
+                    body,
+                    float(entry.get("time") or 0),
+                ))
+                added += 1
+        return added
+
+    @staticmethod
+    def _referenced(manifests: dict[str, list[dict]]) -> set[str]:
+        entries = [e for es in manifests.values() for e in es]
+        digests = {e["response"]["content"].get("_sha256") for e in entries}
+        digests |= {e["request"].get("_postSha256") for e in entries}
+        digests.discard(None)
+        return digests
+
+    def stats(self) -> dict:
+        manifests = self.manifests()
+        referenced = self._referenced(manifests)
+        blobs = list(self.blobs_dir.glob("*/*.gz"))
+        raw = sum(e["response"]["content"].get("size", 0) for es in manifests.values() for e in es)
+        return {
+            "tests": len(manifests),
+            "entries": sum(len(es) for es in manifests.values()),
+            "blobs": len(blobs),
+            "unreferenced_blobs": sum(p.name.removesuffix(".gz") not in referenced for p in blobs),
+            "response_bytes": raw,
+            "stored_bytes": sum(p.stat().st_size for p in blobs),
+        }
+
+    def prune(self) -> int:
+        referenced = self._referenced(self.manifests())
+        removed = 0
+        for path in self.blobs_dir.glob("*/*.gz"):
+            if path.name.removesuffix(".gz") not in referenced:
+                path.unlink()
+                removed += 1
+        return removed
+
+
+def _recordable(url: str) -> bool:
+    return urlsplit(url).scheme in ("http", "https") and urlsplit(url).netloc != urlsplit(base_url()).netloc
+
+
+class Recorder:
+    """Collects one case's finished requests into the archive."""
+
+    def __init__(self, archive: Archive, test_id: str) -> None:
+        self.archive = archive
+        self.test_id = test_id
+        self.entries: list[dict] = []
+        self._pending: set[asyncio.Task] = set()
+
+    def attach(self, context: BrowserContext) -> None:
+        context.on("requestfinished", self._on_finished)
+
+    def detach(self, context: BrowserContext) -> None:
+        context.remove_listener("requestfinished", self._on_finished)
+
+    def _on_finished(self, request: Request) -> None:
+        if request.method == "OPTIONS" or not _recordable(request.url):
+            return
+        # Auth is synthesized on replay, and its bodies carry credentials.
+        if "/auth/v1/" in request.url:
+            return
+        task = asyncio.ensure_future(self._capture(request, time.time()))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _capture(self, request: Request, finished_at: float) -> None:
+        response = await request.response()
+        if response is None:
+            return
+        try:
+            body = await response.body()
+        except Error:
+            # Redirects and some aborted requests have no body to read.
+            body = b""
+        headers = await response.all_headers()
+        timing = request.timing
+        elapsed = timing.get("responseEnd", -1)
+        post = request.post_data_buffer
+        self.entries.append({
+            "startedDateTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(finished_at)),
+            "time": round(elapsed, 3) if elapsed and elapsed > 0 else 0,
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "_postSha256": self.archive.put_blob(post) if post else None,
+            },
+            "response": {
+                "status": response.status,
+                "headers": [{"name": k, "value": v} for k, v in headers.items() if k not in DROPPED_HEADERS],
+                "content": {
+                    "size": len(body),
+                    "mimeType": headers.get("content-type", ""),
+                    "_sha256": self.archive.put_blob(body),
+                },
+            },
+        })
+
+    async def finish(self) -> int:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        self.entries.sort(key=lambda e: e["startedDateTime"])
+        self.archive.write_manifest(self.test_id, self.entries)
+        return len(self.entries)
+
+
+class Replayer:
+    """Serves archived third-party traffic; Supabase goes through ``mock``."""
+
+    def __init__(self, mock: SupabaseMock) -> None:
+        self.mock = mock
+        self.passed_through = 0
+
+    async def handle(self, route: Route) -> None:
+        url = route.request.url
+        if SUPABASE_PATH.match(url):
+            await self.mock.handle(route)
+            return
+        if not _recordable(url):
+            await route.continue_()
+            return
+        fixture = self.mock.store.lookup(route.request.method, url, route.request.post_data_buffer)
+        if fixture is None:
+            self.passed_through += 1
+            await route.continue_()
+            return
+        self.mock.served += 1
+        if self.mock.latency_scale and fixture.time_ms:
+            await asyncio.sleep(fixture.time_ms * self.mock.latency_scale / 1000)
+        await route.fulfill(status=fixture.status, headers=fixture.headers, body=fixture.body)
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route("**/*", self.handle)
+
+
+def replayer(archive: Archive, latency: float = 0.0, test_ids: set[str] | None = None) -> Replayer:
+    """A :class:`Replayer` over ``archive`` plus the static Supabase fixtures."""
+    store = FixtureStore.from_dir()
+    archive.load_into(store, test_ids)
+    return Replayer(SupabaseMock(store, latency))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.har", description=__doc__.splitlines()[0])
+    parser.add_argument("--archive", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--prune", action="store_true", help="delete blobs no manifest references")
+    args = parser.parse_args(argv)
+
+    archive = Archive(args.archive)
+    if args.prune:
+        print(f"removed {archive.prune()} blobs")
+    stats = archive.stats()
+    ratio = stats["stored_bytes"] / stats["response_bytes"] if stats["response_bytes"] else 0
+    print(f"{stats['tests']} tests, {stats['entries']} entries, {stats['blobs']} blobs "
+          f"({stats['unreferenced_blobs']} unreferenced)")
+    print(f"{stats['response_bytes']:,} response bytes stored in {stats['stored_bytes']:,} ({ratio:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
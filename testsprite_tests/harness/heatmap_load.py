@@ -0,0 +1,545 @@
+"""Load generator for the ``maps-heatmap`` edge function and its cache.
+
+``supabase/functions/maps-heatmap/index.ts`` keeps results in a per-isolate
+``Map`` with a 5 minute TTL, keyed by ``JSON.stringify(filters)``.  This
+module replays realistic filter mixes against it and reports p50/p95/p99
+latency, throughput and cache hit ratio.
+
+Two targets:
+
+* in-process (default): :class:`HeatmapFunction` mirrors ``index.ts`` step
+  by step (auth check, cache lookup, the sequential ``get_heatmap_stats`` /
+  ``get_available_cities`` / ``get_available_classes`` / ``get_heatmap_data``
+  RPCs) on top of :class:`HeatmapRpc`, a stand-in for those SQL functions
+  over synthetic screens and proposals with a latency model.  Every cache
+  strategy in :data:`STRATEGIES` is run against the same request stream, so
+  the current cache can be compared with bounded LRU, normalized keys and
+  request coalescing.
+* ``--target URL``: drives a real deployment, e.g. ``supabase functions
+  serve`` with ``SUPABASE_URL`` pointed at ``--serve-rpc PORT`` (the RPC
+  stand-in exposed over HTTP).  Hits are inferred from
+  ``metadata.timestamp`` being older than the request.
+
+::
+
+    python -m harness.heatmap_load --rate 50 --requests 3000 --isolates 2
+    python -m harness.heatmap_load --serve-rpc 54400
+    python -m harness.heatmap_load --target http://localhost:54321/functions/v1/maps-heatmap
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import datetime as dt
+import json
+import random
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .config import TMP_DIR
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .stats import latency_summary
+from .synthetic import BRAZILIAN_CITIES, SCREEN_CLASSES, screen_rows
+
+RESULTS_PATH = TMP_DIR / "heatmap_load_results.json"
+FILTER_FIELDS = ("startDate", "endDate", "city", "class", "normalize", "stats", "cities", "classes")
+
+
+# --------------------------------------------------------------------------
+# RPC stand-in
+
+
+@dataclass
+class LatencyModel:
+    """Round trip to PostgREST plus a scan cost proportional to rows read."""
+
+    rtt_ms: float = 20.0
+    ms_per_1k_rows: float = 4.0
+    auth_ms: float = 25.0
+    jitter: float = 0.2
+
+    def rpc_s(self, rows: int, rng: random.Random) -> float:
+        base = self.rtt_ms + self.ms_per_1k_rows * rows / 1000
+        return base * (1 + rng.uniform(-self.jitter, self.jitter)) / 1000
+
+
+class HeatmapRpc:
+    """In-memory ``get_heatmap_*`` RPCs over synthetic data.
+
+    Semantics follow ``20250909000000_create_heatmap_function.sql``: only
+    screens with at least one proposal in the period are returned, ``city``
+    is matched with ``ILIKE '%city%'`` and dates are compared as ``DATE``.
+    """
+
+    def __init__(self, screens: int = 2000, proposals: int = 6000, seed: int = 7,
+                 latency: LatencyModel | None = None, today: dt.date | None = None) -> None:
+        rng = random.Random(seed)
+        self.today = today or dt.date.today()
+        self.latency = latency or LatencyModel()
+        self.rng = random.Random(seed + 1)
+        self.screens = screen_rows(screens, seed)
+        dates: list[list[int]] = [[] for _ in self.screens]
+        for _ in range(proposals):
+            day = (self.today - dt.timedelta(days=rng.randint(0, 364))).toordinal()
+            for index in rng.sample(range(len(self.screens)), k=min(len(self.screens), rng.randint(1, 40))):
+                dates[index].append(day)
+        for d in dates:
+            d.sort()
+        self.proposal_days = dates
+        self.calls = 0
+
+    @staticmethod
+    def _day(value: str | None, default: int) -> int:
+        return dt.date.fromisoformat(value[:10]).toordinal() if value else default
+
+    def _rows(self, start: str | None, end: str | None, city: str | None, klass: str | None) -> list[tuple[dict, int]]:
+        lo, hi = self._day(start, 0), self._day(end, 10**7)
+        needle = city.lower() if city else None
+        rows = []
+        for screen, days in zip(self.screens, self.proposal_days):
+            if needle and needle not in screen["city"].lower():
+                continue
+            if klass and screen["class"] != klass:
+                continue
+            count = bisect.bisect_right(days, hi) - bisect.bisect_left(days, lo)
+            if count:
+                rows.append((screen, count))
+        return rows
+
+    async def _cost(self, rows: int) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.latency.rpc_s(rows, self.rng))
+
+    async def get_heatmap_data(self, p_start_date=None, p_end_date=None, p_city=None, p_class=None,
+                               p_normalize=False) -> list[dict]:
+        rows = self._rows(p_start_date, p_end_date, p_city, p_class)
+        await self._cost(len(self.screens))
+        total = sum(c for _, c in rows) or 1
+        rows.sort(key=lambda r: -r[1])
+        return [{
+            "screen_id": s["id"], "lat": s["lat"], "lng": s["lng"], "name": s["name"], "city": s["city"],
+            "class": "ND", "proposal_count": c,
+            "normalized_intensity": c / total if p_normalize else float(c),
+        } for s, c in rows]
+
+    async def get_heatmap_stats(self, p_start_date=None, p_end_date=None, p_city=None, p_class=None) -> list[dict]:
+        rows = self._rows(p_start_date, p_end_date, p_city, p_class)
+        # The SQL runs get_heatmap_data underneath, so it pays the scan twice.
+        await self._cost(2 * len(self.screens))
+        counts = [c for _, c in rows]
+        return [{
+            "total_screens": len(rows),
+            "total_proposals": sum(counts),
+            "max_intensity": max(counts, default=0),
+            "avg_intensity": sum(counts) / len(counts) if counts else 0,
+            "cities_count": len({s["city"] for s, _ in rows}),
+            "classes_count": len({s["class"] for s, _ in rows}),
+        }]
+
+    async def _grouped(self, key: str, p_start_date, p_end_date) -> list[dict]:
+        rows = self._rows(p_start_date, p_end_date, None, None)
+        await self._cost(len(self.screens))
+        groups: dict[str, list[int]] = {}
+        for s, c in rows:
+            groups.setdefault(s[key], []).append(c)
+        out = [{key: k, "screen_count": len(v), "proposal_count": sum(v)} for k, v in groups.items()]
+        return sorted(out, key=lambda r: -r["proposal_count"])
+
+    async def get_available_cities(self, p_start_date=None, p_end_date=None) -> list[dict]:
+        return await self._grouped("city", p_start_date, p_end_date)
+
+    async def get_available_classes(self, p_start_date=None, p_end_date=None) -> list[dict]:
+        return await self._grouped("class", p_start_date, p_end_date)
+
+    async def get_user(self) -> dict:
+        await asyncio.sleep(self.latency.auth_ms / 1000)
+        return {"id": "00000000-0000-4000-8000-000000000000", "email": "suporte@tvdoutor.com.br"}
+
+    def http_server(self, host: str = "127.0.0.1", port: int = 0) -> HttpServer:
+        """PostgREST ``/rest/v1/rpc/*`` and ``/auth/v1/user`` over HTTP."""
+        server = HttpServer(host, port)
+
+        async def rpc(request: Request) -> Response:
+            method = getattr(self, request.match.group(1), None)
+            if method is None or request.match.group(1) == "get_user":
+                return Response(404, {"message": f"function {request.match.group(1)} not found"})
+            return Response(200, await method(**(request.json() or {})))
+
+        async def user(request: Request) -> Response:
+            return Response(200, await self.get_user())
+
+        server.route("POST", r"/rest/v1/rpc/(\w+)", rpc)
+        server.route("GET", r"/auth/v1/user", user)
+        return server
+
+
+# --------------------------------------------------------------------------
+# Edge function stand-in and cache strategies
+
+
+def js_stringify(filters: dict) -> str:
+    """``JSON.stringify`` of the filters object built in ``index.ts``."""
+    return json.dumps({k: filters[k] for k in FILTER_FIELDS if filters.get(k) is not None},
+                      separators=(",", ":"), ensure_ascii=False)
+
+
+def normalized_key(filters: dict) -> str:
+    """Key that folds filters the SQL treats identically.
+
+    ``city`` goes through ``ILIKE`` so its case is irrelevant, and dates are
+    cast to ``DATE`` so any time-of-day suffix is irrelevant too.
+    """
+    norm = dict(filters)
+    for name in ("startDate", "endDate"):
+        if norm.get(name):
+            norm[name] = norm[name][:10]
+    if norm.get("city"):
+        norm["city"] = norm["city"].casefold()
+    return js_stringify(norm)
+
+
+class TtlMapCache:
+    """What ``index.ts`` does: unbounded map, expired entries dropped on read."""
+
+    def __init__(self, ttl_s: float = 300.0) -> None:
+        self.ttl_s = ttl_s
+        self.entries: dict[str, tuple[object, float]] = {}
+        self.peak_entries = 0
+
+    def get(self, key: str, now: float):
+        entry = self.entries.get(key)
+        if entry and now - entry[1] < self.ttl_s:
+            return entry[0]
+        self.entries.pop(key, None)
+        return None
+
+    def set(self, key: str, data, now: float) -> None:
+        self.entries[key] = (data, now)
+        self.peak_entries = max(self.peak_entries, len(self.entries))
+
+
+class LruTtlCache(TtlMapCache):
+    """TTL plus a bound on entries, evicting the least recently used."""
+
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 128) -> None:
+        super().__init__(ttl_s)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key: str, now: float):
+        data = super().get(key, now)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def set(self, key: str, data, now: float) -> None:
+        self.entries[key] = (data, now)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.peak_entries = max(self.peak_entries, len(self.entries))
+
+
+@dataclass
+class Strategy:
+    name: str
+    make_cache: Callable[[float], TtlMapCache | None]
+    key: Callable[[dict], str] = js_stringify
+    coalesce: bool = False
+
+
+STRATEGIES = {
+    "no-cache": Strategy("no-cache", lambda ttl: None),
+    "current": Strategy("current", lambda ttl: TtlMapCache(ttl)),
+    "lru": Strategy("lru", lambda ttl: LruTtlCache(ttl)),
+    "lru-normalized": Strategy("lru-normalized", lambda ttl: LruTtlCache(ttl), normalized_key),
+    "lru-normalized-coalesced": Strategy("lru-normalized-coalesced", lambda ttl: LruTtlCache(ttl),
+                                         normalized_key, coalesce=True),
+}
+
+
+class HeatmapFunction:
+    """One isolate of ``maps-heatmap`` with a pluggable cache strategy."""
+
+    def __init__(self, rpc: HeatmapRpc, strategy: Strategy, ttl_s: float = 300.0) -> None:
+        self.rpc = rpc
+        self.strategy = strategy
+        self.cache = strategy.make_cache(ttl_s)
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def handle(self, body: dict) -> dict:
+        await self.rpc.get_user()
+        filters = {
+            "startDate": body.get("startDate") or None,
+            "endDate": body.get("endDate") or None,
+            "city": body.get("city") or None,
+            "class": body.get("class") or None,
+            "normalize": bool(body.get("normalize")),
+            "stats": bool(body.get("stats")),
+            "cities": bool(body.get("cities")),
+            "classes": bool(body.get("classes")),
+        }
+        key = self.strategy.key(filters)
+        if self.cache is not None:
+            cached = self.cache.get(key, time.monotonic())
+            if cached is not None:
+                self.hits += 1
+                return cached
+        future = None
+        if self.strategy.coalesce:
+            if key in self.inflight:
+                self.hits += 1
+                return await asyncio.shield(self.inflight[key])
+            future = self.inflight[key] = asyncio.get_running_loop().create_future()
+        self.misses += 1
+        try:
+            result = await self._compute(filters, key)
+        except Exception as exc:
+            if future is not None:
+                future.set_exception(exc)
+                future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self.inflight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+        if self.cache is not None:
+            self.cache.set(key, result, time.monotonic())
+        return result
+
+    async def _compute(self, f: dict, key: str) -> dict:
+        result: dict = {}
+        period = {"p_start_date": f["startDate"], "p_end_date": f["endDate"]}
+        if f["stats"]:
+            stats = await self.rpc.get_heatmap_stats(**period, p_city=f["city"], p_class=f["class"])
+            result["stats"] = stats[0]
+        if f["cities"]:
+            result["cities"] = await self.rpc.get_available_cities(**period)
+        if f["classes"]:
+            result["classes"] = await self.rpc.get_available_classes(**period)
+        data = await self.rpc.get_heatmap_data(**period, p_city=f["city"], p_class=f["class"],
+                                               p_normalize=f["normalize"])
+        result["heatmap"] = [[r["lat"], r["lng"], r["normalized_intensity"] if f["normalize"] else r["proposal_count"]]
+                             for r in data]
+        result["metadata"] = {"filters": f, "totalPoints": len(data), "cacheKey": key,
+                              "timestamp": dt.datetime.now(dt.timezone.utc).isoformat()}
+        return result
+
+
+# --------------------------------------------------------------------------
+# Workload
+
+
+class FilterMix:
+    """Request bodies shaped like ``useHeatmapData`` and the heatmap page.
+
+    Most traffic is unfiltered or on a date preset; cities come from the
+    dropdown (canonical case) or typed search (any case), and date pickers
+    sometimes send full ISO timestamps instead of plain dates.
+    """
+
+    PRESET_DAYS = [(None, 35), (7, 20), (30, 25), (90, 10), ("custom", 10)]
+
+    def __init__(self, seed: int = 1, today: dt.date | None = None) -> None:
+        self.rng = random.Random(seed)
+        self.today = today or dt.date.today()
+
+    def _date(self, day: dt.date) -> str:
+        if self.rng.random() < 0.3:
+            return f"{day.isoformat()}T03:00:00.000Z"
+        return day.isoformat()
+
+    def next(self) -> dict:
+        rng = self.rng
+        body: dict = {}
+        preset = rng.choices([p for p, _ in self.PRESET_DAYS], weights=[w for _, w in self.PRESET_DAYS])[0]
+        if preset == "custom":
+            start = self.today - dt.timedelta(days=rng.randint(30, 360))
+            body["startDate"] = self._date(start)
+            body["endDate"] = self._date(start + dt.timedelta(days=rng.randint(7, 60)))
+        elif preset:
+            body["startDate"] = self._date(self.today - dt.timedelta(days=preset))
+            body["endDate"] = self._date(self.today)
+        if rng.random() < 0.5:
+            city = rng.choices([c[0] for c in BRAZILIAN_CITIES], weights=[c[4] for c in BRAZILIAN_CITIES])[0]
+            roll = rng.random()
+            body["city"] = city if roll < 0.7 else city.lower() if roll < 0.9 else city.upper()
+        if rng.random() < 0.3:
+            body["class"] = rng.choice(SCREEN_CLASSES[:-1])
+        if rng.random() < 0.2:
+            body["normalize"] = True
+        if rng.random() < 0.9:
+            body.update(stats=True, cities=True, classes=True)
+        return body
+
+
+@dataclass
+class LoadResult:
+    strategy: str
+    latencies_s: list[float] = field(default_factory=list)
+    errors: int = 0
+    hits: int = 0
+    elapsed_s: float = 0.0
+    rpc_calls: int = 0
+    peak_cache_entries: int = 0
+
+    def report(self) -> dict:
+        total = len(self.latencies_s) + self.errors
+        return {
+            "strategy": self.strategy,
+            **latency_summary(self.latencies_s, self.elapsed_s),
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "rpc_calls": self.rpc_calls,
+            "peak_cache_entries": self.peak_cache_entries,
+        }
+
+
+async def drive(send: Callable[[dict], "asyncio.Future"], bodies: list[dict], rate: float | None,
+                clients: int, seed: int) -> tuple[list[float], int, float]:
+    """Send ``bodies`` open-loop at ``rate`` req/s (Poisson) or closed-loop.
+
+    Returns per-request latencies, error count and elapsed wall time.
+    """
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(body: dict) -> None:
+        nonlocal errors
+        t0 = time.perf_counter()
+        try:
+            await send(body)
+        except Exception:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    if rate:
+        rng = random.Random(seed)
+        tasks = []
+        for body in bodies:
+            tasks.append(asyncio.ensure_future(one(body)))
+            await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+    else:
+        queue = list(reversed(bodies))
+
+        async def client() -> None:
+            while queue:
+                await one(queue.pop())
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - t0
+
+
+async def run_inprocess(strategies: list[str], bodies: list[dict], args) -> list[dict]:
+    reports = []
+    for name in strategies:
+        rpc = HeatmapRpc(args.screens, args.proposals, args.seed,
+                         LatencyModel(args.rpc_rtt_ms, args.ms_per_1k_rows, args.auth_ms))
+        isolates = [HeatmapFunction(rpc, STRATEGIES[name], args.ttl) for _ in range(args.isolates)]
+        router = random.Random(args.seed)
+
+        def send(body: dict):
+            return router.choice(isolates).handle(body)
+
+        latencies, errors, elapsed = await drive(send, bodies, args.rate, args.clients, args.seed)
+        result = LoadResult(name, latencies, errors, sum(i.hits for i in isolates), elapsed, rpc.calls,
+                            sum(i.cache.peak_entries for i in isolates if i.cache is not None))
+        reports.append(result.report())
+        print(_format(reports[-1]), flush=True)
+    return reports
+
+
+async def run_remote(target: str, bodies: list[dict], args) -> list[dict]:
+    client = HttpClient(target, max_connections=args.clients,
+                        headers={"authorization": f"Bearer {args.token}", "apikey": args.token})
+    hits = 0
+
+    async def send(body: dict):
+        nonlocal hits
+        sent_at = dt.datetime.now(dt.timezone.utc)
+        response = await client.request("POST", "", json=body)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        stamp = (response.json().get("metadata") or {}).get("timestamp")
+        if stamp and dt.datetime.fromisoformat(stamp.replace("Z", "+00:00")) < sent_at:
+            hits += 1
+
+    try:
+        latencies, errors, elapsed = await drive(send, bodies, args.rate, args.clients, args.seed)
+    finally:
+        await client.close()
+    report = LoadResult("remote", latencies, errors, hits, elapsed).report()
+    print(_format(report), flush=True)
+    return [report]
+
+
+def _format(r: dict) -> str:
+    def ms(v):
+        return "-" if v is None else f"{v:8.1f}"
+
+    return (f"{r['strategy']:<26} {r['count']:>6} req  {r.get('throughput_rps', 0):7.1f} rps"
+            f"  p50 {ms(r['p50_ms'])}  p95 {ms(r['p95_ms'])}  p99 {ms(r['p99_ms'])} ms"
+            f"  hit {r['hit_ratio'] or 0:6.1%}  rpc {r['rpc_calls']:>6}  entries {r['peak_cache_entries']:>5}"
+            + (f"  errors {r['errors']}" if r["errors"] else ""))
+
+
+async def serve_rpc(args) -> None:
+    rpc = HeatmapRpc(args.screens, args.proposals, args.seed,
+                     LatencyModel(args.rpc_rtt_ms, args.ms_per_1k_rows, args.auth_ms))
+    async with rpc.http_server("0.0.0.0", args.serve_rpc) as server:
+        print(f"heatmap RPC stand-in on {server.url} (SUPABASE_URL for `supabase functions serve`)", flush=True)
+        await asyncio.Event().wait()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.heatmap_load", description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate (req/s); default is closed-loop")
+    parser.add_argument("--clients", type=int, default=32, help="closed-loop clients / max connections")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--isolates", type=int, default=1, help="function isolates, each with its own cache")
+    parser.add_argument("--ttl", type=float, default=300.0, help="cache TTL in seconds (index.ts: 300)")
+    parser.add_argument("--screens", type=int, default=2000)
+    parser.add_argument("--proposals", type=int, default=6000)
+    parser.add_argument("--rpc-rtt-ms", type=float, default=20.0)
+    parser.add_argument("--ms-per-1k-rows", type=float, default=4.0)
+    parser.add_argument("--auth-ms", type=float, default=25.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", help="URL of a running maps-heatmap function")
+    parser.add_argument("--token", default="", help="bearer token for --target")
+    parser.add_argument("--serve-rpc", type=int, metavar="PORT", help="only serve the RPC stand-in over HTTP")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.serve_rpc is not None:
+        try:
+            asyncio.run(serve_rpc(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    mix = FilterMix(args.seed)
+    bodies = [mix.next() for _ in range(args.requests)]
+    if args.target:
+        reports = asyncio.run(run_remote(args.target, bodies, args))
+    else:
+        reports = asyncio.run(run_inprocess(args.strategies, bodies, args))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    args.output.write_text(json.dumps({"config": config, "results": reports}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
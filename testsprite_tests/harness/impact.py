@@ -0,0 +1,261 @@
+"""Pick the TC scripts affected by a change instead of running all of them.
+
+``tmp/code_summary.json`` lists the ``src/`` files behind each feature and
+:data:`FEATURE_TESTS` says which TCs exercise a feature (the grouping of
+``testsprite-mcp-test-report.md``).  A changed file selects the TCs of
+every feature that lists it.  Files the summary does not list are followed
+up the import graph (``@/`` alias, relative paths, dynamic ``import()``)
+until they reach listed files, so a change to a helper selects the flows
+of the pages that use it.
+
+Anything that every flow depends on - build config, the Supabase client,
+the auth context, ``components/ui``, migrations, the harness itself, or a
+file that cannot be resolved - selects the whole suite.  Documentation is
+ignored::
+
+    python -m harness.impact                      # against main
+    python -m harness.impact --base origin/main --explain
+    python -m harness.runner --changed origin/main
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import posixpath
+import re
+import subprocess
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import SUITE_DIR, TMP_DIR
+
+REPO_DIR = SUITE_DIR.parent
+CODE_SUMMARY_PATH = TMP_DIR / "code_summary.json"
+TEST_PLAN_PATH = SUITE_DIR / "testsprite_frontend_test_plan.json"
+DEFAULT_BASE = "main"
+
+FEATURE_TESTS = {
+    "Auth and roles": ["TC001", "TC002", "TC003"],
+    "Proposals and wizard": ["TC004", "TC005"],
+    "Campaigns and venues": ["TC006"],
+    "Inventory and screens": ["TC007"],
+    "Maps and heatmap": ["TC008"],
+    "Reports and analytics": ["TC009", "TC012"],
+    "PDF generation": ["TC004", "TC009"],
+    "Agencies and projects": ["TC011"],
+    "Email and notifications": ["TC013"],
+    "User administration": ["TC014"],
+}
+
+# Pages only listed under "Routing and pages", which maps to no flow by itself.
+PAGE_TESTS = {
+    "src/pages/Login.tsx": ["TC001", "TC002", "TC003"],
+    "src/pages/ResetPassword.tsx": ["TC001", "TC002"],
+    "src/pages/Index.tsx": ["TC012"],
+    "src/pages/NewProposal.tsx": ["TC004", "TC005"],
+    "src/pages/Propostas.tsx": ["TC004", "TC005"],
+    "src/pages/ProposalDetails.tsx": ["TC004"],
+    "src/pages/Profile.tsx": ["TC010"],
+    "src/pages/Settings.tsx": ["TC010"],
+}
+
+# Edge functions called by the flows.
+FUNCTION_TESTS = {
+    "generate-proposal-pdf": ["TC004", "TC009"],
+    "generate-pdf-proposal": ["TC004", "TC009"],
+    "maps-heatmap": ["TC008"],
+    "send-proposal-email": ["TC013"],
+    "process-pending-emails": ["TC013"],
+    "email-stats": ["TC013"],
+    "admin-create-user": ["TC014"],
+    "admin-update-user": ["TC014"],
+    "admin-delete-user": ["TC014"],
+    "create-admin-user": ["TC014"],
+    "project-milestones": ["TC011"],
+}
+
+# Every flow signs in and renders through these.
+SHARED = [
+    "package.json", "package-lock.json", "bun.lockb", "vite.config.ts", "tsconfig*.json",
+    "tailwind.config.ts", "postcss.config.js", "index.html", ".env*",
+    "src/main.tsx", "src/App.tsx", "src/index.css", "src/App.css", "src/vite-env.d.ts",
+    "src/integrations/*", "src/contexts/AuthContext.tsx", "src/components/ProtectedRoute.tsx",
+    "src/lib/auth.ts", "src/lib/utils.ts", "src/components/ui/*", "src/components/DashboardLayout.tsx",
+    "src/components/Sidebar.tsx", "src/components/Header.tsx",
+    "supabase/migrations/*", "supabase/config.toml", "supabase/functions/_shared/*",
+    "testsprite_tests/harness/*", "testsprite_tests/fixtures/*", "testsprite_tests/tmp/config.json",
+]
+
+IGNORED = ["*.md", "docs/*", "backups/*", "LICENSE", "tests/*", "testsprite_tests/tmp/*", ".github/*"]
+
+IMPORT_RE = re.compile(r"""(?:from|import)\s*\(?\s*['"]([^'"]+)['"]""")
+SOURCE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx")
+TC_SCRIPT_RE = re.compile(r"^testsprite_tests/(TC\d{3})_[^/]+\.py$")
+
+
+@dataclass
+class Selection:
+    test_ids: list[str]
+    full: bool
+    reasons: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _matches(path: str, patterns: list[str]) -> bool:
+    return any(fnmatch.fnmatch(path, p) for p in patterns)
+
+
+def changed_files(base: str = DEFAULT_BASE, repo: Path = REPO_DIR) -> list[str]:
+    """Files changed since the merge base with ``base``, plus uncommitted ones."""
+    def git(*args: str) -> list[str]:
+        out = subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True)
+        return [line for line in out.stdout.splitlines() if line]
+
+    merge_base = git("merge-base", base, "HEAD")[0]
+    files = set(git("diff", "--name-only", merge_base))
+    files.update(git("ls-files", "--others", "--exclude-standard"))
+    return sorted(files)
+
+
+def plan_tests(path: Path = TEST_PLAN_PATH) -> list[str]:
+    return [entry["id"] for entry in json.loads(path.read_text(encoding="utf-8"))]
+
+
+def feature_files(path: Path = CODE_SUMMARY_PATH) -> dict[str, list[str]]:
+    """``src`` file -> TCs, from the code summary and :data:`FEATURE_TESTS`."""
+    mapping: dict[str, list[str]] = {}
+    for feature in json.loads(path.read_text(encoding="utf-8"))["features"]:
+        for file in feature["files"]:
+            mapping.setdefault(file, [])
+            mapping[file] += [t for t in FEATURE_TESTS.get(feature["name"], []) if t not in mapping[file]]
+    for file, tests in PAGE_TESTS.items():
+        mapping[file] = sorted(set(mapping.get(file, [])) | set(tests))
+    return {file: tests for file, tests in mapping.items() if tests}
+
+
+class ImportGraph:
+    """Reverse import edges between the TypeScript sources under ``src``."""
+
+    def __init__(self, repo: Path = REPO_DIR) -> None:
+        self.repo = repo
+        self.importers: dict[str, set[str]] = {}
+        src = repo / "src"
+        for file in src.rglob("*"):
+            if file.suffix not in SOURCE_SUFFIXES:
+                continue
+            rel = file.relative_to(repo).as_posix()
+            for spec in IMPORT_RE.findall(file.read_text(encoding="utf-8", errors="replace")):
+                target = self.resolve(rel, spec)
+                if target:
+                    self.importers.setdefault(target, set()).add(rel)
+
+    def resolve(self, importer: str, spec: str) -> str | None:
+        if spec.startswith("@/"):
+            base = Path("src") / spec[2:]
+        elif spec.startswith("."):
+            base = Path(importer).parent / spec
+        else:
+            return None
+        stem = posixpath.normpath(base.as_posix())
+        candidates = [stem] + [stem + s for s in SOURCE_SUFFIXES] + [f"{stem}/index{s}" for s in SOURCE_SUFFIXES]
+        for candidate in candidates:
+            if (self.repo / candidate).is_file():
+                return candidate
+        return None
+
+    def dependents(self, file: str, stop: set[str], limit: int = 400) -> set[str]:
+        """Files in ``stop`` reachable by following importers from ``file``."""
+        found, seen, queue = set(), {file}, deque([file])
+        while queue and len(seen) < limit:
+            current = queue.popleft()
+            for importer in self.importers.get(current, ()):
+                if importer in seen:
+                    continue
+                seen.add(importer)
+                if importer in stop or _matches(importer, SHARED):
+                    found.add(importer)
+                else:
+                    queue.append(importer)
+        return found
+
+
+def select(changed: list[str], all_tests: list[str], graph: ImportGraph | None = None) -> Selection:
+    mapping = feature_files()
+    reasons: dict[str, list[str]] = {}
+
+    def add(test_ids: list[str], why: str) -> None:
+        for test_id in test_ids:
+            if test_id in all_tests:
+                reasons.setdefault(test_id, []).append(why)
+
+    def full(why: str) -> Selection:
+        return Selection(list(all_tests), True, {t: [why] for t in all_tests})
+
+    for path in changed:
+        if _matches(path, SHARED):
+            return full(f"shared file {path}")
+        if _matches(path, IGNORED):
+            continue
+        script = TC_SCRIPT_RE.match(path)
+        if script:
+            add([script.group(1)], path)
+            continue
+        if path.startswith("supabase/functions/"):
+            name = path.split("/")[2]
+            if name not in FUNCTION_TESTS:
+                return full(f"unmapped file {path}")
+            add(FUNCTION_TESTS[name], path)
+            continue
+        if path in mapping:
+            add(mapping[path], path)
+            continue
+        if path.startswith("src/") and path.endswith(SOURCE_SUFFIXES):
+            graph = graph or ImportGraph()
+            hits = graph.dependents(path, set(mapping))
+            shared = sorted(h for h in hits if _matches(h, SHARED))
+            if shared:
+                return full(f"{path} is used by shared file {shared[0]}")
+            if not hits:  # new, or only reached through files no feature lists
+                return full(f"unmapped file {path}")
+            for hit in sorted(hits):
+                add(mapping[hit], f"{path} via {hit}")
+            continue
+        if path.startswith(("src/", "public/", "supabase/")):
+            return full(f"unmapped file {path}")
+
+    return Selection(sorted(reasons), False, reasons)
+
+
+def select_changed(base: str = DEFAULT_BASE, all_tests: list[str] | None = None) -> Selection:
+    """:func:`select` for the working tree against ``base``; full suite on git errors."""
+    all_tests = all_tests if all_tests is not None else plan_tests()
+    try:
+        changed = changed_files(base)
+    except (subprocess.CalledProcessError, IndexError, OSError) as exc:
+        return Selection(list(all_tests), True, {t: [f"git diff against {base!r} failed: {exc}"] for t in all_tests})
+    return select(changed, all_tests)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.impact", description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default=DEFAULT_BASE, help="git ref to diff against (merge base)")
+    parser.add_argument("--explain", action="store_true", help="print why each TC was selected")
+    parser.add_argument("files", nargs="*", help="changed files (default: from git)")
+    args = parser.parse_args(argv)
+
+    all_tests = plan_tests()
+    selection = select(args.files, all_tests) if args.files else select_changed(args.base, all_tests)
+    if args.explain:
+        label = "full suite" if selection.full else f"{len(selection.test_ids)}/{len(all_tests)} TCs"
+        print(f"# {label}", file=sys.stderr)
+        for test_id in selection.test_ids:
+            print(f"# {test_id}: {'; '.join(selection.reasons[test_id][:3])}", file=sys.stderr)
+    print(" ".join(selection.test_ids))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
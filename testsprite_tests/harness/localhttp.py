@@ -0,0 +1,409 @@
+"""Minimal asyncio HTTP/1.1 server and client for local stand-ins.
+
+The stand-ins only need JSON over keep-alive connections, and pulling an
+HTTP framework into the test environment for that is not worth it.  The
+server answers CORS preflights itself so browser pages can call it; the
+client keeps a small pool of connections per instance so load generators
+measure the backend rather than TCP handshakes.  Text-frame WebSockets
+(:class:`WebSocket`, :func:`connect_websocket`) cover the realtime stand-in.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json as jsonlib
+import os
+import re
+import ssl
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+CORS_HEADERS = {
+    "access-control-allow-origin": "*",
+    "access-control-allow-headers": "*",
+    "access-control-allow-methods": "GET, POST, PATCH, PUT, DELETE, OPTIONS",
+    "access-control-expose-headers": "content-range",
+}
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+REASONS = {101: "Switching Protocols", 200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes
+    match: re.Match | None = None
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.body or b"null")
+
+    def arg(self, name: str, default: str | None = None) -> str | None:
+        values = self.query.get(name)
+        return values[0] if values else default
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: Any = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+    def encode(self) -> tuple[bytes, dict[str, str]]:
+        headers = dict(self.headers)
+        body = self.body
+        if isinstance(body, (bytes, bytearray)):
+            payload = bytes(body)
+        elif isinstance(body, str):
+            payload = body.encode()
+            headers.setdefault("content-type", "text/plain; charset=utf-8")
+        else:
+            payload = jsonlib.dumps(body).encode()
+            headers.setdefault("content-type", "application/json")
+        return payload, headers
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class WebSocket:
+    """RFC 6455 text messages over a connected stream pair.
+
+    Clients mask what they send, servers do not.  Pings are answered
+    inside :meth:`recv`, which returns ``None`` once the peer closed.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client: bool = False) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.closed = False
+        self.close_code: int | None = None
+        self._send_lock = asyncio.Lock()
+
+    async def _write_frame(self, opcode: int, payload: bytes) -> None:
+        length = len(payload)
+        head = bytearray([0x80 | opcode])
+        mask_bit = 0x80 if self.client else 0
+        if length < 126:
+            head.append(mask_bit | length)
+        elif length < 1 << 16:
+            head.append(mask_bit | 126)
+            head += length.to_bytes(2, "big")
+        else:
+            head.append(mask_bit | 127)
+            head += length.to_bytes(8, "big")
+        if self.client:
+            mask = os.urandom(4)
+            head += mask
+            payload = _apply_mask(payload, mask)
+        async with self._send_lock:
+            self.writer.write(bytes(head) + payload)
+            await self.writer.drain()
+
+    async def send(self, text: str) -> None:
+        if self.closed:
+            raise ConnectionResetError("websocket is closed")
+        await self._write_frame(OP_TEXT, text.encode())
+
+    async def recv(self) -> str | None:
+        message = bytearray()
+        try:
+            while True:
+                head = await self.reader.readexactly(2)
+                fin, opcode = head[0] & 0x80, head[0] & 0x0F
+                length = head[1] & 0x7F
+                if length == 126:
+                    length = int.from_bytes(await self.reader.readexactly(2), "big")
+                elif length == 127:
+                    length = int.from_bytes(await self.reader.readexactly(8), "big")
+                mask = await self.reader.readexactly(4) if head[1] & 0x80 else None
+                payload = await self.reader.readexactly(length)
+                if mask:
+                    payload = _apply_mask(payload, mask)
+                if opcode == OP_PING:
+                    await self._write_frame(OP_PONG, payload)
+                elif opcode == OP_CLOSE:
+                    self.close_code = int.from_bytes(payload[:2], "big") if len(payload) >= 2 else 1005
+                    await self.close(self.close_code if self.close_code != 1005 else 1000)
+                    return None
+                elif opcode in (OP_TEXT, OP_BINARY, OP_CONTINUATION):
+                    message += payload
+                    if fin:
+                        return message.decode("utf-8", "replace")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            self.writer.close()
+            return None
+
+    async def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._write_frame(OP_CLOSE, code.to_bytes(2, "big"))
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+def _apply_mask(payload: bytes, mask: bytes) -> bytes:
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+
+
+def _accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+SocketHandler = Callable[[Request, WebSocket], Awaitable[None]]
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[str, dict[str, str]] | None:
+    try:
+        raw = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    lines = raw.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    length = int(headers.get("content-length", "0"))
+    return await reader.readexactly(length) if length else b""
+
+
+class HttpServer:
+    """Route table over ``asyncio.start_server``.
+
+    Routes are ``(method, regex)`` pairs matched against the path in
+    registration order; the regex match is available as ``request.match``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, cors: bool = True) -> None:
+        self.host = host
+        self.port = port
+        self.cors = cors
+        self.routes: list[tuple[str, re.Pattern, Handler]] = []
+        self.socket_routes: list[tuple[re.Pattern, SocketHandler]] = []
+        self.requests = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def route(self, method: str, pattern: str, handler: Handler) -> None:
+        self.routes.append((method.upper(), re.compile(pattern), handler))
+
+    def websocket(self, pattern: str, handler: SocketHandler) -> None:
+        """Accept WebSocket upgrades on ``pattern``; ``handler`` owns the socket until it returns."""
+        self.socket_routes.append((re.compile(pattern), handler))
+
+    async def _upgrade(self, request: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        for pattern, handler in self.socket_routes:
+            match = pattern.fullmatch(request.path)
+            if match:
+                break
+        else:
+            return False
+        request.match = match
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\nupgrade: websocket\r\nconnection: Upgrade\r\n"
+            f"sec-websocket-accept: {_accept_key(request.headers.get('sec-websocket-key', ''))}\r\n\r\n"
+        ).encode("latin-1"))
+        await writer.drain()
+        socket = WebSocket(reader, writer)
+        try:
+            await handler(request, socket)
+        finally:
+            await socket.close()
+        return True
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "HttpServer":
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise keep their handlers waiting.
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "HttpServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _dispatch(self, request: Request) -> Response:
+        if self.cors and request.method == "OPTIONS":
+            return Response(204)
+        for method, pattern, handler in self.routes:
+            if method in (request.method, "*"):
+                match = pattern.fullmatch(request.path)
+                if match:
+                    request.match = match
+                    return await handler(request)
+        return Response(404, {"error": "not found", "path": request.path})
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                head = await _read_head(reader)
+                if head is None:
+                    break
+                request_line, headers = head
+                method, target, _ = request_line.split(" ", 2)
+                parts = urlsplit(target)
+                body = await _read_body(reader, headers)
+                request = Request(method.upper(), parts.path, parse_qs(parts.query), headers, body)
+                self.requests += 1
+                if headers.get("upgrade", "").lower() == "websocket" and await self._upgrade(request, reader, writer):
+                    break
+                try:
+                    response = await self._dispatch(request)
+                except Exception as exc:
+                    response = Response(500, {"error": type(exc).__name__, "message": str(exc)})
+                payload, out_headers = response.encode()
+                if self.cors:
+                    out_headers = {**CORS_HEADERS, **out_headers}
+                out_headers["content-length"] = str(len(payload))
+                reason = REASONS.get(response.status, "")
+                head_out = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(
+                    f"{k}: {v}\r\n" for k, v in out_headers.items()
+                )
+                writer.write(head_out.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+
+@dataclass
+class ClientResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.body or b"null")
+
+
+class HttpClient:
+    """Keep-alive client for one origin with at most ``max_connections``."""
+
+    def __init__(self, base_url: str, max_connections: int = 64, headers: dict[str, str] | None = None) -> None:
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.headers = headers or {}
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.scheme == "https" else None
+        return await asyncio.open_connection(self.host, self.port, ssl=context)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> ClientResponse:
+        if json is not None:
+            body = jsonlib.dumps(json).encode()
+        out = {"host": f"{self.host}:{self.port}", "connection": "keep-alive", **self.headers, **(headers or {})}
+        if json is not None:
+            out.setdefault("content-type", "application/json")
+        out["content-length"] = str(len(body or b""))
+        head = f"{method.upper()} {self.base_path}{path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in out.items())
+        async with self._slots:
+            # A pooled connection may have been closed by the server; retry once on a fresh one.
+            for attempt in (0, 1):
+                reader, writer = self._idle.pop() if self._idle and attempt == 0 else await self._connect()
+                try:
+                    writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+                    await writer.drain()
+                    parsed = await _read_head(reader)
+                    if parsed is None:
+                        raise ConnectionResetError("connection closed before response")
+                    status_line, resp_headers = parsed
+                    data = await _read_body(reader, resp_headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if attempt:
+                        raise
+                    continue
+                if resp_headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self._idle.append((reader, writer))
+                return ClientResponse(int(status_line.split(" ")[1]), resp_headers, data)
+        raise AssertionError("unreachable")
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+async def connect_websocket(url: str, headers: dict[str, str] | None = None, timeout: float = 10.0) -> WebSocket:
+    """Open a client :class:`WebSocket` to a ``ws://`` or ``wss://`` URL."""
+    parts = urlsplit(url)
+    secure = parts.scheme in ("wss", "https")
+    host, port = parts.hostname or "127.0.0.1", parts.port or (443 if secure else 80)
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=ssl.create_default_context() if secure else None), timeout)
+    key = base64.b64encode(os.urandom(16)).decode()
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    out = {"host": f"{host}:{port}", "upgrade": "websocket", "connection": "Upgrade",
+           "sec-websocket-key": key, "sec-websocket-version": "13", **(headers or {})}
+    writer.write((f"GET {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in out.items()) + "\r\n")
+                 .encode("latin-1"))
+    await writer.drain()
+    head = await asyncio.wait_for(_read_head(reader), timeout)
+    if head is None or head[0].split(" ")[1] != "101" or head[1].get("sec-websocket-accept") != _accept_key(key):
+        writer.close()
+        raise ConnectionRefusedError(f"websocket upgrade refused: {head[0] if head else 'connection closed'}")
+    return WebSocket(reader, writer, client=True)
@@ -0,0 +1,207 @@
+"""Named, ranked locators instead of absolute XPaths in the TC scripts.
+
+TestSprite records every element as an absolute XPath from ``html/body``;
+one extra wrapper ``div`` in a layout breaks every case that goes through
+it.  :data:`REGISTRY` maps logical names (``login.email``,
+``wizard.next``) to strategies in order of preference - ``data-testid``,
+element id, ARIA role and accessible name, label, and the recorded XPath
+last - and :func:`resolve` returns a locator for the best one present::
+
+    elem = await locators.resolve(page, "login.email")
+    await waits.fill(elem, email)
+
+The strategy that resolved each name is remembered (in memory and in
+``tmp/locator_cache.json``) and tried first next time, so a lookup normally
+costs one ``count()`` (delete the file after adding a ``data-testid`` so
+the better strategy is picked up).  Every lookup is recorded on the context with its
+cost and whether it fell back; the runner reports names that only resolve
+through a fallback, which is the cue to add a ``data-testid`` before the
+XPath stops matching too.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Pattern
+
+from playwright.async_api import BrowserContext, Locator, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .config import TMP_DIR
+
+CACHE_PATH = TMP_DIR / "locator_cache.json"
+DEFAULT_TIMEOUT = 5000
+
+
+@dataclass(frozen=True)
+class Strategy:
+    kind: str  # testid | css | role | label | text | xpath
+    value: str
+    name: str | Pattern[str] | None = None  # accessible name for ``role``
+
+    def locate(self, page: Page) -> Locator:
+        if self.kind == "testid":
+            return page.get_by_test_id(self.value)
+        if self.kind == "role":
+            return page.get_by_role(self.value, name=self.name, exact=isinstance(self.name, str))
+        if self.kind == "label":
+            return page.get_by_label(self.value, exact=True)
+        if self.kind == "text":
+            return page.get_by_text(self.value, exact=True)
+        if self.kind == "xpath":
+            return page.locator("xpath=" + self.value)
+        return page.locator(self.value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}={self.value}" + (f"[{getattr(self.name, 'pattern', self.name)}]" if self.name else "")
+
+
+def testid(value: str) -> Strategy:
+    return Strategy("testid", value)
+
+
+def css(value: str) -> Strategy:
+    return Strategy("css", value)
+
+
+def role(value: str, name: str | Pattern[str]) -> Strategy:
+    return Strategy("role", value, name)
+
+
+def label(value: str) -> Strategy:
+    return Strategy("label", value)
+
+
+def text(value: str) -> Strategy:
+    return Strategy("text", value)
+
+
+def xpath(value: str) -> Strategy:
+    return Strategy("xpath", value)
+
+
+REGISTRY: dict[str, list[Strategy]] = {
+    "login.email": [
+        testid("login-email"), css("#login-email"), label("Email"),
+        xpath("html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div/div/input"),
+    ],
+    "login.password": [
+        testid("login-password"), css("#login-password"), label("Senha"),
+        xpath("html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[2]/div/input"),
+    ],
+    "login.submit": [
+        testid("login-submit"), role("button", re.compile(r"^(Entrar|Entrando\.\.\.)$")),
+        css("form button[type=submit]"),
+        xpath("html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/button"),
+    ],
+    "login.forgot_password": [
+        testid("login-forgot-password"), role("button", "Esqueceu a senha?"),
+        xpath("html/body/div/div[2]/div/div[2]/div[2]/div/div[2]/form/div[3]/button"),
+    ],
+    "recovery.email": [testid("reset-email"), css("#reset-email"), xpath("html/body/div[3]/form/div/div/input")],
+    "recovery.submit": [
+        testid("reset-submit"), role("button", re.compile(r"^(Enviar Link|Enviando\.\.\.)$")),
+        xpath("html/body/div[3]/form/div[2]/button[2]"),
+    ],
+    "wizard.next": [testid("wizard-next"), role("button", re.compile(r"^(Próximo|Finalizar Proposta)$"))],
+    "wizard.previous": [testid("wizard-previous"), role("button", re.compile(r"^(Anterior|Cancelar)$"))],
+    "map.heatmap_toggle": [testid("map-heatmap-toggle"), role("button", "Heatmap")],
+    "proposal.pricing_mode": [testid("pricing-mode-value")],
+    "proposal.price_final": [testid("price-final")],
+}
+
+
+@dataclass
+class LookupRecord:
+    name: str
+    strategy: str
+    rank: int
+    cached: bool
+    lookup_s: float
+
+
+_records: "weakref.WeakKeyDictionary[BrowserContext, list[LookupRecord]]" = weakref.WeakKeyDictionary()
+_cache: dict[str, int] | None = None
+
+
+def _load_cache() -> dict[str, int]:
+    global _cache
+    if _cache is None:
+        try:
+            stored = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            stored = {}
+        _cache = {}
+        for name, entry in stored.items():
+            strategies = [str(s) for s in REGISTRY.get(name, [])]
+            # Keyed by the strategy text so registry edits invalidate entries.
+            if entry.get("strategy") in strategies:
+                _cache[name] = strategies.index(entry["strategy"])
+    return _cache
+
+
+def save_cache() -> None:
+    """Persist which strategy resolved each name."""
+    if _cache is None:
+        return
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    payload = {name: {"strategy": str(REGISTRY[name][rank]), "rank": rank}
+               for name, rank in sorted(_cache.items()) if name in REGISTRY}
+    CACHE_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def records(context: BrowserContext) -> list[LookupRecord]:
+    """Lookups done so far on ``context``, in order."""
+    return _records.get(context, [])
+
+
+def reset(context: BrowserContext) -> None:
+    """Forget the lookups recorded on a context that is reused for another case."""
+    _records.pop(context, None)
+
+
+def _record(page: Page, name: str, rank: int, cached: bool, t0: float) -> None:
+    _records.setdefault(page.context, []).append(LookupRecord(
+        name, str(REGISTRY[name][rank]), rank, cached, round(time.perf_counter() - t0, 4),
+    ))
+
+
+async def resolve(page: Page, name: str, timeout: float = DEFAULT_TIMEOUT) -> Locator:
+    """Locator for ``name`` via the first strategy that matches on ``page``.
+
+    Waits up to ``timeout`` ms for any strategy to match; raises
+    ``PlaywrightTimeoutError`` naming the strategies tried otherwise.
+    """
+    strategies = REGISTRY[name]
+    cache = _load_cache()
+    t0 = time.perf_counter()
+
+    cached = cache.get(name)
+    if cached is not None:
+        locator = strategies[cached].locate(page).first
+        if await locator.count():
+            _record(page, name, cached, True, t0)
+            return locator
+
+    candidates = [s.locate(page) for s in strategies]
+    combined = candidates[0]
+    for candidate in candidates[1:]:
+        combined = combined.or_(candidate)
+    try:
+        await combined.first.wait_for(state="attached", timeout=timeout)
+    except PlaywrightTimeoutError:
+        raise PlaywrightTimeoutError(
+            f"locator {name!r} not found after {timeout:.0f}ms; tried " + ", ".join(map(str, strategies))
+        ) from None
+    for rank, candidate in enumerate(candidates):
+        if await candidate.count():
+            cache[name] = rank
+            _record(page, name, rank, False, t0)
+            return candidate.first
+    # Detached again between the wait and the count; the best guess is the top strategy.
+    return candidates[0].first
+
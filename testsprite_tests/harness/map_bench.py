@@ -0,0 +1,246 @@
+"""Rendering benchmark for the InteractiveMap page (TC008's target).
+
+TC008 only asserts on a label.  This mode signs in with TC008's role, opens
+``/mapa-interativo`` and answers the page's paged ``screens`` query from a
+synthetic venue set instead of Supabase, at growing sizes.  For each size it
+measures:
+
+* ``data_loaded_ms`` - until the last 1000-row page of screens was served;
+* ``first_tile_ms`` - until Leaflet marked the first base tile as loaded;
+* ``heatmap_paint_ms`` - from clicking *Heatmap* to the heat canvas being
+  in the DOM and two animation frames later (i.e. painted);
+* ``pan_zoom_fps`` / ``frame_p95_ms`` / ``janky_frames`` - rAF cadence while
+  dragging and wheel-zooming the map;
+* ``js_heap_bytes`` and ``dom_nodes`` after the interaction.
+
+OSM tiles are served as a stub image by default so tile latency does not
+drown the rendering numbers; ``--live-tiles`` lets them through::
+
+    python -m harness.map_bench --sizes 1000 10000 100000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from playwright.async_api import Error, Page, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .auth import AuthCache
+from .config import TMP_DIR, base_url
+from .localhttp import CORS_HEADERS
+from .pool import BrowserPool
+from .results import ResultStore
+from .runner import discover
+from .synthetic import screen_rows
+
+MAP_PATH = "/mapa-interativo"
+RESULTS_PATH = TMP_DIR / "map_bench_results.json"
+SCREENS_URL = re.compile(r"/rest/v1/screens\?")
+OSM_TILE_URL = re.compile(r"^https://[a-c]\.tile\.openstreetmap\.org/")
+
+# 1x1 transparent PNG; Leaflet stretches it over the 256px tile.
+STUB_TILE = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+# Per-run figures appended to the result store for harness.gate.
+STORED_METRICS = ("first_tile_ms", "data_loaded_ms", "heatmap_paint_ms", "pan_zoom_fps", "frame_p95_ms")
+
+HEATMAP_PAINTED_JS = """() => new Promise((resolve) => {
+    const check = () => {
+        if (document.querySelector('canvas.leaflet-heatmap-layer')) {
+            requestAnimationFrame(() => requestAnimationFrame(() => resolve(performance.now())));
+        } else {
+            requestAnimationFrame(check);
+        }
+    };
+    check();
+})"""
+
+FRAME_TIMES_JS = """(durationMs) => new Promise((resolve) => {
+    const frames = [];
+    let last = performance.now();
+    const start = last;
+    const tick = (t) => {
+        frames.push(t - last);
+        last = t;
+        if (t - start < durationMs) requestAnimationFrame(tick);
+        else resolve(frames);
+    };
+    requestAnimationFrame(tick);
+})"""
+
+MEMORY_JS = """() => ({
+    js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+    dom_nodes: document.getElementsByTagName('*').length,
+})"""
+
+
+class ScreensStub:
+    """Serves ``rows`` to the page's ``offset``/``limit`` paged query."""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        self.t0 = time.perf_counter()
+        self.last_page_s: float | None = None
+        self.requests = 0
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if request.method == "OPTIONS":
+            await route.fulfill(status=204, headers=CORS_HEADERS)
+            return
+        query = parse_qs(urlparse(request.url).query)
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", [str(len(self.rows))])[0])
+        chunk = self.rows[offset:offset + limit]
+        self.requests += 1
+        if len(chunk) < limit:
+            self.last_page_s = time.perf_counter() - self.t0
+        await route.fulfill(
+            status=200,
+            headers={**CORS_HEADERS, "content-range": f"{offset}-{offset + len(chunk) - 1}/*"},
+            content_type="application/json",
+            body=json.dumps(chunk),
+        )
+
+
+async def _stub_tile(route: Route) -> None:
+    await route.fulfill(status=200, content_type="image/png", body=STUB_TILE, headers=CORS_HEADERS)
+
+
+async def _pan_and_zoom(page: Page, duration_s: float) -> None:
+    box = await page.locator(".leaflet-container").first.bounding_box()
+    cx, cy = box["x"] + box["width"] / 2, box["y"] + box["height"] / 2
+    deadline = time.perf_counter() + duration_s
+    step = 0
+    while time.perf_counter() < deadline:
+        dx = 120 if step % 2 == 0 else -120
+        await page.mouse.move(cx, cy)
+        await page.mouse.down()
+        await page.mouse.move(cx + dx, cy + dx / 2, steps=8)
+        await page.mouse.up()
+        await page.mouse.wheel(0, -240 if step % 4 < 2 else 240)
+        step += 1
+
+
+async def measure(page: Page, size: int, seed: int, live_tiles: bool, interact_s: float, timeout: float) -> dict:
+    stub = ScreensStub(screen_rows(size, seed))
+    await page.route(SCREENS_URL, stub.handle)
+    if not live_tiles:
+        await page.route(OSM_TILE_URL, _stub_tile)
+
+    result: dict = {"size": size}
+    t0 = time.perf_counter()
+    stub.t0 = t0
+    await page.goto(base_url() + MAP_PATH, wait_until="commit")
+    try:
+        await page.wait_for_selector(".leaflet-tile-loaded", state="attached", timeout=timeout)
+        result["first_tile_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+        while stub.last_page_s is None:
+            if time.perf_counter() - t0 > timeout / 1000:
+                raise PlaywrightTimeoutError("screens were not fully requested")
+            await asyncio.sleep(0.05)
+        result["data_loaded_ms"] = round(stub.last_page_s * 1000, 1)
+        result["screen_requests"] = stub.requests
+
+        clicked_at = await page.evaluate("performance.now()")
+        await page.get_by_role("button", name="Heatmap").click(timeout=timeout)
+        painted_at = await asyncio.wait_for(page.evaluate(HEATMAP_PAINTED_JS), timeout / 1000)
+        result["heatmap_paint_ms"] = round(painted_at - clicked_at, 1)
+
+        frames_task = asyncio.ensure_future(page.evaluate(FRAME_TIMES_JS, interact_s * 1000))
+        await _pan_and_zoom(page, interact_s)
+        frames = await asyncio.wait_for(frames_task, timeout / 1000)
+        if frames:
+            ordered = sorted(frames)
+            result["pan_zoom_fps"] = round(len(frames) / (sum(frames) / 1000), 1)
+            result["frame_p95_ms"] = round(ordered[int(0.95 * (len(ordered) - 1))], 1)
+            result["janky_frames"] = sum(f > 50 for f in frames)
+        result.update(await page.evaluate(MEMORY_JS))
+    except (PlaywrightTimeoutError, asyncio.TimeoutError, Error) as exc:
+        # The point of the benchmark is finding where this happens.
+        result["error"] = f"{type(exc).__name__}: {str(exc).splitlines()[0] if str(exc) else 'timeout'}"
+    return result
+
+
+def summarize(runs: list[dict]) -> dict:
+    summary: dict = {"size": runs[0]["size"], "runs": len(runs), "errors": sum("error" in r for r in runs)}
+    for key in ("first_tile_ms", "data_loaded_ms", "heatmap_paint_ms", "pan_zoom_fps", "frame_p95_ms", "js_heap_bytes"):
+        values = [r[key] for r in runs if r.get(key) is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+
+async def run(sizes: list[int], repeat: int, seed: int, live_tiles: bool, interact_s: float, timeout: float) -> list[dict]:
+    role = discover(["TC008"])[0].auth_role
+    results = []
+    async with BrowserPool(1, 1) as pool:
+        auth_cache = AuthCache(pool)
+        for size in sizes:
+            runs = []
+            for _ in range(repeat):
+                state = await auth_cache.storage_state(role) if role else None
+                async with pool.context(storage_state=state, viewport={"width": 1280, "height": 720}) as context:
+                    page = await context.new_page()
+                    runs.append(await measure(page, size, seed, live_tiles, interact_s, timeout))
+            results.append({"summary": summarize(runs), "runs": runs})
+            print(_format_row(results[-1]["summary"]), flush=True)
+    return results
+
+
+def _format_row(s: dict) -> str:
+    def fmt(value, unit=""):
+        return "-" if value is None else f"{value:,.0f}{unit}"
+
+    heap_mb = s["js_heap_bytes"] / 2**20 if s["js_heap_bytes"] is not None else None
+
+    return (
+        f"{s['size']:>8,}  tile {fmt(s['first_tile_ms'], 'ms'):>9}  data {fmt(s['data_loaded_ms'], 'ms'):>9}"
+        f"  heat {fmt(s['heatmap_paint_ms'], 'ms'):>9}  {fmt(s['pan_zoom_fps'])} fps"
+        f"  p95 {fmt(s['frame_p95_ms'], 'ms')}  heap {fmt(heap_mb, 'MB')}"
+        + (f"  errors {s['errors']}/{s['runs']}" if s["errors"] else "")
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.map_bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--interact", type=float, default=5.0, help="seconds of pan/zoom per run")
+    parser.add_argument("--timeout", type=float, default=120000, help="per-step timeout in ms")
+    parser.add_argument("--live-tiles", action="store_true", help="fetch real OSM tiles")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--no-store", action="store_true", help="do not append the samples to tmp/results.db")
+    parser.add_argument("--label", help="free-form label stored with the run")
+    args = parser.parse_args(argv)
+
+    started_at = time.time()
+    results = asyncio.run(run(args.sizes, args.repeat, args.seed, args.live_tiles, args.interact, args.timeout))
+    if not args.no_store:
+        with ResultStore() as store:
+            run_id = store.add_run([], started_at, time.time() - started_at, source="map_bench", label=args.label)
+            store.add_run_metrics(run_id, (
+                (f"map:{run['size']}", key, run[key])
+                for entry in results for run in entry["runs"]
+                for key in STORED_METRICS if run.get(key) is not None
+            ))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({"seed": args.seed, "results": results}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""Serve Supabase auth, PostgREST and edge functions from local fixtures.
+
+``tmp/raw_report.md`` shows most TC runs dying on a 400 from the remote
+``/auth/v1/token`` endpoint, and every case pays the round trip to the
+hosted project.  :func:`install` routes a context's ``/auth/v1``,
+``/rest/v1``, ``/functions/v1`` and ``/storage/v1`` traffic to a
+:class:`FixtureStore` instead, so runs are deterministic and offline.
+
+Fixtures are HAR 1.2 files (``*.har`` / ``*.har.json``) under
+``fixtures/supabase/`` - what Playwright's ``record_har_path`` or the
+browser's "Save all as HAR" produce.  Requests are matched on method, path,
+canonical query and, for bodies, a hash of the canonical JSON; the body is
+dropped from the key when nothing matches exactly.  Repeated identical
+requests cycle through the recorded responses in order.
+
+Auth is synthesized rather than replayed (recorded tokens expire): the
+password grant accepts any credentials configured in :mod:`harness.auth`,
+returns ``invalid_grant`` otherwise, and the app's ``profiles`` /
+``user_roles`` lookups for that user are answered to match.  Anything else
+without a fixture gets an empty PostgREST-shaped answer and is listed in
+:attr:`SupabaseMock.misses`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from playwright.async_api import BrowserContext, Route
+
+from .auth import credentials
+from .config import SUITE_DIR
+from .localhttp import CORS_HEADERS
+
+FIXTURES_DIR = SUITE_DIR / "fixtures" / "supabase"
+SUPABASE_PATH = re.compile(r"^https?://[^/]+/(auth|rest|functions|storage)/v1/")
+REALTIME_PATH = re.compile(r"/realtime/v1/websocket")
+
+# Roles the harness signs in as, mapped to the app's UserRole values.
+APP_ROLES = {"admin": "admin", "manager": "manager", "user": "user", "client": "client", "super_admin": "super_admin"}
+HARNESS_ROLES = ("admin", "manager", "user")
+
+SESSION_TTL_S = 3600
+
+
+@dataclass
+class Fixture:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    time_ms: float = 0.0
+
+
+def canonical_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def body_hash(body: bytes | None) -> str:
+    if not body:
+        return ""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def request_key(method: str, url: str, body: bytes | None = None) -> tuple[str, str, str, str]:
+    parts = urlsplit(url)
+    return method.upper(), parts.path, canonical_query(parts.query), body_hash(body)
+
+
+class FixtureStore:
+    """Recorded responses indexed by :func:`request_key`."""
+
+    def __init__(self) -> None:
+        self.exact: dict[tuple, list[Fixture]] = {}
+        self.loose: dict[tuple, list[Fixture]] = {}
+        self._cursor: dict[tuple, int] = {}
+
+    def add(self, method: str, url: str, body: bytes | None, fixture: Fixture) -> None:
+        key = request_key(method, url, body)
+        self.exact.setdefault(key, []).append(fixture)
+        self.loose.setdefault(key[:3], []).append(fixture)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.exact.values())
+
+    def lookup(self, method: str, url: str, body: bytes | None) -> Fixture | None:
+        key = request_key(method, url, body)
+        for index, k in ((self.exact, key), (self.loose, key[:3])):
+            fixtures = index.get(k)
+            if fixtures:
+                position = self._cursor.get(k, 0)
+                self._cursor[k] = position + 1
+                return fixtures[position % len(fixtures)]
+        return None
+
+    def load_har(self, path: Path) -> int:
+        log = json.loads(path.read_text(encoding="utf-8"))["log"]
+        added = 0
+        for entry in log.get("entries", []):
+            request, response = entry["request"], entry["response"]
+            if not SUPABASE_PATH.match(request["url"]):
+                continue
+            post = (request.get("postData") or {}).get("text")
+            content = response.get("content") or {}
+            text = content.get("text") or ""
+            body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode()
+            headers = {h["name"].lower(): h["value"] for h in response.get("headers", [])
+                       if h["name"].lower() not in ("content-length", "content-encoding", "transfer-encoding")}
+            if content.get("mimeType"):
+                headers.setdefault("content-type", content["mimeType"])
+            self.add(request["method"], request["url"], post.encode() if post else None,
+                     Fixture(response["status"], headers, body, float(entry.get("time") or 0)))
+            added += 1
+        return added
+
+    @classmethod
+    def from_dir(cls, directory: Path = FIXTURES_DIR) -> "FixtureStore":
+        store = cls()
+        if directory.is_dir():
+            for path in sorted(directory.glob("*.har")) + sorted(directory.glob("*.har.json")):
+                store.load_har(path)
+        return store
+
+
+def _b64url(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def user_id(email: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"mailto:{email}"))
+
+
+def fake_session(email: str, role: str) -> dict:
+    """A session object shaped like GoTrue's token response."""
+    now = int(time.time())
+    uid = user_id(email)
+    claims = {"sub": uid, "email": email, "role": "authenticated", "aud": "authenticated",
+              "iat": now, "exp": now + SESSION_TTL_S, "app_metadata": {"role": role}}
+    token = f"{_b64url({'alg': 'HS256', 'typ': 'JWT'})}.{_b64url(claims)}.offline"
+    user = {"id": uid, "aud": "authenticated", "role": "authenticated", "email": email,
+            "email_confirmed_at": "2025-01-01T00:00:00Z", "app_metadata": {"provider": "email"},
+            "user_metadata": {"full_name": email.split("@")[0]}, "created_at": "2025-01-01T00:00:00Z"}
+    return {"access_token": token, "token_type": "bearer", "expires_in": SESSION_TTL_S,
+            "expires_at": now + SESSION_TTL_S, "refresh_token": f"offline-{uid}", "user": user}
+
+
+@dataclass
+class SupabaseMock:
+    """Route handler for one or more contexts; counts what it served."""
+
+    store: FixtureStore
+    latency_scale: float = 0.0
+    served: int = 0
+    synthesized: int = 0
+    misses: list[str] = field(default_factory=list)
+    _users: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for role in HARNESS_ROLES:
+            try:
+                creds = credentials(role)
+            except LookupError:
+                continue
+            self._users.setdefault(creds.email, (role, creds.password))
+
+    def _role_for(self, uid: str) -> tuple[str, str] | None:
+        for email, (role, _) in self._users.items():
+            if user_id(email) == uid:
+                return email, role
+        return None
+
+    def _auth(self, method: str, path: str, query: dict, body: bytes | None, headers: dict) -> tuple[int, object] | None:
+        data = json.loads(body) if body else {}
+        if path.endswith("/token"):
+            grant = query.get("grant_type")
+            if grant == "password":
+                user = self._users.get(data.get("email", ""))
+                if user and user[1] == data.get("password"):
+                    return 200, fake_session(data["email"], APP_ROLES.get(user[0], "user"))
+                return 400, {"error": "invalid_grant", "error_description": "Invalid login credentials",
+                             "code": 400, "msg": "Invalid login credentials"}
+            if grant == "refresh_token":
+                uid = (data.get("refresh_token") or "").removeprefix("offline-")
+                found = self._role_for(uid)
+                if found:
+                    return 200, fake_session(found[0], APP_ROLES.get(found[1], "user"))
+                return 400, {"error": "invalid_grant", "error_description": "Invalid Refresh Token"}
+        if path.endswith("/user") and method == "GET":
+            token = headers.get("authorization", "").removeprefix("Bearer ")
+            try:
+                claims = json.loads(base64.urlsafe_b64decode(token.split(".")[1] + "=="))
+            except (IndexError, ValueError):
+                return 401, {"code": 401, "msg": "invalid JWT"}
+            return 200, fake_session(claims["email"], claims.get("app_metadata", {}).get("role", "user"))["user"]
+        if path.endswith("/logout"):
+            return 204, None
+        if path.endswith("/recover") or path.endswith("/otp"):
+            return 200, {}
+        return None
+
+    def _app_tables(self, table: str, query: dict, single: bool) -> tuple[int, object] | None:
+        """``profiles`` / ``user_roles`` rows for the synthesized users."""
+        key = "id" if table == "profiles" else "user_id"
+        value = query.get(key, "")
+        if table not in ("profiles", "user_roles") or not value.startswith("eq."):
+            return None
+        found = self._role_for(value[3:])
+        if not found:
+            return None
+        email, role = found
+        app_role = APP_ROLES.get(role, "user")
+        if table == "profiles":
+            row = {"id": value[3:], "email": email, "full_name": email.split("@")[0], "display_name": email.split("@")[0],
+                   "role": app_role, "super_admin": app_role == "super_admin", "avatar_url": None}
+        else:
+            row = {"user_id": value[3:], "role": app_role}
+        return 200, row if single else [row]
+
+    def respond(self, method: str, url: str, body: bytes | None, headers: dict) -> Fixture:
+        parts = urlsplit(url)
+        service = SUPABASE_PATH.match(url).group(1)
+        query = dict(parse_qsl(parts.query))
+        single = "vnd.pgrst.object" in headers.get("accept", "")
+
+        synthesized = None
+        if service == "auth":
+            synthesized = self._auth(method, parts.path, query, body, headers)
+        elif service == "rest" and method == "GET":
+            synthesized = self._app_tables(parts.path.rsplit("/", 1)[-1], query, single)
+        if synthesized is not None:
+            self.synthesized += 1
+            status, payload = synthesized
+            data = b"" if payload is None else json.dumps(payload).encode()
+            return Fixture(status, {"content-type": "application/json"}, data)
+
+        fixture = self.store.lookup(method, url, body)
+        if fixture is not None:
+            self.served += 1
+            return fixture
+
+        self.misses.append(f"{method} {parts.path}{'?' + parts.query if parts.query else ''}")
+        if service == "rest" and single:
+            return Fixture(406, {"content-type": "application/json"}, json.dumps({
+                "code": "PGRST116", "details": "The result contains 0 rows",
+                "hint": None, "message": "JSON object requested, multiple (or no) rows returned"}).encode())
+        if service == "rest" and method in ("GET", "HEAD"):
+            return Fixture(200, {"content-type": "application/json", "content-range": "*/0"}, b"[]")
+        if service == "storage":
+            return Fixture(404, {"content-type": "application/json"}, b'{"error":"not_found"}')
+        return Fixture(200, {"content-type": "application/json"}, b"{}")
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        if request.method == "OPTIONS":
+            await route.fulfill(status=204, headers=CORS_HEADERS)
+            return
+        headers = await request.all_headers()
+        fixture = self.respond(request.method, request.url, request.post_data_buffer, headers)
+        if self.latency_scale and fixture.time_ms:
+            await asyncio.sleep(fixture.time_ms * self.latency_scale / 1000)
+        await route.fulfill(status=fixture.status, headers={**CORS_HEADERS, **fixture.headers}, body=fixture.body)
+
+
+def _realtime(ws) -> None:
+    """Acknowledge joins and heartbeats so realtime-js stays quiet offline."""
+    def on_message(message) -> None:
+        try:
+            msg = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if isinstance(msg, list):  # serializer 2.0.0: [join_ref, ref, topic, event, payload]
+            join_ref, ref, topic, event, _ = msg
+            if event in ("phx_join", "heartbeat", "access_token"):
+                ws.send(json.dumps([join_ref, ref, topic, "phx_reply", {"status": "ok", "response": {}}]))
+        elif msg.get("event") in ("phx_join", "heartbeat", "access_token"):
+            ws.send(json.dumps({"topic": msg["topic"], "event": "phx_reply", "ref": msg.get("ref"),
+                                "join_ref": msg.get("join_ref"), "payload": {"status": "ok", "response": {}}}))
+
+    ws.on_message(on_message)
+
+
+async def install(context: BrowserContext, mock: SupabaseMock) -> None:
+    """Route ``context``'s Supabase traffic to ``mock``."""
+    await context.route(SUPABASE_PATH, mock.handle)
+    if hasattr(context, "route_web_socket"):  # Playwright >= 1.48
+        await context.route_web_socket(REALTIME_PATH, _realtime)
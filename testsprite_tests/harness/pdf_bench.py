@@ -0,0 +1,325 @@
+"""Throughput benchmark for ``generate-proposal-pdf`` at growing proposal sizes.
+
+TC004 and TC009 stop at a "PDF generated" label, so bulk exports by
+agencies have no numbers.  This benchmark builds proposals of 10 to 2,000
+screens and, for every size and concurrency level (1 is the serial
+baseline), reports latency percentiles, throughput, PDF size and the peak
+RSS of the Chromium processes doing the rendering.
+
+In-process (default) the HTML comes from the function itself:
+``generatePDFHTML`` is lifted out of ``index.ts`` and evaluated in the
+browser, so template changes are picked up without touching this file.
+It is then printed two ways:
+
+* ``per-request`` - what the function's production example does: launch a
+  browser, ``setContent`` with ``networkidle``, ``pdf()``, close;
+* ``pooled`` - a long-lived :class:`~harness.pool.BrowserPool` handing out
+  a fresh context per request, waiting only for ``load`` (the HTML has no
+  network dependencies to go idle on).
+
+``--target URL`` calls a deployed function instead.  With ``--serve-rest
+PORT`` the ``proposals`` select is answered by a local stand-in where
+``proposalId`` is the screen count, so ``supabase functions serve`` can be
+benchmarked without seeding a database::
+
+    python -m harness.pdf_bench --sizes 10 100 500 2000 --concurrency 1 4 16
+    python -m harness.pdf_bench --serve-rest 54410
+    python -m harness.pdf_bench --target http://localhost:54321/functions/v1/generate-proposal-pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from .config import SUITE_DIR, TMP_DIR
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .pool import BrowserPool
+from .results import ResultStore
+from .stats import latency_summary
+from .synthetic import proposal_row
+
+RESULTS_PATH = TMP_DIR / "pdf_bench_results.json"
+FUNCTION_PATH = SUITE_DIR.parent / "supabase" / "functions" / "generate-proposal-pdf" / "index.ts"
+STRATEGIES = ("per-request", "pooled")
+
+# page.pdf() options from the function's production example.
+PDF_OPTIONS = {
+    "format": "A4",
+    "print_background": True,
+    "margin": {"top": "20mm", "right": "15mm", "bottom": "20mm", "left": "15mm"},
+}
+
+# TypeScript annotations used in generatePDFHTML, stripped to plain JS.
+TS_ANNOTATION = re.compile(r"(\w+)\??: (?:ProposalData|string|number|any)\b")
+TS_RETURN = re.compile(r"\): string \{")
+
+
+def template_js(path: Path = FUNCTION_PATH) -> str:
+    """``generatePDFHTML`` from ``index.ts`` as a JS function expression."""
+    source = path.read_text(encoding="utf-8")
+    start = source.find("function generatePDFHTML(")
+    end = source.find("\nasync function generatePDFFromHTML", start)
+    if start < 0 or end < 0:
+        raise RuntimeError(f"generatePDFHTML not found in {path}")
+    body = TS_RETURN.sub(") {", TS_ANNOTATION.sub(r"\1", source[start:end]))
+    return f"(proposal) => {{ {body}\n return generatePDFHTML(proposal); }}"
+
+
+# --------------------------------------------------------------------------
+# Memory
+
+
+def _children() -> dict[int, list[int]]:
+    tree: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        tree.setdefault(ppid, []).append(int(entry))
+    return tree
+
+
+def tree_rss_bytes(root: int) -> int | None:
+    """Resident memory of ``root``'s descendants (Linux), else None."""
+    if not os.path.isdir("/proc"):
+        return None
+    tree = _children()
+    total, stack = 0, list(tree.get(root, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(tree.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+class PeakMemory:
+    """Samples :func:`tree_rss_bytes` of this process every ``interval_s``."""
+
+    def __init__(self, interval_s: float = 0.1) -> None:
+        self.interval_s = interval_s
+        self.peak: int | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self) -> None:
+        while True:
+            rss = tree_rss_bytes(os.getpid())
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(self.interval_s)
+
+    def __enter__(self) -> "PeakMemory":
+        self._task = asyncio.ensure_future(self._sample())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+# --------------------------------------------------------------------------
+# Renderers
+
+
+class Renderer:
+    """Turns a proposal into PDF bytes the way one strategy would."""
+
+    def __init__(self, strategy: str, pool: BrowserPool, template: str) -> None:
+        self.strategy = strategy
+        self.pool = pool
+        self.template = template
+
+    async def html(self, proposal: dict) -> str:
+        # The template runs where Intl/Date behave like Deno's.
+        async with self.pool.context() as context:
+            page = await context.new_page()
+            return await page.evaluate(self.template, proposal)
+
+    async def render(self, html: str) -> bytes:
+        if self.strategy == "per-request":
+            browser = await self.pool.launch()
+            try:
+                page = await browser.new_page()
+                await page.set_content(html, wait_until="networkidle")
+                return await page.pdf(**PDF_OPTIONS)
+            finally:
+                await browser.close()
+        async with self.pool.context() as context:
+            page = await context.new_page()
+            await page.set_content(html, wait_until="load")
+            return await page.pdf(**PDF_OPTIONS)
+
+
+async def _measure(send, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    sizes: list[int] = []
+    errors: list[str] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                body = await send()
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {str(exc).splitlines()[0] if str(exc) else ''}")
+                continue
+            latencies.append(time.perf_counter() - t0)
+            sizes.append(len(body))
+
+    with PeakMemory() as memory:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return {
+        **latency_summary(latencies, elapsed),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "pdf_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+        "peak_rss_bytes": memory.peak,
+        "latencies_ms": [round(v * 1000, 1) for v in latencies],
+    }
+
+
+async def run_inprocess(args) -> list[dict]:
+    template = template_js()
+    reports = []
+    async with BrowserPool(1, max(args.concurrency)) as pool:
+        for size in args.sizes:
+            html = await Renderer("pooled", pool, template).html(proposal_row(size, size, args.seed))
+            for strategy in args.strategies:
+                renderer = Renderer(strategy, pool, template)
+                for concurrency in args.concurrency:
+                    requests = max(concurrency, args.requests)
+                    report = await _measure(lambda: renderer.render(html), requests, concurrency)
+                    report.update(strategy=strategy, size=size, concurrency=concurrency, html_bytes=len(html))
+                    reports.append(report)
+                    print(_format(report), flush=True)
+    return reports
+
+
+async def run_remote(args) -> list[dict]:
+    client = HttpClient(args.target, max_connections=max(args.concurrency),
+                        headers={"authorization": f"Bearer {args.token}", "apikey": args.token})
+    ids = dict(args.proposal or [])
+    reports = []
+    try:
+        for size in args.sizes:
+            proposal_id = ids.get(size, str(size))
+
+            async def send() -> bytes:
+                response = await client.request("GET", f"?proposalId={proposal_id}")
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                return response.body
+
+            for concurrency in args.concurrency:
+                report = await _measure(send, max(concurrency, args.requests), concurrency)
+                # Rendering happens in the function's process, not ours.
+                report.update(strategy="remote", size=size, concurrency=concurrency, peak_rss_bytes=None)
+                reports.append(report)
+                print(_format(report), flush=True)
+    finally:
+        await client.close()
+    return reports
+
+
+def rest_server(host: str, port: int, seed: int) -> HttpServer:
+    """``GET /rest/v1/proposals?id=eq.N`` -> a proposal with N screens."""
+    server = HttpServer(host, port)
+
+    async def proposals(request: Request) -> Response:
+        value = request.arg("id", "")
+        if not value.startswith("eq.") or not value[3:].isdigit():
+            return Response(400, {"code": "PGRST100", "message": "expected id=eq.<screens>"})
+        row = proposal_row(int(value[3:]), int(value[3:]), seed)
+        single = "vnd.pgrst.object" in request.headers.get("accept", "")
+        return Response(200, row if single else [row])
+
+    server.route("GET", r"^/rest/v1/proposals$", proposals)
+    return server
+
+
+async def serve_rest(args) -> None:
+    async with rest_server("0.0.0.0", args.serve_rest, args.seed) as server:
+        print(f"proposals stand-in on {server.url} (SUPABASE_URL for `supabase functions serve`)", flush=True)
+        await asyncio.Event().wait()
+
+
+def _format(r: dict) -> str:
+    def ms(v):
+        return "-" if v is None else f"{v:8.0f}"
+
+    rss = f"{r['peak_rss_bytes'] / 2**20:6.0f}MB" if r.get("peak_rss_bytes") else "     -  "
+    size = f"{r['pdf_bytes'] / 1024:7.0f}KB" if r.get("pdf_bytes") else "      - "
+    return (f"{r['strategy']:<12} {r['size']:>5} screens  c={r['concurrency']:<3} "
+            f"{r.get('throughput_rps', 0):6.2f} pdf/s  p50 {ms(r['p50_ms'])}  p95 {ms(r['p95_ms'])} ms"
+            f"  {size}  rss {rss}" + (f"  errors {r['errors']}" if r["errors"] else ""))
+
+
+def _size_id(value: str) -> tuple[int, str]:
+    size, _, proposal_id = value.partition("=")
+    if not size.isdigit() or not proposal_id:
+        raise argparse.ArgumentTypeError("expected SIZE=PROPOSAL_ID")
+    return int(size), proposal_id
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.pdf_bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000, 2000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=16, help="PDFs per size and concurrency level")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", help="URL of a running generate-proposal-pdf function")
+    parser.add_argument("--token", default="", help="bearer token for --target")
+    parser.add_argument("--proposal", type=_size_id, action="append", metavar="SIZE=ID",
+                        help="existing proposal id to use for a size with --target (default: the size)")
+    parser.add_argument("--serve-rest", type=int, metavar="PORT", help="only serve the proposals stand-in")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--no-store", action="store_true", help="do not append the samples to tmp/results.db")
+    parser.add_argument("--label", help="free-form label stored with the run")
+    args = parser.parse_args(argv)
+
+    if args.serve_rest is not None:
+        try:
+            asyncio.run(serve_rest(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    started_at = time.time()
+    reports = asyncio.run(run_remote(args) if args.target else run_inprocess(args))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "token")}
+    args.output.write_text(json.dumps({"config": config, "results": reports}, indent=2), encoding="utf-8")
+    if not args.no_store:
+        with ResultStore() as store:
+            run_id = store.add_run([], started_at, time.time() - started_at, source="pdf_bench", label=args.label)
+            samples = []
+            for r in reports:
+                subject = f"pdf:{r['strategy']}:{r['size']}:c{r['concurrency']}"
+                samples.extend((subject, "pdf_ms", v) for v in r["latencies_ms"])
+                samples.append((subject, "pdf_throughput", r.get("throughput_rps")))
+            store.add_run_metrics(run_id, samples)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
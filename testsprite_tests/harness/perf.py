@@ -0,0 +1,169 @@
+"""Front-end performance probe attached to every context the runner opens.
+
+An init script registers ``PerformanceObserver``s for LCP, layout shifts
+and long tasks before the app's own code runs.  A sample is taken on every
+page load and SPA route change, on explicit :func:`step` calls and once
+more when the case ends, so each TC run doubles as a page-load benchmark
+of the dashboard, map and reports pages it drives.
+
+Each sample holds Navigation Timing (TTFB, DOMContentLoaded, load, transfer
+size), resource count, LCP, cumulative CLS, long-task count and total
+duration, and the used JS heap.  Values are cumulative for the document;
+SPA route changes keep the document, so compare long tasks and heap between
+consecutive samples to attribute them to a step.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import weakref
+from pathlib import Path
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from .config import TMP_DIR
+
+PERF_RESULTS_PATH = TMP_DIR / "perf_results.json"
+
+PROBE_INIT_JS = """(() => {
+    if (window.__tvdPerf) return;
+    const probe = window.__tvdPerf = { lcp: null, cls: 0, longTasks: 0, longTaskMs: 0 };
+    const observe = (type, onEntry) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(onEntry))
+                .observe({ type, buffered: true });
+        } catch (e) {}
+    };
+    observe('largest-contentful-paint', (e) => { probe.lcp = e.renderTime || e.loadTime || e.startTime; });
+    observe('layout-shift', (e) => { if (!e.hadRecentInput) probe.cls += e.value; });
+    observe('longtask', (e) => { probe.longTasks += 1; probe.longTaskMs += e.duration; });
+})();"""
+
+SNAPSHOT_JS = """() => {
+    const p = window.__tvdPerf || {};
+    const nav = performance.getEntriesByType('navigation')[0];
+    const mem = performance.memory;
+    const round = (v) => (v == null ? null : Math.round(v * 10) / 10);
+    return {
+        url: location.href,
+        ttfb_ms: nav ? round(nav.responseStart) : null,
+        dom_content_loaded_ms: nav ? round(nav.domContentLoadedEventEnd) : null,
+        load_ms: nav && nav.loadEventEnd ? round(nav.loadEventEnd) : null,
+        transfer_bytes: nav ? nav.transferSize : null,
+        resources: performance.getEntriesByType('resource').length,
+        lcp_ms: round(p.lcp),
+        cls: p.cls == null ? null : Math.round(p.cls * 10000) / 10000,
+        long_tasks: p.longTasks || 0,
+        long_task_ms: round(p.longTaskMs || 0),
+        js_heap_bytes: mem ? mem.usedJSHeapSize : null,
+    };
+}"""
+
+
+class _Probe:
+    def __init__(self) -> None:
+        self.samples: list[dict] = []
+        self.pending: set[asyncio.Task] = set()
+        self.t0 = time.perf_counter()
+
+    def schedule(self, page: Page, step: str) -> None:
+        task = asyncio.ensure_future(self.sample(page, step))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def sample(self, page: Page, step: str) -> dict | None:
+        if page.is_closed():
+            return None
+        try:
+            data = await page.evaluate(SNAPSHOT_JS)
+        except Error:
+            # Navigated away or closed mid-evaluation; the next sample covers it.
+            return None
+        data["step"] = step
+        data["at_s"] = round(time.perf_counter() - self.t0, 3)
+        self.samples.append(data)
+        return data
+
+
+_probes: "weakref.WeakKeyDictionary[BrowserContext, _Probe]" = weakref.WeakKeyDictionary()
+
+
+def _watch(probe: _Probe, page: Page) -> None:
+    def on_navigated(frame) -> None:
+        if frame == page.main_frame:
+            probe.schedule(page, "route")
+
+    page.on("load", lambda _: probe.schedule(page, "load"))
+    page.on("framenavigated", on_navigated)
+
+
+async def attach(context: BrowserContext) -> None:
+    """Install the probe on ``context``; call before opening pages."""
+    if context in _probes:
+        return
+    probe = _probes[context] = _Probe()
+    await context.add_init_script(script=PROBE_INIT_JS)
+    for page in context.pages:
+        _watch(probe, page)
+    context.on("page", lambda page: _watch(probe, page))
+
+
+async def step(page: Page, name: str) -> dict | None:
+    """Take a labelled sample now (no-op when no probe is attached)."""
+    probe = _probes.get(page.context)
+    return await probe.sample(page, name) if probe else None
+
+
+async def collect(context: BrowserContext) -> list[dict]:
+    """Finish pending samples, take a final one per open page, return all."""
+    probe = _probes.get(context)
+    if probe is None:
+        return []
+    if probe.pending:
+        await asyncio.gather(*list(probe.pending), return_exceptions=True)
+    for page in context.pages:
+        await probe.sample(page, "final")
+    return sorted(probe.samples, key=lambda s: s["at_s"])
+
+
+async def reset(context: BrowserContext) -> None:
+    """Drop samples so far on a context that is reused for another case."""
+    probe = _probes.get(context)
+    if probe is None:
+        return
+    if probe.pending:
+        await asyncio.gather(*list(probe.pending), return_exceptions=True)
+    probe.samples.clear()
+    probe.t0 = time.perf_counter()
+
+
+def summarize(samples: list[dict]) -> dict:
+    """Worst-case figures over a case's samples."""
+    def worst(key):
+        values = [s[key] for s in samples if s.get(key) is not None]
+        return max(values) if values else None
+
+    return {
+        "samples": len(samples),
+        "max_lcp_ms": worst("lcp_ms"),
+        "max_cls": worst("cls"),
+        "max_dom_content_loaded_ms": worst("dom_content_loaded_ms"),
+        "long_tasks": worst("long_tasks"),
+        "long_task_ms": worst("long_task_ms"),
+        "peak_js_heap_bytes": worst("js_heap_bytes"),
+    }
+
+
+def write_report(per_case: dict[str, list[dict]], path: Path = PERF_RESULTS_PATH) -> None:
+    """Write ``tmp/perf_results.json`` next to ``tmp/test_results.json``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "cases": {
+            test_id: {"summary": summarize(samples), "samples": samples}
+            for test_id, samples in sorted(per_case.items())
+        },
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
@@ -0,0 +1,91 @@
+"""A small pool of long-lived Chromium browsers handing out fresh contexts."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from .config import CHROMIUM_ARGS
+
+
+class BrowserPool:
+    """Launches ``size`` browsers once and leases isolated contexts from them.
+
+    At most ``size * contexts_per_browser`` contexts are open at a time; a
+    lease goes to the browser with the fewest open contexts.  A browser that
+    crashed is relaunched on the next lease instead of failing every case
+    that would have been scheduled on it.
+
+    Callables in ``context_hooks`` are awaited with every new context before
+    it is handed out (route handlers, init scripts, ...).
+    """
+
+    def __init__(self, size: int = 1, contexts_per_browser: int = 4, headless: bool = True) -> None:
+        if size < 1 or contexts_per_browser < 1:
+            raise ValueError("size and contexts_per_browser must be >= 1")
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.headless = headless
+        self._playwright: Playwright | None = None
+        self._browsers: list[Browser] = []
+        self._open: list[int] = []
+        self._slots = asyncio.Semaphore(size * contexts_per_browser)
+        self._lock = asyncio.Lock()
+        self.context_hooks: list[Callable[[BrowserContext], Awaitable[None]]] = []
+
+    async def launch(self) -> Browser:
+        """Launch a browser with the pool's settings; unpooled callers close it themselves."""
+        assert self._playwright is not None
+        return await self._playwright.chromium.launch(headless=self.headless, args=CHROMIUM_ARGS)
+
+    async def start(self) -> "BrowserPool":
+        self._playwright = await async_playwright().start()
+        self._browsers = list(await asyncio.gather(*(self.launch() for _ in range(self.size))))
+        self._open = [0] * self.size
+        return self
+
+    async def close(self) -> None:
+        await asyncio.gather(*(b.close() for b in self._browsers), return_exceptions=True)
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _acquire(self) -> int:
+        async with self._lock:
+            index = min(range(len(self._browsers)), key=self._open.__getitem__)
+            if not self._browsers[index].is_connected():
+                self._browsers[index] = await self.launch()
+            self._open[index] += 1
+            return index
+
+    @asynccontextmanager
+    async def context(self, **options) -> AsyncIterator[BrowserContext]:
+        """Lease a new context; ``options`` go to ``Browser.new_context``."""
+        if not self._browsers:
+            raise RuntimeError("BrowserPool.start() has not been called")
+        async with self._slots:
+            index = await self._acquire()
+            context = None
+            try:
+                context = await self._browsers[index].new_context(**options)
+                for hook in self.context_hooks:
+                    await hook(context)
+                yield context
+            finally:
+                self._open[index] -= 1
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        # The browser may have gone away with the context.
+                        pass
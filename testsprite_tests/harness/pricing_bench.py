@@ -0,0 +1,548 @@
+"""Vectorized reference of the pricing engine, golden checks and a scaling benchmark.
+
+The wizard re-runs ``calculateProposalMetrics`` (``src/lib/pricing.ts``)
+on every change of step 5, after summing the monthly audience of every
+selected screen (``NewProposalWizardImproved.tsx``), and the only coverage
+is ``tests/unit/pricing.test.ts``.  :func:`evaluate` is the same engine in
+NumPy over a batch of proposals at once: screens are one flat array of
+audiences with a proposal index, durations a padded ``proposals x
+durations`` array per price table, and every rule of ``pricing.ts`` is a
+``np.where`` with the TypeScript's defaults, ``typeof`` checks and
+evaluation order (so floating-point results match to the last bits).
+
+Golden files pin the two together: ``golden`` runs
+``tests/unit/pricing.golden.ts`` on :func:`golden_cases` and writes what
+the TypeScript returns to ``fixtures/pricing/golden.json``; ``check``
+compares :func:`evaluate` with it.  ``bench`` times both engines per
+proposal from 10 to 10,000 screens and fits the log-log slope of cost
+against screens: about 1 is linear, 2 quadratic; above ``--max-exponent``
+the command fails::
+
+    python -m harness.pricing_bench golden
+    python -m harness.pricing_bench check
+    python -m harness.pricing_bench bench --sizes 10,100,1000,10000
+    PRICING_TS_RUNNER="npx ts-node --esm" python -m harness.pricing_bench bench --proposals 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .config import SUITE_DIR, TMP_DIR
+
+REPO_DIR = SUITE_DIR.parent
+TS_SCRIPT = REPO_DIR / "tests" / "unit" / "pricing.golden.ts"
+GOLDEN_PATH = SUITE_DIR / "fixtures" / "pricing" / "golden.json"
+RESULTS_PATH = TMP_DIR / "pricing_bench_results.json"
+TS_RUNNER_ENV = "PRICING_TS_RUNNER"
+DEFAULT_TS_RUNNER = "npx ts-node"
+DEFAULT_SIZES = (10, 30, 100, 300, 1000, 3000, 10000)
+DEFAULT_MAX_EXPONENT = 1.5
+
+VARIANTS = ("avulsa", "especial")
+AUDIENCE_COLUMNS = ("audience_monthly", "audiencia_pacientes", "audiencia_local")
+_UNDEFINED = object()
+
+
+# --------------------------------------------------------------------------
+# JavaScript value semantics for JSON inputs
+
+
+def js_number(value=_UNDEFINED) -> float:
+    """``Number(value)``; :data:`_UNDEFINED` stands for ``undefined``."""
+    if value is _UNDEFINED:
+        return math.nan
+    if value is None:
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        try:
+            return float(text)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _typed(value) -> float:
+    """``value`` where the TypeScript checks ``typeof value === 'number'``, else NaN."""
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+
+def _truthy(value) -> bool:
+    return value not in (None, False, 0, "") and not (isinstance(value, float) and math.isnan(value))
+
+
+def _coalesce(input: dict, key: str, default):
+    """``input[key] ?? default``."""
+    value = input.get(key)
+    return default if value is None else value
+
+
+def _js_key(seconds: float) -> str:
+    """The property key JavaScript uses for a numeric index."""
+    return str(int(seconds)) if seconds.is_integer() and abs(seconds) < 1e21 else repr(seconds)
+
+
+def js_round(values: np.ndarray) -> np.ndarray:
+    """``Math.round``: halves go up."""
+    return np.floor(values + 0.5)
+
+
+def selected_durations(seconds, custom=None) -> list[float]:
+    """``getSelectedDurations``."""
+    base = [float(s) for s in seconds if _typed(s) > 0] if isinstance(seconds, list) else []
+    if _truthy(custom) and js_number(custom) > 0:
+        base.append(js_number(custom))
+    return sorted(set(base))
+
+
+# --------------------------------------------------------------------------
+# Batch engine
+
+
+@dataclass
+class PricingResult:
+    """``calculateProposalMetrics`` for each proposal of a batch, as arrays."""
+
+    inputs: list[dict]
+    screens: np.ndarray
+    total_insertions: np.ndarray
+    audience_per_period: np.ndarray
+    impacts: np.ndarray
+    gross: np.ndarray
+    net: np.ndarray
+    missing: list[list[float]]
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def metrics(self, index: int) -> dict:
+        """Proposal ``index`` shaped like ``PricingMetrics``."""
+        input = self.inputs[index]
+        return {
+            "screens": int(self.screens[index]),
+            "totalInsertions": float(self.total_insertions[index]),
+            "audiencePerPeriod": float(self.audience_per_period[index]),
+            "impacts": float(self.impacts[index]),
+            "grossValue": float(self.gross[index]),
+            "netValue": float(self.net[index]),
+            "pricingMode": _coalesce(input, "pricing_mode", "cpm"),
+            "pricingVariant": _coalesce(input, "pricing_variant", "avulsa"),
+            "periodUnit": _coalesce(input, "period_unit", "months"),
+            "monthsPeriod": _coalesce(input, "months_period", 1),
+            "daysPeriod": input.get("days_period"),
+            "missingPriceFor": self.missing[index],
+        }
+
+
+def screen_columns(proposals: list[list[dict]]) -> tuple[np.ndarray, np.ndarray]:
+    """Screen rows as a ``(screens, 3)`` audience array and per-proposal counts."""
+    values = [
+        [0.0 if row.get(c) is None else js_number(row[c]) for c in AUDIENCE_COLUMNS]
+        for rows in proposals for row in rows
+    ]
+    audience = np.array(values, dtype=float).reshape(-1, len(AUDIENCE_COLUMNS))
+    return audience, np.array([len(rows) for rows in proposals], dtype=np.int64)
+
+
+def monthly_audience(audience: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """The wizard's ``audience_monthly || audiencia_pacientes || audiencia_local`` sum per proposal."""
+    picked = np.zeros(len(audience))
+    for column in reversed(range(audience.shape[1])):
+        value = audience[:, column]
+        picked = np.where((value != 0) & ~np.isnan(value), value, picked)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return np.bincount(owner, weights=picked, minlength=len(counts))
+
+
+def _price_arrays(inputs: list[dict], durations: list[list[float]]) -> tuple[np.ndarray, ...]:
+    """Unit prices and discounts as ``(proposals, 2, durations)`` arrays.
+
+    Slot 0 is the proposal's variant, slot 1 ``especial`` under ``ambos``;
+    a missing or non-positive price is NaN, and padding is masked out.
+    """
+    width = max((len(d) for d in durations), default=0)
+    shape = (len(inputs), 2, width)
+    price, pct, fixed = np.full(shape, np.nan), np.zeros(shape), np.zeros(shape)
+    used = np.zeros(shape, dtype=bool)
+    for p, (input, seconds) in enumerate(zip(inputs, durations)):
+        variant = _coalesce(input, "pricing_variant", "avulsa")
+        tables = VARIANTS if variant == "ambos" else (variant,)
+        prices = input.get("insertion_prices") or {}
+        discounts = input.get("discounts_per_insertion") or {}
+        for slot, name in enumerate(tables):
+            table = prices.get(name) or {} if isinstance(prices, dict) else {}
+            discount = discounts.get(name) or {} if isinstance(discounts, dict) else {}
+            for d, sec in enumerate(seconds):
+                used[p, slot, d] = True
+                key = _js_key(sec)
+                value = js_number(table.get(key, _UNDEFINED)) if table.get(key) is not None else math.nan
+                if value > 0:
+                    price[p, slot, d] = value
+                config = discount.get(key) or {}
+                pct[p, slot, d] = 0.0 if math.isnan(_typed(config.get("pct"))) else config["pct"]
+                fixed[p, slot, d] = 0.0 if math.isnan(_typed(config.get("fixed"))) else config["fixed"]
+    return price, pct, fixed, used
+
+
+def evaluate(inputs: list[dict], audience: np.ndarray, counts: np.ndarray) -> PricingResult:
+    """``calculateProposalMetrics`` for every proposal in ``inputs``.
+
+    ``audience``/``counts`` come from :func:`screen_columns`; the screen
+    count and monthly audience are derived from them as the wizard does.
+    """
+    n = len(inputs)
+    screens = counts.astype(float)
+
+    def column(values: list) -> np.ndarray:
+        return np.array(values, dtype=float).reshape(n)
+
+    iph = column([js_number(i.get("insertions_per_hour", _UNDEFINED)) for i in inputs])
+    iph_or_zero = column([js_number(i.get("insertions_per_hour")) if _truthy(i.get("insertions_per_hour")) else 0
+                          for i in inputs])
+    hours = column([js_number(_coalesce(i, "hours_per_day", 10)) for i in inputs])
+    business_days = column([js_number(_coalesce(i, "business_days_per_month", 22)) for i in inputs])
+    months = column([_typed(_coalesce(i, "months_period", 1)) for i in inputs])
+    days = column([_typed(i.get("days_period")) for i in inputs])
+    avg = column([_typed(i.get("avg_audience_per_insertion")) for i in inputs])
+    avg = np.where(avg > 0, avg, 100.0)
+    unit = [_coalesce(i, "period_unit", "months") for i in inputs]
+    days_mode = np.array([u == "days" for u in unit], dtype=bool)
+    months_mode = np.array([u == "months" for u in unit], dtype=bool)
+
+    # computeTotalInsertions, multiplied left to right as in the TypeScript.
+    total = np.where(
+        days_mode & (days > 0), iph * hours * days * screens,
+        np.where(months_mode & (months > 0), iph * hours * business_days * months * screens,
+                 iph * hours * 30 * screens),
+    )
+
+    # computeAudiencePerPeriod / computeImpacts
+    monthly = monthly_audience(audience, counts)
+    has_monthly = monthly > 0
+    per_period = np.where(
+        has_monthly,
+        np.where(days_mode, js_round(monthly / np.maximum(business_days, 1)), monthly),
+        total * avg,
+    )
+    impacts = np.where(has_monthly, per_period * iph_or_zero, total * avg)
+
+    # computeCPMModeValue
+    cpm = column([_typed(i.get("cpm_value")) for i in inputs])
+    cpm = np.where(cpm > 0, cpm, 25.0)
+    discount_pct = column([_typed(i.get("discount_pct")) for i in inputs])
+    discount_fixed = column([_typed(i.get("discount_fixed")) for i in inputs])
+    discount_pct = np.where(discount_pct > 0, discount_pct, 0.0)
+    discount_fixed = np.where(discount_fixed > 0, discount_fixed, 0.0)
+    cpm_gross = impacts / 1000 * cpm
+    cpm_net = np.maximum(0, cpm_gross - cpm_gross * discount_pct / 100 - discount_fixed)
+
+    # computeInsertionModeValue: durations in ascending order, summed in that order.
+    durations = [selected_durations(i.get("film_seconds"), i.get("custom_film_seconds")) for i in inputs]
+    price, pct, fixed, used = _price_arrays(inputs, durations)
+    unit_price = np.where(pct > 0, price * (1 - pct / 100), np.maximum(0, price - fixed))
+    priced = used & ~np.isnan(price)
+    line = np.where(priced, unit_price * total[:, None, None], 0.0)
+    slot_gross = np.zeros((n, 2))
+    for d in range(line.shape[2]):
+        slot_gross = slot_gross + line[:, :, d]
+    insertion_gross = slot_gross[:, 0] + slot_gross[:, 1]
+    absent = used & ~priced
+
+    insertion_mode = np.array([_coalesce(i, "pricing_mode", "cpm") == "insertion" for i in inputs], dtype=bool)
+    missing = [
+        sorted({durations[p][d] for slot, d in zip(*np.nonzero(absent[p]))}) if insertion_mode[p] else []
+        for p in range(n)
+    ]
+    return PricingResult(
+        inputs=inputs,
+        screens=counts,
+        total_insertions=total,
+        audience_per_period=per_period,
+        impacts=impacts,
+        gross=np.where(insertion_mode, insertion_gross, cpm_gross),
+        net=np.where(insertion_mode, insertion_gross, cpm_net),
+        missing=missing,
+    )
+
+
+# --------------------------------------------------------------------------
+# Golden files
+
+
+def golden_cases(seed: int = 7, random_cases: int = 40) -> list[dict]:
+    """Edge cases of every rule in ``pricing.ts``, then random wizard states."""
+    prices = {"avulsa": {"15": 10, "30": 18, "45": 25}, "especial": {"15": 14, "30": 24}}
+    base = {"film_seconds": [15, 30], "insertions_per_hour": 6, "insertion_prices": prices}
+    screens = [{"audience_monthly": 12000}, {"audience_monthly": None, "audiencia_pacientes": 3000},
+               {"audience_monthly": 0, "audiencia_pacientes": 0, "audiencia_local": 800}, {}]
+    cases = [
+        ("cpm-defaults", {}, screens),
+        ("cpm-no-screens", {}, []),
+        ("cpm-no-audience", {"avg_audience_per_insertion": 250}, [{}, {}]),
+        ("cpm-avg-default", {"avg_audience_per_insertion": 0}, [{}]),
+        ("cpm-discount-pct", {"cpm_value": 40, "discount_pct": 12.5}, screens),
+        ("cpm-discount-fixed", {"cpm_value": 40, "discount_fixed": 150}, screens),
+        ("cpm-net-clamped", {"cpm_value": 1, "discount_fixed": 1e9}, screens),
+        ("cpm-value-zero", {"cpm_value": 0}, screens),
+        ("cpm-negative-discounts", {"discount_pct": -5, "discount_fixed": -10}, screens),
+        ("months-period", {"period_unit": "months", "months_period": 3, "hours_per_day": 12,
+                           "business_days_per_month": 20}, screens),
+        ("months-period-zero", {"period_unit": "months", "months_period": 0}, screens),
+        ("months-period-null", {"period_unit": "months", "months_period": None}, screens),
+        ("days-period", {"period_unit": "days", "days_period": 7}, screens),
+        ("days-period-missing", {"period_unit": "days"}, screens),
+        ("days-rounding", {"period_unit": "days", "days_period": 5, "business_days_per_month": 8},
+         [{"audience_monthly": 100}]),
+        ("days-business-zero", {"period_unit": "days", "days_period": 5, "business_days_per_month": 0}, screens),
+        ("days-no-audience", {"period_unit": "days", "days_period": 10}, [{}, {}, {}]),
+        ("unknown-unit", {"period_unit": "weeks"}, screens),
+        ("hours-zero", {"hours_per_day": 0}, screens),
+        ("insertions-zero", {"insertions_per_hour": 0}, screens),
+        ("insertions-missing", {"insertions_per_hour": None}, screens),
+        ("fractional-audience", {"period_unit": "days", "days_period": 3},
+         [{"audience_monthly": 1234.5}, {"audiencia_local": 0.1}, {"audiencia_local": 0.2}]),
+        ("insertion-avulsa", {"pricing_mode": "insertion"}, screens),
+        ("insertion-especial", {"pricing_mode": "insertion", "pricing_variant": "especial"}, screens),
+        ("insertion-ambos", {"pricing_mode": "insertion", "pricing_variant": "ambos",
+                             "film_seconds": [15, 30, 45]}, screens),
+        ("insertion-custom", {"pricing_mode": "insertion", "film_seconds": [30, 15, 30, 0, -5],
+                              "custom_film_seconds": 45}, screens),
+        ("insertion-custom-duplicate", {"pricing_mode": "insertion", "custom_film_seconds": 15}, screens),
+        ("insertion-missing-prices", {"pricing_mode": "insertion", "film_seconds": [10, 15, 60],
+                                      "insertion_prices": {"avulsa": {"15": 10, "60": 0}, "especial": {}}},
+         screens),
+        ("insertion-null-prices", {"pricing_mode": "insertion",
+                                   "insertion_prices": {"avulsa": {"15": None, "30": -3}}}, screens),
+        ("insertion-string-prices", {"pricing_mode": "insertion",
+                                     "insertion_prices": {"avulsa": {"15": "12.5", "30": "abc"}}}, screens),
+        ("insertion-no-durations", {"pricing_mode": "insertion", "film_seconds": []}, screens),
+        ("insertion-discounts", {
+            "pricing_mode": "insertion", "pricing_variant": "ambos",
+            "discounts_per_insertion": {"avulsa": {"15": {"pct": 10, "fixed": 5}, "30": {"fixed": 20}},
+                                        "especial": {"15": {"pct": 0, "fixed": 3}, "30": {"pct": -1, "fixed": 4}}},
+        }, screens),
+        ("insertion-ambos-missing-union", {
+            "pricing_mode": "insertion", "pricing_variant": "ambos", "film_seconds": [15, 30, 45, 90],
+        }, screens),
+        ("insertion-unknown-variant", {"pricing_mode": "insertion", "pricing_variant": "combo"}, screens),
+        ("insertion-days", {"pricing_mode": "insertion", "period_unit": "days", "days_period": 14}, screens),
+        ("insertion-ignores-cpm-discounts", {"pricing_mode": "insertion", "discount_pct": 50,
+                                             "discount_fixed": 100}, screens),
+    ]
+    rng = random.Random(seed)
+    for index in range(random_cases):
+        count = rng.randint(0, 25)
+        rows = [{"audience_monthly": rng.choice([None, 0, rng.randint(500, 20000), round(rng.uniform(1, 9999), 2)]),
+                 "audiencia_pacientes": rng.choice([None, rng.randint(100, 5000)]),
+                 "audiencia_local": rng.randint(50, 2000)} for _ in range(count)]
+        seconds = rng.sample([10, 15, 20, 30, 45, 60], rng.randint(0, 4))
+
+        def table() -> dict:
+            return {str(s): rng.choice([0, round(rng.uniform(1, 400), 2)]) for s in seconds if rng.random() < 0.8}
+
+        overrides = {
+            "film_seconds": seconds,
+            "custom_film_seconds": rng.choice([None, 0, 25, 30]),
+            "insertions_per_hour": rng.choice([1, 4, 6, 8, 12]),
+            "hours_per_day": rng.choice([None, 8, 10, 24]),
+            "business_days_per_month": rng.choice([None, 20, 22, 30]),
+            "period_unit": rng.choice(["months", "days"]),
+            "months_period": rng.choice([None, 1, 2, 6]),
+            "days_period": rng.choice([None, 1, 15, 45]),
+            "pricing_mode": rng.choice(["cpm", "insertion"]),
+            "pricing_variant": rng.choice(["avulsa", "especial", "ambos"]),
+            "insertion_prices": {"avulsa": table(), "especial": table()},
+            "discounts_per_insertion": {v: {str(s): {rng.choice(["pct", "fixed"]): round(rng.uniform(0, 30), 1)}
+                                            for s in seconds if rng.random() < 0.5} for v in VARIANTS},
+            "cpm_value": rng.choice([None, 18.5, 25, 42]),
+            "discount_pct": rng.choice([None, 0, 5, 15]),
+            "discount_fixed": rng.choice([None, 0, 100]),
+            "avg_audience_per_insertion": rng.choice([None, 0, 80, 150]),
+        }
+        cases.append((f"random-{index:02d}", {k: v for k, v in overrides.items() if v is not None}, rows))
+    return [{"name": name, "input": {**base, **overrides}, "screens": rows} for name, overrides, rows in cases]
+
+
+def ts_command(*args: str) -> list[str]:
+    """``tests/unit/pricing.golden.ts`` under ``PRICING_TS_RUNNER`` (default ``npx ts-node``)."""
+    runner = shlex.split(os.environ.get(TS_RUNNER_ENV, DEFAULT_TS_RUNNER), posix=os.name != "nt")
+    return [*runner, str(TS_SCRIPT), *args]
+
+
+def export_golden(cases: list[dict], path: Path = GOLDEN_PATH) -> None:
+    """Have the TypeScript engine write its results for ``cases`` to ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    TMP_DIR.mkdir(parents=True, exist_ok=True)
+    cases_path = TMP_DIR / "pricing_cases.json"
+    cases_path.write_text(json.dumps(cases), encoding="utf-8")
+    subprocess.run(ts_command("export", str(cases_path), str(path.resolve())), cwd=REPO_DIR, check=True,
+                   capture_output=True)
+
+
+def _same(expected, actual, rel_tol: float) -> bool:
+    if isinstance(expected, list):
+        return isinstance(actual, list) and len(expected) == len(actual) and all(
+            _same(e, a, rel_tol) for e, a in zip(expected, actual))
+    if isinstance(actual, float) and not isinstance(expected, bool):
+        if expected is None:  # JSON.stringify writes NaN as null
+            return math.isnan(actual)
+        if isinstance(expected, (int, float)):
+            return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=1e-9)
+    return expected == actual
+
+
+def check(golden: list[dict], rel_tol: float = 1e-12) -> list[str]:
+    """Fields where :func:`evaluate` differs from the golden TypeScript results."""
+    audience, counts = screen_columns([case["screens"] for case in golden])
+    result = evaluate([case["input"] for case in golden], audience, counts)
+    problems = []
+    for index, case in enumerate(golden):
+        actual = result.metrics(index)
+        for key, expected in case["expected"].items():
+            if not _same(expected, actual.get(key), rel_tol):
+                problems.append(f"{case['name']}: {key} = {actual.get(key)!r}, TypeScript {expected!r}")
+    return problems
+
+
+# --------------------------------------------------------------------------
+# Benchmark
+
+
+@dataclass
+class Point:
+    screens: int
+    us_per_proposal: float
+
+
+def bench_python(inputs: list[dict], sizes: list[int], proposals: int, repeats: int = 5) -> list[Point]:
+    """Median cost per proposal of :func:`evaluate` on ``proposals`` proposals per size."""
+    points = []
+    batch = [inputs[i % len(inputs)] for i in range(proposals)]
+    for size in sizes:
+        j = np.arange(size)
+        audience = np.column_stack([
+            ((np.arange(proposals)[:, None] * 7919 + j * 104729) % 20000).ravel(),
+            np.tile(100 + j % 4900, proposals),
+            np.full(size * proposals, 50),
+        ]).astype(float)
+        counts = np.full(proposals, size, dtype=np.int64)
+        evaluate(batch, audience, counts)
+        samples = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            evaluate(batch, audience, counts)
+            samples.append((time.perf_counter() - t0) * 1e6 / proposals)
+        points.append(Point(size, float(np.median(samples))))
+    return points
+
+
+def bench_ts(sizes: list[int], proposals: int, cases_path: Path | None = GOLDEN_PATH) -> list[Point]:
+    """The same measurement of ``calculateProposalMetrics`` in Node."""
+    args = ["bench", ",".join(map(str, sizes)), str(proposals)]
+    if cases_path is not None and cases_path.is_file():
+        args.append(str(cases_path.resolve()))
+    out = subprocess.run(ts_command(*args), cwd=REPO_DIR, check=True, capture_output=True, text=True)
+    return [Point(int(p["screens"]), float(p["us_per_proposal"])) for p in json.loads(out.stdout.strip().splitlines()[-1])]
+
+
+def growth_exponent(points: list[Point]) -> float | None:
+    """Least-squares slope of log(cost) over log(screens) on the larger half of the sizes.
+
+    At the small sizes the fixed cost per proposal hides how it grows.
+    """
+    ordered = sorted((p for p in points if p.us_per_proposal > 0), key=lambda p: p.screens)
+    fitted = ordered[(len(ordered) - 1) // 2:]
+    if len(fitted) < 2:
+        return None
+    x = np.log([p.screens for p in fitted])
+    y = np.log([p.us_per_proposal for p in fitted])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def _print_points(engine: str, points: list[Point], exponent: float | None) -> None:
+    print(f"{engine}:")
+    for point in points:
+        print(f"  {point.screens:>7,} screens  {point.us_per_proposal:>11.2f} us/proposal  "
+              f"{point.us_per_proposal * 1000 / point.screens:>8.1f} ns/screen")
+    print(f"  growth exponent {exponent:.2f}" if exponent is not None else "  growth exponent n/a")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.pricing_bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    golden = sub.add_parser("golden", help="regenerate the golden file from the TypeScript engine")
+    golden.add_argument("--seed", type=int, default=7)
+    sub.add_parser("check", help="compare the reference with the golden file")
+    bench = sub.add_parser("bench", help="cost per proposal against screens selected")
+    bench.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated screen counts")
+    bench.add_argument("--proposals", type=int, default=200, help="proposals timed per size")
+    bench.add_argument("--repeats", type=int, default=5)
+    bench.add_argument("--no-ts", action="store_true", help="time the Python reference only")
+    bench.add_argument("--max-exponent", type=float, default=DEFAULT_MAX_EXPONENT,
+                       help="fail when cost grows faster than screens**N")
+    bench.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "golden":
+        cases = golden_cases(args.seed)
+        try:
+            export_golden(cases, args.golden)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            stderr = getattr(exc, "stderr", None) or b""
+            print(stderr.decode("utf-8", "replace").strip() or str(exc), file=sys.stderr)
+            print(f"set {TS_RUNNER_ENV} to a command that runs TypeScript", file=sys.stderr)
+            return 1
+        print(f"{len(cases)} cases -> {args.golden}")
+        return 0
+
+    if args.command == "check":
+        cases = json.loads(args.golden.read_text(encoding="utf-8"))
+        problems = check(cases)
+        for problem in problems:
+            print(problem)
+        print(f"{len(cases)} golden cases, {len(problems)} mismatches")
+        return 1 if problems else 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = json.loads(args.golden.read_text(encoding="utf-8")) if args.golden.is_file() else golden_cases()
+    engines = {"python": bench_python([c["input"] for c in cases], sizes, args.proposals, args.repeats)}
+    if not args.no_ts:
+        try:
+            engines["typescript"] = bench_ts(sizes, args.proposals, args.golden)
+        except (OSError, subprocess.CalledProcessError, ValueError) as exc:
+            print(f"TypeScript benchmark skipped: {str(getattr(exc, 'stderr', '') or exc).strip()}", file=sys.stderr)
+    report, failed = {"sizes": sizes, "proposals": args.proposals, "engines": {}}, []
+    for engine, points in engines.items():
+        exponent = growth_exponent(points)
+        _print_points(engine, points, exponent)
+        report["engines"][engine] = {"points": [vars(p) for p in points], "growth_exponent": exponent}
+        if exponent is not None and exponent > args.max_exponent:
+            failed.append(engine)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if failed:
+        print(f"superlinear cost per proposal in {', '.join(failed)} (exponent > {args.max_exponent:g})")
+    print(f"-> {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""Batch CEP-to-screen proximity in one vectorized pass over all screens.
+
+``src/lib/cep-batch.ts::batchFindScreensByCEPs`` geocodes every CEP of an
+agency upload, four at a time, and calls ``searchScreensNearLocation`` for
+each, which fetches every active screen and runs ``calculateDistance``
+over all of them in the browser: CEPs x screens haversines, and as many
+full ``screens`` selects as there are CEPs.  :class:`ScreenIndex` loads
+the screen coordinates once into NumPy arrays with a grid index (cells of
+``cell_km``; a scikit-learn ``BallTree`` when that is installed and asked
+for), and :meth:`ScreenIndex.batch` answers the whole CEP list at once:
+
+* candidate pairs only from the grid cells within the radius of each CEP;
+* haversine and rounding as ``calculateDistance`` and ``Math.round(d * 10)
+  / 10`` compute them, filtered on the rounded distance;
+* the nearest 20 per CEP, ties in screen order, as the stable sort and
+  ``slice(0, 20)`` do;
+* de-duplication as ``uniqueById``: the last CEP to find a screen wins,
+  and ``Object.values`` lists integer ids ascending before other ids;
+* venues grouped by ``display_name-city-state``.
+
+:func:`reference_batch` is the per-CEP loop of the TypeScript, kept to
+check results against (``--check``).  CEPs are geocoded by a
+:data:`Geocoder`; the default places each CEP near a city of its postal
+region, so synthetic uploads land where the synthetic screens are, and
+``--geocache`` resolves them through :mod:`harness.geocache`.  The
+same engine answers ``POST /batch`` as a local service::
+
+    python -m harness.proximity --screens 20000 --ceps 5000 --radius 5 --check 100
+    python -m harness.proximity --ceps-file uploads/agencia.txt --radius 10
+    python -m harness.proximity --serve 54410
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+
+from .config import TMP_DIR
+from .geocache import service_geocoder
+from .localhttp import HttpServer, Request, Response
+from .synthetic import cep_point, db_screen_records
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:  # optional: the grid index needs only NumPy
+    BallTree = None
+
+RESULTS_PATH = TMP_DIR / "proximity_results.json"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+DEFAULT_RADIUS_KM = 5.0  # searchScreensNearLocation's default
+RESULT_LIMIT = 20  # .slice(0, 20)
+# Distances are filtered after rounding to 0.1 km, so candidates reach 0.05 km further.
+ROUNDING_SLACK_KM = 0.05
+CHUNK_CEPS = 512
+_CELL_SPAN = 1 << 21
+
+BASE_PRICES = {"A": 200, "AB": 180, "B": 150, "C": 120, "D": 100, "ND": 80}
+REACH = {"A": 2000, "AB": 1800, "B": 1500, "C": 1200, "D": 1000, "ND": 800}
+
+Geocoder = Callable[[list[str]], dict[str, tuple[float, float]]]
+
+
+# --------------------------------------------------------------------------
+# Ports of cep-batch.ts / search-service.ts helpers
+
+
+def normalize_cep(raw: str) -> str | None:
+    digits = re.sub(r"\D", "", str(raw or ""))
+    if len(digits) != 8:
+        return None
+    return f"{digits[:5]}-{digits[5:]}"
+
+
+def parse_cep_text(content: str) -> tuple[list[str], list[str]]:
+    """``parseCepText``: CEPs in first-seen order, and per-item errors."""
+    matches = re.findall(r"\b\d{5}-?\d{3}\b", str(content or ""))
+    ceps, errors = [], []
+    if not matches:
+        errors.append("Nenhum padrão de CEP (XXXXX-XXX ou XXXXXXXX) encontrado")
+    for index, match in enumerate(matches):
+        cep = normalize_cep(match)
+        if cep:
+            ceps.append(cep)
+        else:
+            errors.append(f"Item {index + 1} inválido: {match}")
+    return list(dict.fromkeys(ceps)), errors
+
+
+def _parse_int(value: str) -> float:
+    match = re.match(r"\s*([+-]?\d+)", str(value))
+    return int(match.group(1)) if match else math.nan
+
+
+def calculate_price(class_type: str, duration_weeks: str) -> float:
+    base = BASE_PRICES.get(class_type) or BASE_PRICES["ND"]
+    weeks = _parse_int(duration_weeks)
+    discount = 0.15 if weeks >= 12 else 0.10 if weeks >= 8 else 0.05 if weeks >= 4 else 0
+    return base * (1 - discount)
+
+
+def calculate_reach(class_type: str) -> int:
+    return REACH.get(class_type) or REACH["ND"]
+
+
+def map_screen(row: dict, distance: float, duration_weeks: str) -> dict:
+    """A ``ScreenSearchResult`` as ``searchScreensNearLocation`` maps it."""
+    klass = row.get("class") or "ND"
+    real = next((row[k] for k in ("audience_monthly", "audiencia_pacientes", "audiencia_local")
+                 if row.get(k) is not None), None)
+    return {
+        "id": str(row["id"]),
+        "code": row.get("code") or "Código não informado",
+        "name": row.get("name") or row.get("display_name") or "Nome não informado",
+        "display_name": row.get("display_name") or "Nome não informado",
+        "city": row.get("city") or "Cidade não informada",
+        "state": row.get("state") or "Estado não informado",
+        "lat": float(row["lat"]),
+        "lng": float(row["lng"]),
+        "active": bool(row.get("active")),
+        "class": klass,
+        "price": calculate_price(klass, duration_weeks),
+        "audience": float(real) if real is not None and float(real) > 0 else calculate_reach(klass),
+        "distance": distance,
+        "address_raw": row.get("address_raw") or "Endereço não informado",
+    }
+
+
+def _array_index(key: str) -> bool:
+    return re.fullmatch(r"0|[1-9]\d*", key) is not None and int(key) < 2**32 - 1
+
+
+def unique_by_id(screens: Iterable[dict]) -> list[dict]:
+    """``Object.values`` of the ``uniqueById`` record built in ``cep-batch.ts``."""
+    by_id: dict[str, dict] = {}
+    for screen in screens:
+        by_id[screen["id"]] = screen
+    numeric = sorted((k for k in by_id if _array_index(k)), key=int)
+    return [by_id[k] for k in numeric] + [v for k, v in by_id.items() if not _array_index(k)]
+
+
+def group_venues(screens: list[dict]) -> list[dict]:
+    venues: dict[str, dict] = {}
+    for screen in screens:
+        name = screen["display_name"] or screen["name"]
+        key = f"{name}-{screen['city']}-{screen['state']}"
+        venue = venues.setdefault(key, {"id": key, "name": name, "city": screen["city"], "state": screen["state"],
+                                        "screens": [], "screenCount": 0})
+        venue["screens"].append(screen)
+        venue["screenCount"] += 1
+    return list(venues.values())
+
+
+def js_round_1(distance_km):
+    """``Math.round(d * 10) / 10`` for scalars and arrays."""
+    return np.floor(distance_km * 10 + 0.5) / 10
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """``calculateDistance``, term for term, broadcasting over arrays."""
+    d_lat = (lat2 - lat1) * math.pi / 180
+    d_lng = (lng2 - lng1) * math.pi / 180
+    a = (np.sin(d_lat / 2) * np.sin(d_lat / 2)
+         + np.cos(lat1 * math.pi / 180) * np.cos(lat2 * math.pi / 180) * np.sin(d_lng / 2) * np.sin(d_lng / 2))
+    return EARTH_RADIUS_KM * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+
+# --------------------------------------------------------------------------
+# Geocoding
+
+
+def region_geocoder(seed: int = 1) -> Geocoder:
+    """Each CEP near the city of its postal region, the same point every time."""
+    return lambda ceps: {cep: cep_point(cep, seed) for cep in ceps}
+
+
+def csv_geocoder(path: Path) -> Geocoder:
+    """``cep,lat,lng`` lines (a header line is skipped)."""
+    points = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        parts = [p.strip() for p in line.split(",")]
+        cep = normalize_cep(parts[0]) if parts else None
+        if cep and len(parts) >= 3:
+            points[cep] = (float(parts[1]), float(parts[2]))
+    return lambda ceps: {c: points[c] for c in ceps if c in points}
+
+
+# --------------------------------------------------------------------------
+# Engine
+
+
+class ScreenIndex:
+    """Active screens with coordinates, as NumPy arrays plus a grid index."""
+
+    def __init__(self, rows: Iterable[dict], cell_km: float = DEFAULT_RADIUS_KM, index: str = "grid") -> None:
+        # searchScreensNearLocation's select: active, lat and lng not null.
+        self.rows = [r for r in rows if r.get("active") and r.get("lat") is not None and r.get("lng") is not None]
+        self.lat = np.array([float(r["lat"]) for r in self.rows], dtype=np.float64)
+        self.lng = np.array([float(r["lng"]) for r in self.rows], dtype=np.float64)
+        if index == "balltree" and BallTree is None:
+            raise RuntimeError("--index balltree needs scikit-learn")
+        self.index = index
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        if index == "balltree":
+            self.tree = BallTree(np.radians(np.column_stack([self.lat, self.lng])), metric="haversine")
+        else:
+            keys = self._keys(np.floor(self.lat / self.cell_deg), np.floor(self.lng / self.cell_deg))
+            self.order = np.argsort(keys, kind="stable")
+            self.cells, self.starts, self.counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @staticmethod
+    def _keys(cell_lat, cell_lng):
+        return (cell_lat.astype(np.int64) + _CELL_SPAN // 2) * _CELL_SPAN + cell_lng.astype(np.int64) + _CELL_SPAN // 2
+
+    def candidates(self, lat, lng, radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+        """``(query, screen)`` index pairs that may be within ``radius_km``."""
+        reach_km = radius_km + ROUNDING_SLACK_KM
+        if self.index == "balltree":
+            found = self.tree.query_radius(np.radians(np.column_stack([lat, lng])), r=reach_km / EARTH_RADIUS_KM)
+            sizes = np.array([len(f) for f in found], dtype=np.int64)
+            screens = np.concatenate(found).astype(np.int64) if len(found) else np.empty(0, np.int64)
+            return np.repeat(np.arange(len(lat)), sizes), screens
+        # Longitude degrees shrink towards the poles; size the window for the worst latitude.
+        worst = min(90.0, float(np.abs(lat).max()) + reach_km / KM_PER_DEGREE)
+        k_lat = math.ceil(reach_km / KM_PER_DEGREE / self.cell_deg)
+        k_lng = math.ceil(reach_km / (KM_PER_DEGREE * max(math.cos(math.radians(worst)), 0.01)) / self.cell_deg)
+        d_lat, d_lng = np.meshgrid(np.arange(-k_lat, k_lat + 1), np.arange(-k_lng, k_lng + 1), indexing="ij")
+        keys = self._keys(np.floor(lat / self.cell_deg)[:, None] + d_lat.ravel(),
+                          np.floor(lng / self.cell_deg)[:, None] + d_lng.ravel()).ravel()
+        position = np.searchsorted(self.cells, keys)
+        position[position == len(self.cells)] = 0
+        hit = self.cells[position] == keys
+        queries = np.repeat(np.arange(len(lat)), d_lat.size)[hit]
+        starts, counts = self.starts[position[hit]], self.counts[position[hit]]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(queries, counts), self.order[np.repeat(starts, counts) + offsets]
+
+    def nearest(self, lat, lng, radius_km: float = DEFAULT_RADIUS_KM,
+                limit: int = RESULT_LIMIT) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per query, the ``limit`` nearest screens within ``radius_km``.
+
+        Returns flat ``(query, screen, distance)`` arrays ordered by query,
+        then rounded distance, then screen order.
+        """
+        lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+        out_q, out_s, out_d = [], [], []
+        for start in range(0, len(lat), CHUNK_CEPS):
+            q_lat, q_lng = lat[start:start + CHUNK_CEPS], lng[start:start + CHUNK_CEPS]
+            if not len(self) or not len(q_lat):
+                continue
+            queries, screens = self.candidates(q_lat, q_lng, radius_km)
+            distance = js_round_1(haversine_km(q_lat[queries], q_lng[queries], self.lat[screens], self.lng[screens]))
+            inside = distance <= radius_km
+            queries, screens, distance = queries[inside], screens[inside], distance[inside]
+            order = np.lexsort((screens, distance, queries))
+            queries, screens, distance = queries[order], screens[order], distance[order]
+            rank = np.arange(len(queries)) - np.searchsorted(queries, queries)
+            keep = rank < limit
+            out_q.append(queries[keep] + start)
+            out_s.append(screens[keep])
+            out_d.append(distance[keep])
+        if not out_q:
+            empty = np.empty(0, np.int64)
+            return empty, empty, np.empty(0)
+        return np.concatenate(out_q), np.concatenate(out_s), np.concatenate(out_d)
+
+    def batch(self, ceps: list[str], geocoder: Geocoder, radius_km: float = DEFAULT_RADIUS_KM,
+              duration_weeks: str = "2") -> dict:
+        """What ``batchFindScreensByCEPs`` returns, plus the CEPs that did not geocode."""
+        points = geocoder(ceps)
+        located = [c for c in ceps if c in points]
+        lat = np.array([points[c][0] for c in located], dtype=np.float64)
+        lng = np.array([points[c][1] for c in located], dtype=np.float64)
+        _, screens, distance = self.nearest(lat, lng, radius_km)
+        # uniqueById keeps the last CEP's copy of each screen; Object.values orders the keys.
+        last: dict[int, float] = {}
+        for screen, d in zip(screens.tolist(), distance.tolist()):
+            last.pop(screen, None)
+            last[screen] = d
+        first_seen = list(dict.fromkeys(screens.tolist()))
+        results = {s: map_screen(self.rows[s], last[s], duration_weeks) for s in first_seen}
+        unique = unique_by_id(results[s] for s in first_seen)
+        return {"screens": unique, "venues": group_venues(unique),
+                "missing": [c for c in ceps if c not in points]}
+
+
+def reference_batch(rows: list[dict], ceps: list[str], geocoder: Geocoder, radius_km: float = DEFAULT_RADIUS_KM,
+                    duration_weeks: str = "2") -> dict:
+    """The per-CEP loop of ``cep-batch.ts`` and ``searchScreensNearLocation``."""
+    points = geocoder(ceps)
+    active = [r for r in rows if r.get("active") and r.get("lat") is not None and r.get("lng") is not None]
+    found = []
+    for cep in ceps:
+        if cep not in points:
+            continue
+        lat, lng = points[cep]
+        mapped = [map_screen(r, float(js_round_1(haversine_km(lat, lng, float(r["lat"]), float(r["lng"])))),
+                             duration_weeks) for r in active]
+        nearby = sorted((s for s in mapped if s["distance"] <= radius_km), key=lambda s: s["distance"])
+        found.extend(nearby[:RESULT_LIMIT])
+    unique = unique_by_id(found)
+    return {"screens": unique, "venues": group_venues(unique), "missing": [c for c in ceps if c not in points]}
+
+
+# --------------------------------------------------------------------------
+# Service and CLI
+
+
+def http_server(index: ScreenIndex, geocoder: Geocoder, host: str = "127.0.0.1", port: int = 0) -> HttpServer:
+    """``POST /batch`` with ``{"ceps": [...]}`` or ``{"text": "..."}``, ``radiusKm``, ``durationWeeks``."""
+    server = HttpServer(host, port)
+
+    async def batch(request: Request) -> Response:
+        body = request.json() or {}
+        errors: list[str] = []
+        if "text" in body:
+            ceps, errors = parse_cep_text(body["text"])
+        else:
+            ceps = list(dict.fromkeys(c for c in map(normalize_cep, body.get("ceps") or []) if c))
+        t0 = time.perf_counter()
+        result = index.batch(ceps, geocoder, float(body.get("radiusKm") or DEFAULT_RADIUS_KM),
+                             str(body.get("durationWeeks") or "2"))
+        return Response(200, {**result, "errors": errors,
+                              "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2)})
+
+    async def health(request: Request) -> Response:
+        return Response(200, {"screens": len(index), "index": index.index})
+
+    server.route("POST", r"/batch", batch)
+    server.route("GET", r"/health", health)
+    return server
+
+
+def synthetic_ceps(count: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    return list(dict.fromkeys(f"{n // 1000:05d}-{n % 1000:03d}" for n in (rng.randint(1_000_000, 99_999_999)
+                                                                           for _ in range(count))))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.proximity", description=__doc__.splitlines()[0])
+    parser.add_argument("--screens", type=int, default=20000, help="synthetic screens")
+    parser.add_argument("--screens-json", type=Path, help="screen rows (JSON list) instead of synthetic ones")
+    parser.add_argument("--ceps", type=int, default=5000, help="synthetic CEPs")
+    parser.add_argument("--ceps-file", type=Path, help="an upload in the wizard's text format")
+    geocoding = parser.add_mutually_exclusive_group()
+    geocoding.add_argument("--geocodes", type=Path, help="cep,lat,lng CSV instead of the region geocoder")
+    geocoding.add_argument("--geocache", metavar="URL", help="resolve CEPs through a harness.geocache service")
+    parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS_KM, help="km")
+    parser.add_argument("--duration-weeks", default="2")
+    parser.add_argument("--index", choices=["grid", "balltree"], default="grid")
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="compare with the per-CEP reference on the first N CEPs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--serve", type=int, metavar="PORT", help="answer POST /batch on PORT")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.screens_json:
+        rows = json.loads(args.screens_json.read_text(encoding="utf-8"))
+    else:
+        rows = list(db_screen_records(args.screens, max(1, args.screens // 2), args.seed))
+    if args.geocache:
+        geocoder = service_geocoder(args.geocache)
+    else:
+        geocoder = csv_geocoder(args.geocodes) if args.geocodes else region_geocoder(args.seed)
+    t0 = time.perf_counter()
+    index = ScreenIndex(rows, max(args.radius, 1.0), args.index)
+    build_s = time.perf_counter() - t0
+
+    if args.serve is not None:
+        async def serve() -> None:
+            async with http_server(index, geocoder, "0.0.0.0", args.serve) as server:
+                print(f"proximity service on {server.url} ({len(index)} screens, {args.index})", flush=True)
+                await asyncio.Event().wait()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    errors: list[str] = []
+    if args.ceps_file:
+        ceps, errors = parse_cep_text(args.ceps_file.read_text(encoding="utf-8"))
+    else:
+        ceps = synthetic_ceps(args.ceps, args.seed)
+    t0 = time.perf_counter()
+    result = index.batch(ceps, geocoder, args.radius, args.duration_weeks)
+    batch_s = time.perf_counter() - t0
+    report = {
+        "screens_indexed": len(index), "ceps": len(ceps), "radius_km": args.radius, "index": args.index,
+        "build_ms": round(build_s * 1000, 2), "batch_ms": round(batch_s * 1000, 2),
+        "screens_found": len(result["screens"]), "venues": len(result["venues"]),
+        "missing": len(result["missing"]), "errors": errors,
+    }
+    print(f"{len(ceps)} CEPs x {len(index)} screens ({args.index}): {report['screens_found']} screens in "
+          f"{report['venues']} venues, {report['batch_ms']:.0f} ms (+{report['build_ms']:.0f} ms index build)")
+    if args.check:
+        sample = ceps[: args.check]
+        t0 = time.perf_counter()
+        expected = reference_batch(rows, sample, geocoder, args.radius, args.duration_weeks)
+        reference_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = index.batch(sample, geocoder, args.radius, args.duration_weeks)
+        vectorized_s = time.perf_counter() - t0
+        report["check"] = {
+            "ceps": len(sample), "match": got == expected,
+            "reference_ms": round(reference_s * 1000, 2), "vectorized_ms": round(vectorized_s * 1000, 2),
+        }
+        print(f"check on {len(sample)} CEPs: {'match' if got == expected else 'MISMATCH'}, reference "
+              f"{reference_s * 1000:.0f} ms vs {vectorized_s * 1000:.1f} ms "
+              f"({reference_s / vectorized_s if vectorized_s else 0:.0f}x)")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({**report, "result": result}, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0 if not args.check or report["check"]["match"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,628 @@
+"""Load test for the ``public-proposal-map`` edge function, with query tracing.
+
+``supabase/functions/public-proposal-map/index.ts`` answers a shared link
+with three PostgREST round trips, one after the other: the proposal by
+``public_map_token``, its ``agencia_projetos`` row for the title, and the
+``proposal_screens`` rows with ``screens`` embedded.  Links go out to
+clients, so traffic comes in bursts on a few tokens.  This module measures
+latency against proposal size (screens per proposal) and concurrency, and
+records every backend query each request makes.
+
+:class:`RestStandIn` serves ``proposals``, ``agencia_projetos``,
+``proposal_screens`` and ``screens`` from synthetic rows, with PostgREST
+``select`` embedding, a latency model and a connection pool of
+``--db-pool`` (PostgREST's ``db-pool``), so queries queue under load the
+way they do against the real database.  Each query is attributed to the
+request that made it, and :func:`analyze` flags:
+
+* ``n+1``: at least ``N_PLUS_ONE_MIN`` queries on one table with the same
+  filter columns in one request - one ``in.(...)`` filter or an embed;
+* ``chain``: a query filtered on a value another query of the request
+  returned - a round trip that an embed in the first select removes;
+* ``serial``: a query that waited for one whose result it does not use -
+  the two can run concurrently.
+
+Strategies, all on the same request stream:
+
+* ``current``: ``index.ts`` as it is;
+* ``parallel``: project and screens fetched concurrently after the proposal;
+* ``embedded``: one select with ``agencia_projetos`` and
+  ``proposal_screens(screens(...))`` embedded.  PostgREST can only embed the
+  project once ``proposals.projeto_id`` references ``agencia_projetos(id)``,
+  which no migration declares yet;
+* ``embedded-cached``: the same plus a per-isolate TTL cache keyed by token.
+
+``--target`` drives a running function instead, e.g. ``supabase functions
+serve`` with ``SUPABASE_URL`` pointed at ``--rest-port``, where this
+process serves the stand-in; queries are attributed by first sending a few
+requests one at a time::
+
+    python -m harness.public_map_load --sizes 10 100 1000 5000 --concurrency 1 8 32 128
+    python -m harness.public_map_load --serve-rest 54400
+    python -m harness.public_map_load --target http://localhost:54321/functions/v1/public-proposal-map --rest-port 54400
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Union
+
+from .config import TMP_DIR
+from .heatmap_load import LatencyModel, TtlMapCache, drive
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .stats import latency_summary
+from .synthetic import jitter, pick_city
+
+RESULTS_PATH = TMP_DIR / "public_map_load_results.json"
+N_PLUS_ONE_MIN = 3
+TRACE_REQUESTS = 5
+
+SCREENS_SELECT = "screens ( id, code, name, display_name, lat, lng )"
+EMBEDDED_SELECT = (
+    "id, customer_name, status, projeto_id, agencia_projetos ( nome_projeto ), "
+    f"proposal_screens ( {SCREENS_SELECT} )"
+)
+
+# (parent, embedded) -> (cardinality, parent column, embedded column)
+RELATIONS = {
+    ("proposal_screens", "screens"): ("one", "screen_id", "id"),
+    ("proposals", "proposal_screens"): ("many", "id", "proposal_id"),
+    # Needs a foreign key on proposals.projeto_id; see the module docstring.
+    ("proposals", "agencia_projetos"): ("one", "projeto_id", "id"),
+}
+
+
+# --------------------------------------------------------------------------
+# PostgREST stand-in
+
+
+SelectItem = Union[str, tuple[str, list]]
+
+
+def parse_select(select: str) -> list[SelectItem]:
+    """PostgREST ``select`` as columns and ``(table, items)`` embeds."""
+    tokens = re.findall(r"[()]|[^\s(),]+", select)
+    position = 0
+
+    def items() -> list[SelectItem]:
+        nonlocal position
+        out: list[SelectItem] = []
+        while position < len(tokens) and tokens[position] != ")":
+            name = tokens[position].split(":")[-1]
+            position += 1
+            if position < len(tokens) and tokens[position] == "(":
+                position += 1
+                out.append((name, items()))
+                position += 1  # ")"
+            else:
+                out.append(name)
+        return out
+
+    return items()
+
+
+@dataclass
+class Query:
+    table: str
+    select: str
+    filters: dict[str, str]
+    rows: int = 0
+    start_s: float = 0.0
+    end_s: float = 0.0
+    # Top-level scalar values returned, to see which later queries used them.
+    produced: set[str] = field(default_factory=set)
+
+
+_trace: contextvars.ContextVar[list[Query] | None] = contextvars.ContextVar("public_map_trace", default=None)
+
+
+@dataclass
+class PublicMapData:
+    """Screens, projects and proposals of fixed sizes, each with a map token."""
+
+    screens: dict[int, dict]
+    projects: dict[str, dict]
+    proposals: list[dict]
+    proposal_screens: list[dict]
+
+    @classmethod
+    def generate(cls, sizes: list[int], per_size: int = 5, screen_count: int = 8000,
+                 seed: int = 1) -> "PublicMapData":
+        rng = random.Random(seed)
+        screens = {}
+        for i in range(1, screen_count + 1):
+            city, _, lat, lng = pick_city(rng)
+            lat, lng = jitter(rng, lat, lng)
+            screens[i] = {"id": i, "code": f"P{i:05d}", "name": f"Tela {i}",
+                          "display_name": f"Clínica {city} {i}", "lat": lat, "lng": lng}
+        projects = {}
+        for i in range(max(1, len(sizes) * per_size // 2)):
+            project_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            projects[project_id] = {"id": project_id, "nome_projeto": f"Projeto {i + 1}"}
+        proposals, links = [], []
+        for size in sizes:
+            for _ in range(per_size):
+                proposal_id = len(proposals) + 1
+                proposals.append({
+                    "id": proposal_id,
+                    "customer_name": f"Cliente {proposal_id}",
+                    "status": rng.choice(["rascunho", "enviada", "aceita"]),
+                    "projeto_id": rng.choice(list(projects)) if rng.random() < 0.7 else None,
+                    "public_map_token": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "size": size,
+                })
+                for screen_id in rng.sample(range(1, screen_count + 1), k=min(size, screen_count)):
+                    links.append({"id": len(links) + 1, "proposal_id": proposal_id, "screen_id": screen_id})
+        return cls(screens, projects, proposals, links)
+
+    def tables(self) -> dict[str, list[dict]]:
+        return {
+            "screens": list(self.screens.values()),
+            "agencia_projetos": list(self.projects.values()),
+            "proposals": self.proposals,
+            "proposal_screens": self.proposal_screens,
+        }
+
+
+class RestStandIn:
+    """``GET /rest/v1/<table>`` with ``eq`` filters and embedding, traced.
+
+    Every filtered column is indexed in the real schema (primary keys,
+    ``idx_proposals_public_map_token``, ``idx_proposal_screens_proposal``),
+    so a query costs one round trip plus the rows it returns.
+    """
+
+    def __init__(self, data: PublicMapData, latency: LatencyModel | None = None, pool_size: int = 10,
+                 seed: int = 1) -> None:
+        self.tables = data.tables()
+        self.latency = latency or LatencyModel()
+        self.rng = random.Random(seed)
+        self.pool = asyncio.Semaphore(pool_size)
+        self.queries = 0
+        # Queries outside a traced request (HTTP mode), in arrival order.
+        self.untraced: list[Query] = []
+        self._indexes: dict[tuple[str, str], dict[str, list[dict]]] = {}
+
+    def _lookup(self, table: str, column: str, value) -> list[dict]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = self._indexes[(table, column)] = {}
+            for row in self.tables[table]:
+                index.setdefault(str(row.get(column)), []).append(row)
+        return index.get(str(value), [])
+
+    def _project(self, table: str, row: dict, items: list[SelectItem]) -> tuple[dict, int]:
+        out, touched = {}, 0
+        for item in items:
+            if isinstance(item, str):
+                if item == "*":
+                    out.update({k: v for k, v in row.items() if k != "size"})
+                else:
+                    out[item] = row.get(item)
+                continue
+            name, sub = item
+            cardinality, local, remote = RELATIONS[(table, name)]
+            matches = self._lookup(name, remote, row.get(local)) if row.get(local) is not None else []
+            nested = []
+            for match in matches:
+                projected, count = self._project(name, match, sub)
+                nested.append(projected)
+                touched += count
+            out[name] = nested if cardinality == "many" else (nested[0] if nested else None)
+        return out, touched + 1
+
+    async def select(self, table: str, select: str, filters: dict[str, object]) -> list[dict]:
+        if table not in self.tables:
+            raise KeyError(table)
+        query = Query(table, " ".join(select.split()), {k: str(v) for k, v in filters.items()},
+                      start_s=time.perf_counter())
+        rows = self.tables[table]
+        if filters:
+            column, value = next(iter(filters.items()))
+            rows = self._lookup(table, column, value)
+            rows = [r for r in rows if all(str(r.get(c)) == str(v) for c, v in filters.items())]
+        items = parse_select(select)
+        result, touched = [], 0
+        for row in rows:
+            projected, count = self._project(table, row, items)
+            result.append(projected)
+            touched += count
+        async with self.pool:
+            self.queries += 1
+            await asyncio.sleep(self.latency.rpc_s(touched, self.rng))
+        query.rows = touched
+        query.end_s = time.perf_counter()
+        query.produced = {str(v) for r in result for v in r.values() if isinstance(v, (str, int, float))}
+        trace = _trace.get()
+        (trace if trace is not None else self.untraced).append(query)
+        return result
+
+    def http_server(self, host: str = "127.0.0.1", port: int = 0) -> HttpServer:
+        """The tables over PostgREST's HTTP interface, for ``supabase functions serve``."""
+        server = HttpServer(host, port)
+
+        async def get(request: Request) -> Response:
+            table = request.match.group(1)
+            if table not in self.tables:
+                return Response(404, {"message": f"relation public.{table} does not exist"})
+            filters = {}
+            for name, values in request.query.items():
+                if name in ("select", "limit", "order", "offset"):
+                    continue
+                if not values[0].startswith("eq."):
+                    return Response(400, {"message": f"unsupported filter {name}={values[0]}"})
+                filters[name] = values[0][3:]
+            rows = await self.select(table, request.arg("select", "*"), filters)
+            if "vnd.pgrst.object" in request.headers.get("accept", ""):
+                if len(rows) != 1:
+                    return Response(406, {"message": "JSON object requested, multiple (or no) rows returned"})
+                return Response(200, rows[0])
+            return Response(200, rows, {"content-range": f"0-{max(len(rows) - 1, 0)}/*"})
+
+        server.route("GET", r"/rest/v1/(\w+)", get)
+        return server
+
+
+# --------------------------------------------------------------------------
+# Edge function stand-in
+
+
+def _first(rows: list[dict]) -> dict | None:
+    return rows[0] if rows else None
+
+
+def _screens(rows: list[dict]) -> list[dict]:
+    """The loop at the end of ``index.ts``: embedded screens with a numeric id."""
+    out = []
+    for row in rows:
+        screen = row.get("screens")
+        if isinstance(screen, dict) and isinstance(screen.get("id"), (int, float)):
+            out.append({k: screen.get(k) for k in ("id", "code", "name", "display_name", "lat", "lng")})
+    return out
+
+
+def _title(proposal: dict, project: str | None) -> str:
+    return ((project or "").strip() or str(proposal.get("customer_name") or "").strip()
+            or f"Proposta #{proposal['id']}")
+
+
+class PublicMapFunction:
+    """One isolate of ``public-proposal-map`` with a query strategy."""
+
+    def __init__(self, rest: RestStandIn, strategy: str, ttl_s: float = 60.0) -> None:
+        self.rest = rest
+        self.strategy = strategy
+        self.cache = TtlMapCache(ttl_s) if strategy == "embedded-cached" else None
+        self.hits = 0
+
+    async def handle(self, token: str) -> tuple[int, dict]:
+        if self.cache is not None:
+            cached = self.cache.get(token, time.monotonic())
+            if cached is not None:
+                self.hits += 1
+                return 200, cached
+        handler = STRATEGIES[self.strategy]
+        status, body = await handler(self.rest, token)
+        if self.cache is not None and status == 200:
+            self.cache.set(token, body, time.monotonic())
+        return status, body
+
+
+async def current(rest: RestStandIn, token: str) -> tuple[int, dict]:
+    proposal = _first(await rest.select("proposals", "id, customer_name, status, projeto_id",
+                                        {"public_map_token": token}))
+    if proposal is None:
+        return 404, {"error": "Not found"}
+    project = None
+    if proposal["projeto_id"]:
+        row = _first(await rest.select("agencia_projetos", "nome_projeto", {"id": proposal["projeto_id"]}))
+        project = row and row["nome_projeto"]
+    rows = await rest.select("proposal_screens", SCREENS_SELECT, {"proposal_id": proposal["id"]})
+    return 200, {"displayTitle": _title(proposal, project), "screens": _screens(rows)}
+
+
+async def parallel(rest: RestStandIn, token: str) -> tuple[int, dict]:
+    proposal = _first(await rest.select("proposals", "id, customer_name, status, projeto_id",
+                                        {"public_map_token": token}))
+    if proposal is None:
+        return 404, {"error": "Not found"}
+
+    async def project() -> str | None:
+        if not proposal["projeto_id"]:
+            return None
+        row = _first(await rest.select("agencia_projetos", "nome_projeto", {"id": proposal["projeto_id"]}))
+        return row and row["nome_projeto"]
+
+    name, rows = await asyncio.gather(
+        project(), rest.select("proposal_screens", SCREENS_SELECT, {"proposal_id": proposal["id"]}))
+    return 200, {"displayTitle": _title(proposal, name), "screens": _screens(rows)}
+
+
+async def embedded(rest: RestStandIn, token: str) -> tuple[int, dict]:
+    proposal = _first(await rest.select("proposals", EMBEDDED_SELECT, {"public_map_token": token}))
+    if proposal is None:
+        return 404, {"error": "Not found"}
+    project = (proposal.get("agencia_projetos") or {}).get("nome_projeto")
+    return 200, {"displayTitle": _title(proposal, project), "screens": _screens(proposal["proposal_screens"])}
+
+
+STRATEGIES: dict[str, Callable[[RestStandIn, str], Awaitable[tuple[int, dict]]]] = {
+    "current": current,
+    "parallel": parallel,
+    "embedded": embedded,
+    "embedded-cached": embedded,
+}
+
+
+# --------------------------------------------------------------------------
+# Query analysis
+
+
+def analyze(queries: list[Query]) -> list[tuple[str, str]]:
+    """``(kind, detail)`` findings for the queries of one request."""
+    findings = []
+    groups: dict[tuple, int] = Counter((q.table, tuple(sorted(q.filters)), q.select) for q in queries)
+    for (table, columns, _), count in groups.items():
+        if count >= N_PLUS_ONE_MIN:
+            findings.append(("n+1", f"{count} queries on {table} by {', '.join(columns) or '-'}; "
+                                    f"use one in.(...) filter or embed {table}"))
+    ordered = sorted(queries, key=lambda q: q.start_s)
+    for index, query in enumerate(ordered):
+        earlier = ordered[:index]
+        sources = [e for e in earlier if set(query.filters.values()) & e.produced]
+        for source in sources:
+            column = next(c for c, v in query.filters.items() if v in source.produced)
+            findings.append(("chain", f"{source.table} -> {query.table}.{column}: "
+                                      f"embed {query.table} in the {source.table} select"))
+        waited = [e for e in earlier if e.end_s <= query.start_s]
+        if waited:
+            previous = max(waited, key=lambda e: e.end_s)
+            if previous not in sources:
+                findings.append(("serial", f"{query.table} waits for {previous.table} without using its result; "
+                                           f"run them concurrently"))
+    return list(dict.fromkeys(findings))
+
+
+@dataclass
+class QueryProfile:
+    """Round trips and findings over a set of traced requests."""
+
+    requests: int = 0
+    round_trips: list[int] = field(default_factory=list)
+    critical_path: list[int] = field(default_factory=list)
+    findings: Counter = field(default_factory=Counter)
+
+    def add(self, queries: list[Query]) -> None:
+        self.requests += 1
+        self.round_trips.append(len(queries))
+        # Longest run of queries that each started after the previous ended.
+        depth, last_end = 0, float("-inf")
+        for query in sorted(queries, key=lambda q: q.start_s):
+            if query.start_s >= last_end:
+                depth += 1
+                last_end = query.end_s
+            else:
+                last_end = max(last_end, query.end_s)
+        self.critical_path.append(depth)
+        self.findings.update(analyze(queries))
+
+    def report(self) -> dict:
+        n = len(self.round_trips) or 1
+        return {
+            "traced_requests": self.requests,
+            "queries_per_request": round(sum(self.round_trips) / n, 2),
+            "max_queries_per_request": max(self.round_trips, default=0),
+            "sequential_round_trips": round(sum(self.critical_path) / n, 2),
+            "findings": [{"kind": kind, "detail": detail, "requests": count}
+                         for (kind, detail), count in self.findings.most_common()],
+        }
+
+
+# --------------------------------------------------------------------------
+# Workload
+
+
+def tokens_for(data: PublicMapData, requests: int, seed: int, hot: float = 0.8) -> list[tuple[str, int]]:
+    """``(token, size)`` per request; ``hot`` of the traffic goes to one link per size.
+
+    A shared link is opened by everyone on the client's side at once, so
+    most requests of a burst repeat a handful of tokens.
+    """
+    rng = random.Random(seed)
+    by_size: dict[int, list[dict]] = {}
+    for proposal in data.proposals:
+        by_size.setdefault(proposal["size"], []).append(proposal)
+    sizes = sorted(by_size)
+    out = []
+    for i in range(requests):
+        group = by_size[sizes[i % len(sizes)]]
+        proposal = group[0] if rng.random() < hot else rng.choice(group)
+        out.append((proposal["public_map_token"], proposal["size"]))
+    rng.shuffle(out)
+    return out
+
+
+@dataclass
+class LevelResult:
+    strategy: str
+    concurrency: int | None
+    elapsed_s: float = 0.0
+    errors: int = 0
+    by_size: dict[int, list[float]] = field(default_factory=dict)
+    hits: int = 0
+    queries: int = 0
+
+    def report(self) -> dict:
+        latencies = [v for values in self.by_size.values() for v in values]
+        total = len(latencies) + self.errors
+        return {
+            "strategy": self.strategy,
+            "concurrency": self.concurrency,
+            **latency_summary(latencies, self.elapsed_s),
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "queries": self.queries,
+            "by_size": {str(size): latency_summary(values) for size, values in sorted(self.by_size.items())},
+        }
+
+
+async def run_level(send: Callable[[str], Awaitable[int]], requests: list[tuple[str, int]], result: LevelResult,
+                    rate: float | None, seed: int) -> None:
+    sizes = dict(requests)
+
+    async def timed(token: str) -> None:
+        t0 = time.perf_counter()
+        status = await send(token)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        result.by_size.setdefault(sizes[token], []).append(time.perf_counter() - t0)
+
+    _, result.errors, result.elapsed_s = await drive(timed, [t for t, _ in requests], rate,
+                                                     result.concurrency or 1, seed)
+
+
+async def run_inprocess(data: PublicMapData, requests: list[tuple[str, int]], args) -> dict:
+    latency = LatencyModel(args.rtt_ms, args.ms_per_1k_rows)
+    levels, profiles = [], {}
+    for name in args.strategies:
+        profile = profiles[name] = QueryProfile()
+        for concurrency in ([None] if args.rate else args.concurrency):
+            rest = RestStandIn(data, latency, args.db_pool, args.seed)
+            isolates = [PublicMapFunction(rest, name, args.ttl) for _ in range(args.isolates)]
+            router = random.Random(args.seed)
+
+            async def send(token: str) -> int:
+                queries: list[Query] = []
+                _trace.set(queries)
+                status, _ = await router.choice(isolates).handle(token)
+                profile.add(queries)
+                return status
+
+            result = LevelResult(name, concurrency)
+            # Each request runs in its own task, so the trace stays per request.
+            await run_level(lambda t: asyncio.ensure_future(send(t)), requests, result, args.rate, args.seed)
+            result.hits = sum(i.hits for i in isolates)
+            result.queries = rest.queries
+            levels.append(result.report())
+            print(_format(levels[-1]), flush=True)
+    return {"levels": levels, "queries": {name: p.report() for name, p in profiles.items()}}
+
+
+async def run_remote(data: PublicMapData, requests: list[tuple[str, int]], args) -> dict:
+    rest = RestStandIn(data, LatencyModel(args.rtt_ms, args.ms_per_1k_rows), args.db_pool, args.seed)
+    headers = {"authorization": f"Bearer {args.token}", "apikey": args.token} if args.token else {}
+    async with rest.http_server("0.0.0.0", args.rest_port) as server:
+        print(f"PostgREST stand-in on {server.url}", flush=True)
+        client = HttpClient(args.target, max_connections=max(args.concurrency), headers=headers)
+
+        async def send(token: str) -> int:
+            response = await client.request("GET", f"?token={token}")
+            return response.status
+
+        try:
+            # One request at a time, so every query the stand-in sees is that request's.
+            profile = QueryProfile()
+            for token, _ in requests[:TRACE_REQUESTS]:
+                rest.untraced.clear()
+                await send(token)
+                profile.add(list(rest.untraced))
+            levels = []
+            for concurrency in ([None] if args.rate else args.concurrency):
+                result = LevelResult("remote", concurrency)
+                before = rest.queries
+                await run_level(send, requests, result, args.rate, args.seed)
+                result.queries = rest.queries - before
+                levels.append(result.report())
+                print(_format(levels[-1]), flush=True)
+        finally:
+            await client.close()
+    return {"levels": levels, "queries": {"remote": profile.report()}}
+
+
+def _format(r: dict) -> str:
+    def ms(v):
+        return "-" if v is None else f"{v:8.1f}"
+
+    sizes = "  ".join(f"{size}:{ms(s['p95_ms']).strip()}" for size, s in r["by_size"].items())
+    level = f"c={r['concurrency']}" if r["concurrency"] else "open"
+    return (f"{r['strategy']:<16} {level:<6} {r['count']:>6} req  {r.get('throughput_rps', 0):7.1f} rps"
+            f"  p50 {ms(r['p50_ms'])}  p95 {ms(r['p95_ms'])} ms  queries {r['queries']:>6}"
+            f"  hit {r['hit_ratio'] or 0:5.1%}  p95 by size {sizes}"
+            + (f"  errors {r['errors']}" if r["errors"] else ""))
+
+
+def print_queries(profiles: dict[str, dict]) -> None:
+    for name, profile in profiles.items():
+        print(f"{name}: {profile['queries_per_request']} queries/request "
+              f"({profile['sequential_round_trips']} sequential)")
+        for finding in profile["findings"]:
+            print(f"  [{finding['kind']}] {finding['detail']} ({finding['requests']} requests)")
+
+
+async def serve_rest(data: PublicMapData, args) -> None:
+    rest = RestStandIn(data, LatencyModel(args.rtt_ms, args.ms_per_1k_rows), args.db_pool, args.seed)
+    async with rest.http_server("0.0.0.0", args.serve_rest) as server:
+        print(f"PostgREST stand-in on {server.url} (SUPABASE_URL for `supabase functions serve`)")
+        for size in sorted({p["size"] for p in data.proposals}):
+            token = next(p["public_map_token"] for p in data.proposals if p["size"] == size)
+            print(f"  {size:>6} screens: ?token={token}")
+        sys.stdout.flush()
+        await asyncio.Event().wait()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.public_map_load", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000], help="screens per proposal")
+    parser.add_argument("--per-size", type=int, default=5, help="proposals of each size")
+    parser.add_argument("--screens", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate (req/s) instead of --concurrency")
+    parser.add_argument("--hot", type=float, default=0.8, help="share of requests on one link per size")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--isolates", type=int, default=1, help="function isolates, each with its own cache")
+    parser.add_argument("--ttl", type=float, default=60.0, help="embedded-cached TTL in seconds")
+    parser.add_argument("--db-pool", type=int, default=10, help="concurrent queries the database serves")
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    parser.add_argument("--ms-per-1k-rows", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", help="URL of a running public-proposal-map function")
+    parser.add_argument("--token", default="", help="bearer token for --target")
+    parser.add_argument("--rest-port", type=int, default=54400, help="stand-in port for --target")
+    parser.add_argument("--serve-rest", type=int, metavar="PORT", help="only serve the PostgREST stand-in")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    data = PublicMapData.generate(args.sizes, args.per_size, args.screens, args.seed)
+    if args.serve_rest is not None:
+        try:
+            asyncio.run(serve_rest(data, args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    requests = tokens_for(data, args.requests, args.seed, args.hot)
+    if args.target:
+        results = asyncio.run(run_remote(data, requests, args))
+    else:
+        results = asyncio.run(run_inprocess(data, requests, args))
+    print_queries(results["queries"])
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    args.output.write_text(json.dumps({"config": config, **results}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,860 @@
+"""Load and soak the dashboard's realtime channel against a local stand-in.
+
+``src/hooks/useDashboardRealtime.ts`` joins the ``dashboard-realtime``
+channel for ``postgres_changes`` on five tables plus the ``dashboard_sync``
+broadcast, and TC012 only checks for a label after login.  Nothing in the
+current tree mounts the hook, so a dashboard page opens no socket by
+itself; the sessions here open exactly the channel it would.
+
+:class:`RealtimeStandIn` speaks the Phoenix channel protocol realtime-js
+uses (serializer ``1.0.0`` objects and ``2.0.0`` arrays): joins are
+answered with binding ids, heartbeats acknowledged, and row changes fanned
+out to every matching binding through a bounded queue per connection,
+where a full queue drops the event as an overloaded realtime node would.
+:meth:`RealtimeStandIn.drop_all` closes every socket at once, as a node
+restart does.  Two kinds of sessions connect to it:
+
+* :class:`DashboardClient`, a raw WebSocket client that behaves like
+  ``src/integrations/supabase/client.ts`` configures realtime-js: a 30 s
+  heartbeat and join timeout and reconnects after ``min(tries * 1 s,
+  30 s)``.  On a join timeout it gives up after 3 s the way the hook's
+  ``TIMED_OUT`` branch does, and counts as abandoned;
+* ``--browsers N`` headless dashboard contexts (:mod:`harness.pool`) whose
+  realtime socket is routed to the stand-in.  They subscribe the hook's
+  channel through the app's own ``supabase`` client module, which the Vite
+  dev server serves under ``/src``, and report JS heap and DOM size.
+
+Row changes are injected at ``--rate`` per second, and each record carries
+a sequence number and its send time.  Every ``--sample-every`` seconds a
+window reports fan-out latency, deliveries against what was owed, queue
+drops, reconnects and heartbeat timeouts.  After each ``--drop-every``
+restart the report has the reconnect storm: attempts, peak connects per
+second and time until every session was subscribed again.  Browser heap
+growth is fitted to MB/hour over the whole soak.  The raw clients share
+the stand-in's event loop, so fan-out latency includes their own Python
+cost: compare runs with each other rather than with production numbers::
+
+    python -m harness.realtime_soak --clients 300 --rate 20 --duration 120
+    python -m harness.realtime_soak --clients 500 --duration 3600 --sample-every 60 --drop-every 600
+    python -m harness.realtime_soak --clients 500 --drop-every 60 --reconnect-jitter 5
+    python -m harness.realtime_soak --clients 100 --browsers 50 --offline --duration 3600
+    python -m harness.realtime_soak --serve 54430
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import datetime as dt
+import itertools
+import json
+import math
+import random
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from playwright.async_api import BrowserContext, Error
+
+from . import mocks
+from .auth import AuthCache, auth_dir
+from .config import TMP_DIR, base_url
+from .localhttp import HttpServer, Request, Response, WebSocket, connect_websocket
+from .pool import BrowserPool
+from .stats import latency_summary
+
+RESULTS_PATH = TMP_DIR / "realtime_soak_results.json"
+DEFAULT_PORT = 54430
+REALTIME_PATH = "/realtime/v1/websocket"
+CHANNEL = "dashboard-realtime"
+TOPIC = f"realtime:{CHANNEL}"
+DASHBOARD_TABLES = ("proposals", "agencias", "agencia_projetos", "agencia_deals", "screens")
+# Written by the app but not subscribed to; the stand-in must filter them out.
+OTHER_TABLES = ("venues", "proposal_screens")
+TABLE_WEIGHTS = (30, 5, 5, 10, 20, 15, 15)
+SYNC_EVENT = "dashboard_sync"
+
+# realtime settings from src/integrations/supabase/client.ts
+HEARTBEAT_S = 30.0
+JOIN_TIMEOUT_S = 30.0
+# The hook's setTimeout before unsubscribing a TIMED_OUT channel.
+HOOK_GIVE_UP_S = 3.0
+DEFAULT_QUEUE = 1000
+STORM_TIMEOUT_S = 120.0
+DRAIN_TIMEOUT_S = 5.0
+
+
+def reconnect_after_s(tries: int) -> float:
+    """``reconnectAfterMs`` in client.ts."""
+    return min(tries * 1000, 30000) / 1000
+
+
+def dashboard_bindings() -> list[dict]:
+    return [{"event": "*", "schema": "public", "table": table} for table in DASHBOARD_TABLES]
+
+
+# --------------------------------------------------------------------------
+# Phoenix serializer
+
+
+def _frame(vsn: str, join_ref: str | None, ref: str | None, topic: str, event: str, payload_json: str) -> str:
+    if vsn.startswith("2"):
+        return json.dumps([join_ref, ref, topic, event])[:-1] + "," + payload_json + "]"
+    return (f'{{"join_ref":{json.dumps(join_ref)},"ref":{json.dumps(ref)},"topic":{json.dumps(topic)},'
+            f'"event":{json.dumps(event)},"payload":{payload_json}}}')
+
+
+def encode(vsn: str, join_ref: str | None, ref: str | None, topic: str, event: str, payload: dict) -> str:
+    return _frame(vsn, join_ref, ref, topic, event, json.dumps(payload))
+
+
+def decode(text: str | bytes) -> tuple | None:
+    """``(join_ref, ref, topic, event, payload)``, or None for anything else."""
+    try:
+        message = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(message, list) and len(message) == 5:
+        return tuple(message)
+    if isinstance(message, dict):
+        return (message.get("join_ref"), message.get("ref"), message.get("topic"), message.get("event"),
+                message.get("payload"))
+    return None
+
+
+# --------------------------------------------------------------------------
+# Stand-in
+
+
+class _RouteSocket:
+    """A Playwright ``WebSocketRoute`` behind the :class:`~harness.localhttp.WebSocket` interface."""
+
+    def __init__(self, route) -> None:
+        self.route = route
+        self.closed = False
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        route.on_message(self._inbox.put_nowait)
+        route.on_close(lambda code, reason: self._inbox.put_nowait(None))
+
+    async def recv(self) -> str | None:
+        if self.closed:
+            return None
+        message = await self._inbox.get()
+        if message is None:
+            self.closed = True
+        return message.decode("utf-8", "replace") if isinstance(message, bytes) else message
+
+    async def send(self, text: str) -> None:
+        if self.closed:
+            raise ConnectionResetError("websocket is closed")
+        self.route.send(text)
+
+    async def close(self, code: int = 1000) -> None:
+        if not self.closed:
+            self.closed = True
+            self._inbox.put_nowait(None)
+            try:
+                await self.route.close(code=code)
+            except Error:
+                pass
+
+
+@dataclass
+class _Join:
+    join_ref: str | None
+    bindings: list[tuple[int, dict]]
+
+
+class _Session:
+    def __init__(self, socket, vsn: str, queue_limit: int) -> None:
+        self.socket = socket
+        self.vsn = vsn
+        self.joins: dict[str, _Join] = {}
+        self.queue: asyncio.Queue[str] = asyncio.Queue(queue_limit)
+
+
+def _matches(binding: dict, table: str, event_type: str) -> bool:
+    return (binding.get("schema", "public") in ("public", "*") and binding.get("table", "*") in (table, "*")
+            and binding.get("event", "*") in ("*", event_type))
+
+
+def _column_type(value) -> str:
+    """Postgres type name for ``columns``; realtime-js converts cells by it."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int8"
+    if isinstance(value, float):
+        return "float8"
+    if isinstance(value, (dict, list)):
+        return "jsonb"
+    return "text"
+
+
+class RealtimeStandIn:
+    """Supabase realtime for ``postgres_changes`` and broadcast, in memory.
+
+    ``expected`` counts deliveries owed (one per subscribed channel whose
+    bindings match), ``dropped_events`` those lost to a full queue.
+    """
+
+    def __init__(self, queue_limit: int = DEFAULT_QUEUE) -> None:
+        self.queue_limit = queue_limit
+        self.sessions: set[_Session] = set()
+        self.connects: list[float] = []
+        self.joins = 0
+        self.heartbeats = 0
+        self.injected = 0
+        self.expected = 0
+        self.dropped_events = 0
+        self.dropped_replies = 0
+        self._ids = itertools.count(1)
+
+    @property
+    def subscribed(self) -> int:
+        return sum(TOPIC in s.joins for s in self.sessions)
+
+    async def attach(self, socket, vsn: str = "1.0.0") -> None:
+        """Serve one connection until it closes."""
+        session = _Session(socket, vsn, self.queue_limit)
+        self.sessions.add(session)
+        self.connects.append(time.monotonic())
+        writer = asyncio.ensure_future(self._write(session))
+        try:
+            while (text := await socket.recv()) is not None:
+                message = decode(text)
+                if message is not None:
+                    self._handle(session, *message)
+        finally:
+            self.sessions.discard(session)
+            writer.cancel()
+
+    async def _write(self, session: _Session) -> None:
+        while True:
+            text = await session.queue.get()
+            try:
+                await session.socket.send(text)
+            except ConnectionError:
+                return
+
+    def _push(self, session: _Session, text: str) -> bool:
+        try:
+            session.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _reply(self, session: _Session, join_ref, ref, topic: str, response: dict | None = None) -> None:
+        reply = encode(session.vsn, join_ref, ref, topic, "phx_reply", {"status": "ok", "response": response or {}})
+        if not self._push(session, reply):
+            self.dropped_replies += 1
+
+    def _handle(self, session: _Session, join_ref, ref, topic, event, payload) -> None:
+        if event == "heartbeat":
+            self.heartbeats += 1
+            self._reply(session, join_ref, ref, topic)
+        elif event == "phx_join":
+            config = (payload or {}).get("config") or {}
+            bindings = [(next(self._ids), b) for b in config.get("postgres_changes") or []]
+            session.joins[topic] = _Join(join_ref, bindings)
+            self.joins += 1
+            self._reply(session, join_ref, ref, topic,
+                        {"postgres_changes": [{**b, "id": i} for i, b in bindings]})
+            if bindings:
+                self._push(session, encode(session.vsn, join_ref, None, topic, "system", {
+                    "message": "Subscribed to PostgreSQL", "status": "ok", "extension": "postgres_changes",
+                    "channel": topic.split(":", 1)[-1]}))
+        elif event == "phx_leave":
+            session.joins.pop(topic, None)
+            self._reply(session, join_ref, ref, topic)
+        elif ref is not None:
+            self._reply(session, join_ref, ref, topic)
+
+    def inject(self, table: str, event_type: str, record: dict) -> int:
+        """Fan a row change out as ``postgres_changes``; returns the deliveries owed."""
+        # Server wire shape: realtime-js maps record/old_record to new/old through ``columns``.
+        change = {
+            "schema": "public",
+            "table": table,
+            "commit_timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "type": event_type,
+            "columns": [{"name": name, "type": _column_type(value)} for name, value in record.items()],
+            "errors": None,
+        }
+        if event_type != "DELETE":
+            change["record"] = record
+        if event_type != "INSERT":
+            change["old_record"] = record if event_type == "DELETE" else {"id": record.get("id")}
+        data = json.dumps(change)
+        owed = 0
+        for session in list(self.sessions):
+            for topic, join in session.joins.items():
+                ids = [i for i, b in join.bindings if _matches(b, table, event_type)]
+                if not ids:
+                    continue
+                owed += 1
+                payload = f'{{"ids":{json.dumps(ids)},"data":{data}}}'
+                if not self._push(session, _frame(session.vsn, join.join_ref, None, topic, "postgres_changes", payload)):
+                    self.dropped_events += 1
+        self.injected += 1
+        self.expected += owed
+        return owed
+
+    def broadcast(self, event: str, payload: dict, topic: str = TOPIC) -> int:
+        """Send a broadcast to every session joined to ``topic``."""
+        body = {"type": "broadcast", "event": event, "payload": payload}
+        owed = 0
+        for session in list(self.sessions):
+            join = session.joins.get(topic)
+            if join is None:
+                continue
+            owed += 1
+            if not self._push(session, encode(session.vsn, join.join_ref, None, topic, "broadcast", body)):
+                self.dropped_events += 1
+        self.expected += owed
+        return owed
+
+    async def drop_all(self, code: int = 1012) -> int:
+        """Close every connection, as a realtime node restart does."""
+        sessions = list(self.sessions)
+        await asyncio.gather(*(s.socket.close(code) for s in sessions), return_exceptions=True)
+        return len(sessions)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions), "subscribed": self.subscribed, "connects": len(self.connects),
+            "joins": self.joins, "heartbeats": self.heartbeats, "injected": self.injected,
+            "expected": self.expected, "dropped_events": self.dropped_events, "dropped_replies": self.dropped_replies,
+        }
+
+    def route(self, route) -> None:
+        """``BrowserContext.route_web_socket`` handler."""
+        vsn = parse_qs(urlsplit(route.url).query).get("vsn", ["1.0.0"])[0]
+        asyncio.ensure_future(self.attach(_RouteSocket(route), vsn))
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route_web_socket(re.compile(re.escape(REALTIME_PATH)), self.route)
+
+    def http_server(self, host: str = "127.0.0.1", port: int = 0) -> HttpServer:
+        """The stand-in on ``ws://host:port/realtime/v1/websocket``, driven over HTTP."""
+        server = HttpServer(host, port)
+
+        async def accept(request: Request, socket: WebSocket) -> None:
+            await self.attach(socket, request.arg("vsn", "1.0.0"))
+
+        async def inject(request: Request) -> Response:
+            body = request.json() or {}
+            record = {"soak_sent_at": time.time(), **(body.get("record") or {})}
+            return Response(200, {"owed": self.inject(body.get("table", "proposals"), body.get("type", "INSERT"), record)})
+
+        async def broadcast(request: Request) -> Response:
+            body = request.json() or {}
+            payload = {"soak_sent_at": time.time(), **(body.get("payload") or {})}
+            return Response(200, {"owed": self.broadcast(body.get("event", SYNC_EVENT), payload)})
+
+        async def drop(request: Request) -> Response:
+            return Response(200, {"closed": await self.drop_all()})
+
+        async def stats(request: Request) -> Response:
+            return Response(200, self.stats())
+
+        server.websocket(REALTIME_PATH, accept)
+        server.route("POST", r"/inject", inject)
+        server.route("POST", r"/broadcast", broadcast)
+        server.route("POST", r"/drop", drop)
+        server.route("GET", r"/stats", stats)
+        return server
+
+
+# --------------------------------------------------------------------------
+# Sessions
+
+
+@dataclass
+class SoakMetrics:
+    """Counters shared by every session; ``latencies`` and ``rejoin_s`` hold the current window."""
+
+    latencies: list[float] = field(default_factory=list)
+    rejoin_s: list[float] = field(default_factory=list)
+    received: int = 0
+    connects: int = 0
+    connect_failures: int = 0
+    disconnects: int = 0
+    heartbeat_timeouts: int = 0
+    join_timeouts: int = 0
+    abandoned: int = 0
+
+    def record(self, row: dict | None) -> None:
+        self.received += 1
+        sent = (row or {}).get("soak_sent_at")
+        if sent:
+            self.latencies.append(time.time() - sent)
+
+
+async def _wait(stop: asyncio.Event, seconds: float) -> bool:
+    """Sleep up to ``seconds``; True when ``stop`` was set."""
+    try:
+        await asyncio.wait_for(stop.wait(), max(0.0, seconds))
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+class DashboardClient:
+    """One dashboard tab's realtime socket, as realtime-js and the hook drive it."""
+
+    def __init__(self, url: str, metrics: SoakMetrics, vsn: str = "1.0.0", jitter_s: float = 0.0,
+                 rng: random.Random | None = None) -> None:
+        self.url = url
+        self.metrics = metrics
+        self.vsn = vsn
+        self.jitter_s = jitter_s
+        self.rng = rng or random.Random()
+        self._refs = itertools.count(1)
+
+    def _backoff(self, tries: int) -> float:
+        return reconnect_after_s(tries) + (self.rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        tries, lost_at = 0, None
+        while not stop.is_set():
+            try:
+                socket = await connect_websocket(self.url)
+            except (OSError, asyncio.TimeoutError):
+                self.metrics.connect_failures += 1
+                tries += 1
+                await _wait(stop, self._backoff(tries))
+                continue
+            self.metrics.connects += 1
+            tries = 0
+            outcome = await self._session(socket, stop, lost_at)
+            if outcome == "stopped":
+                return
+            if outcome == "abandoned":
+                self.metrics.abandoned += 1
+                await stop.wait()
+                return
+            lost_at = time.monotonic()
+            self.metrics.disconnects += 1
+            tries += 1
+            await _wait(stop, self._backoff(tries))
+
+    async def _session(self, socket: WebSocket, stop: asyncio.Event, lost_at: float | None) -> str:
+        join_ref = str(next(self._refs))
+        state = {"joined": False, "heartbeat": None, "outcome": "lost"}
+        watchdog = asyncio.ensure_future(self._watch(socket, stop, state))
+        try:
+            await socket.send(encode(self.vsn, join_ref, join_ref, TOPIC, "phx_join", {
+                "config": {"broadcast": {"ack": False, "self": False}, "presence": {"key": ""},
+                           "postgres_changes": dashboard_bindings(), "private": False},
+            }))
+            while (text := await socket.recv()) is not None:
+                message = decode(text)
+                if message is None:
+                    continue
+                _, ref, _, event, payload = message
+                payload = payload or {}
+                if event == "phx_reply":
+                    if ref == join_ref and payload.get("status") == "ok" and not state["joined"]:
+                        state["joined"] = True
+                        if lost_at is not None:
+                            self.metrics.rejoin_s.append(time.monotonic() - lost_at)
+                    elif ref == state["heartbeat"]:
+                        state["heartbeat"] = None
+                elif event == "postgres_changes":
+                    data = payload.get("data") or {}
+                    self.metrics.record(data.get("record") or data.get("old_record"))
+                elif event == "broadcast":
+                    self.metrics.record(payload.get("payload"))
+        except ConnectionError:
+            pass
+        finally:
+            watchdog.cancel()
+        return state["outcome"]
+
+    async def _watch(self, socket: WebSocket, stop: asyncio.Event, state: dict) -> None:
+        """Heartbeats, the join timeout and shutdown; closing the socket ends :meth:`_session`."""
+        now = time.monotonic()
+        next_beat, deadline = now + HEARTBEAT_S, now + JOIN_TIMEOUT_S
+        try:
+            while not socket.closed:
+                until = next_beat if state["joined"] else min(next_beat, deadline)
+                if await _wait(stop, until - time.monotonic()):
+                    state["outcome"] = "stopped"
+                    break
+                now = time.monotonic()
+                if not state["joined"] and now >= deadline:
+                    self.metrics.join_timeouts += 1
+                    if await _wait(stop, HOOK_GIVE_UP_S):
+                        state["outcome"] = "stopped"
+                    else:
+                        state["outcome"] = "abandoned"
+                    break
+                if now >= next_beat:
+                    if state["heartbeat"] is not None:
+                        # realtime-js: "heartbeat timeout. Attempting to re-establish connection"
+                        self.metrics.heartbeat_timeouts += 1
+                        break
+                    state["heartbeat"] = ref = str(next(self._refs))
+                    await socket.send(encode(self.vsn, None, ref, "phoenix", "heartbeat", {}))
+                    next_beat = now + HEARTBEAT_S
+        except ConnectionError:
+            pass
+        await socket.close()
+
+
+ATTACH_JS = """async ([topic, tables, syncEvent]) => {
+    const soak = window.__realtimeSoak = { latencies: [], received: 0, status: null };
+    const record = (row) => {
+        soak.received += 1;
+        if (row && row.soak_sent_at) soak.latencies.push(Date.now() / 1000 - row.soak_sent_at);
+    };
+    const { supabase } = await import('/src/integrations/supabase/client.ts');
+    let channel = supabase.channel(topic);
+    for (const table of tables) {
+        channel = channel.on('postgres_changes', { event: '*', schema: 'public', table },
+            (p) => record(p.new && Object.keys(p.new).length ? p.new : p.old));
+    }
+    channel.on('broadcast', { event: syncEvent }, (p) => record(p.payload)).subscribe((status) => {
+        soak.status = status;
+        if (status === 'TIMED_OUT') setTimeout(() => channel.unsubscribe(), 3000);
+    });
+}"""
+
+POLL_JS = """() => {
+    const soak = window.__realtimeSoak || { latencies: [], received: 0, status: null };
+    return {
+        latencies: soak.latencies.splice(0),
+        received: soak.received,
+        status: soak.status,
+        js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+        dom_nodes: document.getElementsByTagName('*').length,
+    };
+}"""
+
+
+@dataclass
+class BrowserSession:
+    index: int
+    status: str | None = None
+    received: int = 0
+    error: str | None = None
+    # (seconds since the soak started, JS heap bytes, DOM nodes)
+    memory: list[tuple[float, int, int]] = field(default_factory=list)
+
+    def heap_growth_mb_per_h(self) -> float | None:
+        points = [(t, heap) for t, heap, _ in self.memory if heap is not None]
+        if len(points) < 3 or points[-1][0] - points[0][0] < 1:
+            return None
+        slope, _ = statistics.linear_regression([t for t, _ in points], [heap for _, heap in points])
+        return slope * 3600 / 2**20
+
+
+async def run_browser(session: BrowserSession, pool: BrowserPool, cache: AuthCache, metrics: SoakMetrics,
+                      stop: asyncio.Event, started: float, poll_s: float) -> None:
+    """One headless dashboard with the hook's channel, polled for deliveries and memory."""
+    state = await cache.storage_state("admin")
+    async with pool.context(storage_state=state, viewport={"width": 1280, "height": 720}) as context:
+        page = await context.new_page()
+        try:
+            await page.goto(base_url() + "/dashboard", wait_until="domcontentloaded")
+            await page.evaluate(ATTACH_JS, [CHANNEL, list(DASHBOARD_TABLES), SYNC_EVENT])
+        except Error as exc:
+            # A production build has no /src modules to import.
+            session.error = str(exc).splitlines()[0]
+            return
+        while True:
+            stopping = await _wait(stop, poll_s)
+            try:
+                poll = await page.evaluate(POLL_JS)
+            except Error as exc:
+                session.error = str(exc).splitlines()[0]
+                return
+            metrics.latencies.extend(poll["latencies"])
+            metrics.received += poll["received"] - session.received
+            session.received, session.status = poll["received"], poll["status"]
+            session.memory.append((round(time.monotonic() - started, 1), poll["js_heap_bytes"], poll["dom_nodes"]))
+            if stopping:
+                return
+
+
+# --------------------------------------------------------------------------
+# Soak
+
+
+async def inject_changes(standin: RealtimeStandIn, rate: float, sync_every: float, stop: asyncio.Event,
+                         rng: random.Random) -> None:
+    """Open-loop row changes at ``rate`` per second, and a batch sync every ``sync_every`` seconds."""
+    if rate <= 0:
+        await stop.wait()
+        return
+    interval = 1 / rate
+    next_at = next_sync = time.monotonic()
+    for seq in itertools.count(1):
+        if stop.is_set():
+            return
+        table = rng.choices(DASHBOARD_TABLES + OTHER_TABLES, weights=TABLE_WEIGHTS)[0]
+        event_type = rng.choices(("INSERT", "UPDATE", "DELETE"), weights=(3, 6, 1))[0]
+        standin.inject(table, event_type, {"id": rng.randint(1, 100000), "soak_seq": seq, "soak_sent_at": time.time(),
+                                           "updated_at": dt.datetime.now(dt.timezone.utc).isoformat()})
+        if sync_every and time.monotonic() >= next_sync:
+            standin.broadcast(SYNC_EVENT, {"soak_sent_at": time.time(), "reason": "soak"})
+            next_sync += sync_every
+        next_at += interval
+        if await _wait(stop, next_at - time.monotonic()):
+            return
+
+
+@dataclass
+class Storm:
+    at_s: float
+    closed: int
+    attempts: int = 0
+    peak_connects_per_s: int = 0
+    recovered_s: float | None = None
+
+
+def _peak_per_second(times: list[float]) -> int:
+    return max((bisect.bisect_left(times, t + 1.0) - i for i, t in enumerate(times)), default=0)
+
+
+async def restart_storms(standin: RealtimeStandIn, every: float, stop: asyncio.Event, started: float,
+                         storms: list[Storm]) -> None:
+    """Drop every connection each ``every`` seconds and time the reconnect storm."""
+    while not await _wait(stop, every):
+        before = standin.subscribed
+        t0 = time.monotonic()
+        storm = Storm(round(t0 - started, 1), await standin.drop_all())
+        storms.append(storm)
+        while time.monotonic() - t0 < STORM_TIMEOUT_S:
+            if standin.subscribed >= before:
+                storm.recovered_s = round(time.monotonic() - t0, 2)
+                break
+            if await _wait(stop, 0.05):
+                break
+        window = standin.connects[bisect.bisect_left(standin.connects, t0):]
+        storm.attempts = len(window)
+        storm.peak_connects_per_s = _peak_per_second(window)
+        recovered = f"all back in {storm.recovered_s:.1f}s" if storm.recovered_s is not None else "not recovered"
+        print(f"  restart at {storm.at_s:.0f}s: {storm.closed} closed, {storm.attempts} reconnects, "
+              f"peak {storm.peak_connects_per_s}/s, {recovered}", flush=True)
+
+
+@dataclass
+class SoakConfig:
+    clients: int = 200
+    browsers: int = 0
+    contexts_per_browser: int = 10
+    rate: float = 10.0
+    sync_every: float = 60.0
+    duration: float = 60.0
+    sample_every: float = 10.0
+    ramp: float = 10.0
+    drop_every: float = 0.0
+    jitter: float = 0.0
+    queue: int = DEFAULT_QUEUE
+    vsn: str = "1.0.0"
+    offline: Path | None = None
+    seed: int = 1
+
+
+def _window(standin: RealtimeStandIn, metrics: SoakMetrics, last: dict, t: float,
+            browsers: list[BrowserSession]) -> dict:
+    counters = {
+        "injected": standin.injected, "expected": standin.expected, "received": metrics.received,
+        "dropped": standin.dropped_events, "connects": len(standin.connects), "disconnects": metrics.disconnects,
+        "heartbeat_timeouts": metrics.heartbeat_timeouts, "join_timeouts": metrics.join_timeouts,
+    }
+    window = {"t_s": round(t, 1), "sessions": len(standin.sessions), "subscribed": standin.subscribed,
+              **{k: v - last.get(k, 0) for k, v in counters.items()},
+              # Below --rate when fan-out cannot keep up with the injector.
+              "injected_per_s": round((standin.injected - last.get("injected", 0)) / max(t - last.get("t_s", 0), 1e-9), 1),
+              "abandoned": metrics.abandoned,
+              "fanout": latency_summary(metrics.latencies),
+              "rejoin": latency_summary(metrics.rejoin_s)}
+    heaps = [s.memory[-1][1] for s in browsers if s.memory and s.memory[-1][1] is not None]
+    if heaps:
+        window["browser_heap_mb"] = round(statistics.mean(heaps) / 2**20, 2)
+        window["browser_dom_nodes"] = round(statistics.mean(s.memory[-1][2] for s in browsers if s.memory))
+    last.update(counters, t_s=t)
+    metrics.latencies.clear()
+    metrics.rejoin_s.clear()
+    return window
+
+
+def _format_window(w: dict) -> str:
+    fanout = w["fanout"]
+    latency = (f"p50 {fanout['p50_ms']:.1f} p95 {fanout['p95_ms']:.1f} p99 {fanout['p99_ms']:.1f} ms"
+               if fanout["count"] else "no deliveries")
+    line = (f"{w['t_s']:>7.0f}s  {w['subscribed']:>5}/{w['sessions']:<5} subscribed  {w['injected_per_s']:>6.1f}/s  "
+            f"{w['received']:>7}/{w['expected']:<7} delivered  {latency}  dropped {w['dropped']}  "
+            f"reconnects {w['connects']}  hb timeouts {w['heartbeat_timeouts']}")
+    if "browser_heap_mb" in w:
+        line += f"  heap {w['browser_heap_mb']:.1f} MB"
+    return line
+
+
+async def _drain(standin: RealtimeStandIn, metrics: SoakMetrics) -> None:
+    deadline = time.monotonic() + DRAIN_TIMEOUT_S
+    while metrics.received + standin.dropped_events < standin.expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+async def soak(config: SoakConfig) -> dict:
+    standin = RealtimeStandIn(config.queue)
+    metrics = SoakMetrics()
+    stop = asyncio.Event()
+    rng = random.Random(config.seed)
+    storms: list[Storm] = []
+    sessions = [BrowserSession(i) for i in range(config.browsers)]
+    windows: list[dict] = []
+    async with standin.http_server() as server:
+        url = server.url.replace("http://", "ws://") + REALTIME_PATH + f"?apikey=soak&vsn={config.vsn}"
+        started = time.monotonic()
+        tasks = []
+
+        async def ramped(delay: float, client: DashboardClient) -> None:
+            if not await _wait(stop, delay):
+                await client.run(stop)
+
+        for i in range(config.clients):
+            client = DashboardClient(url, metrics, config.vsn, config.jitter, random.Random(config.seed * 100003 + i))
+            tasks.append(asyncio.ensure_future(ramped(config.ramp * i / max(config.clients, 1), client)))
+
+        pool = None
+        if config.browsers:
+            per_browser = min(config.contexts_per_browser, config.browsers)
+            pool = BrowserPool(math.ceil(config.browsers / per_browser), per_browser)
+            await pool.start()
+            if config.offline:
+                mock = mocks.SupabaseMock(mocks.FixtureStore.from_dir(config.offline))
+
+                async def offline(context: BrowserContext) -> None:
+                    await context.route(mocks.SUPABASE_PATH, mock.handle)
+
+                pool.context_hooks.append(offline)
+            pool.context_hooks.append(standin.install)
+            cache = AuthCache(pool, auth_dir(offline=config.offline is not None))
+            poll_s = min(config.sample_every, 10.0)
+            tasks += [asyncio.ensure_future(run_browser(s, pool, cache, metrics, stop, started, poll_s))
+                      for s in sessions]
+
+        # Injection and restarts end first, so the last window counts what was still queued.
+        quiet = asyncio.Event()
+        tasks.append(asyncio.ensure_future(inject_changes(standin, config.rate, config.sync_every, quiet, rng)))
+        if config.drop_every:
+            tasks.append(asyncio.ensure_future(restart_storms(standin, config.drop_every, quiet, started, storms)))
+
+        last: dict = {}
+        try:
+            while True:
+                remaining = config.duration - (time.monotonic() - started)
+                await asyncio.sleep(max(0.0, min(config.sample_every, remaining)))
+                done = time.monotonic() - started >= config.duration
+                if done:
+                    quiet.set()
+                    await _drain(standin, metrics)
+                windows.append(_window(standin, metrics, last, time.monotonic() - started, sessions))
+                print(_format_window(windows[-1]), flush=True)
+                if done:
+                    break
+        finally:
+            quiet.set()
+            stop.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if pool is not None:
+                await pool.close()
+
+    growth = [g for g in (s.heap_growth_mb_per_h() for s in sessions) if g is not None]
+    lost = standin.expected - metrics.received - standin.dropped_events
+    return {
+        "config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(config).items()},
+        "totals": {
+            **standin.stats(), "received": metrics.received, "lost_in_flight": max(0, lost),
+            "delivery_ratio": round(metrics.received / standin.expected, 6) if standin.expected else None,
+            "connects": metrics.connects, "connect_failures": metrics.connect_failures,
+            "disconnects": metrics.disconnects, "heartbeat_timeouts": metrics.heartbeat_timeouts,
+            "join_timeouts": metrics.join_timeouts, "abandoned": metrics.abandoned,
+        },
+        "storms": [vars(s) for s in storms],
+        "browsers": {
+            "sessions": len(sessions),
+            "errors": sorted({s.error for s in sessions if s.error}),
+            "subscribed": sum(s.status == "SUBSCRIBED" for s in sessions),
+            "heap_growth_mb_per_h": {
+                "median": round(statistics.median(growth), 2) if growth else None,
+                "max": round(max(growth), 2) if growth else None,
+            },
+            "memory": {s.index: s.memory for s in sessions},
+        },
+        "windows": windows,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.realtime_soak", description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200, help="raw WebSocket dashboard sessions")
+    parser.add_argument("--browsers", type=int, default=0, help="headless dashboard sessions")
+    parser.add_argument("--contexts-per-browser", type=int, default=10)
+    parser.add_argument("--offline", nargs="?", type=Path, const=mocks.FIXTURES_DIR, metavar="FIXTURES_DIR",
+                        help="browser sessions answer Supabase from fixtures (see harness.mocks)")
+    parser.add_argument("--rate", type=float, default=10.0, help="row changes per second")
+    parser.add_argument("--sync-every", type=float, default=60.0, help="seconds between dashboard_sync broadcasts")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds; 3600 for an hour-long soak")
+    parser.add_argument("--sample-every", type=float, default=10.0, help="seconds per report window")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which the clients connect")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="restart the stand-in every N seconds")
+    parser.add_argument("--reconnect-jitter", type=float, default=0.0, metavar="SECONDS",
+                        help="random delay added to each reconnect (realtime-js adds none)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE, help="messages buffered per connection")
+    parser.add_argument("--vsn", choices=["1.0.0", "2.0.0"], default="1.0.0", help="realtime serializer")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--serve", type=int, metavar="PORT", help="only run the stand-in on PORT")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.serve is not None:
+        async def serve() -> None:
+            async with RealtimeStandIn(args.queue).http_server("0.0.0.0", args.serve) as server:
+                print(f"realtime stand-in on ws://127.0.0.1:{server.port}{REALTIME_PATH} "
+                      f"(POST /inject, /broadcast, /drop; GET /stats)", flush=True)
+                await asyncio.Event().wait()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    config = SoakConfig(
+        clients=args.clients, browsers=args.browsers, contexts_per_browser=args.contexts_per_browser,
+        rate=args.rate, sync_every=args.sync_every, duration=args.duration, sample_every=args.sample_every,
+        ramp=args.ramp, drop_every=args.drop_every, jitter=args.reconnect_jitter, queue=args.queue,
+        vsn=args.vsn, offline=args.offline, seed=args.seed,
+    )
+    print(f"{config.clients} clients + {config.browsers} browsers, {config.rate:g} changes/s for "
+          f"{config.duration:g}s", flush=True)
+    report = asyncio.run(soak(config))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    totals = report["totals"]
+    print(f"delivered {totals['received']:,}/{totals['expected']:,} (ratio {totals['delivery_ratio']}), "
+          f"dropped {totals['dropped_events']}, lost in flight {totals['lost_in_flight']}, "
+          f"{totals['disconnects']} disconnects, {totals['heartbeat_timeouts']} heartbeat timeouts, "
+          f"{totals['abandoned']} abandoned")
+    heap = report["browsers"]["heap_growth_mb_per_h"]
+    if heap["median"] is not None:
+        print(f"browser heap growth: median {heap['median']} MB/h, max {heap['max']} MB/h")
+    for error in report["browsers"]["errors"]:
+        print(f"browser session error: {error}", file=sys.stderr)
+    print(f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""Append-only store of test results across runs (``tmp/results.db``).
+
+``tmp/test_results.json`` from TestSprite and the runner's
+``tmp/run_results.json`` only describe the latest run and embed each test's
+full source.  This SQLite store keeps one row per test per run - status,
+timings, the error's last line and artifact paths - and stores test
+source and full error text once, zlib-compressed and keyed by SHA-256.
+Numeric samples (durations, LCP, map and PDF timings) go to ``metrics``,
+several per run when a benchmark repeats; :mod:`harness.gate` compares
+them.  Rows are only ever inserted, so runs can be compared over time::
+
+    python -m harness.results import tmp/test_results.json
+    python -m harness.results runs
+    python -m harness.results flaky --last 50
+    python -m harness.results trend TC004
+    python -m harness.results regressions
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from .config import SUITE_DIR, TMP_DIR
+
+DB_PATH = TMP_DIR / "results.db"
+ERROR_SUMMARY_CHARS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    wall_s     REAL,
+    source     TEXT NOT NULL,
+    git_sha    TEXT,
+    host       TEXT,
+    label      TEXT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha     TEXT PRIMARY KEY,
+    kind    TEXT NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id     INTEGER NOT NULL REFERENCES runs(run_id),
+    test_id    TEXT NOT NULL,
+    title      TEXT,
+    status     TEXT NOT NULL,
+    duration_s REAL,
+    started_at REAL,
+    waited_s   REAL,
+    error      TEXT,
+    error_sha  TEXT REFERENCES blobs(sha),
+    code_sha   TEXT REFERENCES blobs(sha),
+    artifacts  TEXT,
+    PRIMARY KEY (run_id, test_id)
+);
+CREATE INDEX IF NOT EXISTS results_test_run ON results(test_id, run_id);
+CREATE INDEX IF NOT EXISTS results_status ON results(status, run_id);
+CREATE INDEX IF NOT EXISTS results_code ON results(code_sha);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id  INTEGER NOT NULL REFERENCES runs(run_id),
+    subject TEXT NOT NULL,
+    metric  TEXT NOT NULL,
+    value   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_series ON metrics(subject, metric, run_id);
+"""
+
+# TestSprite's testStatus values mapped to the runner's.
+TESTSPRITE_STATUS = {"PASSED": "passed", "FAILED": "failed", "ERROR": "error"}
+
+
+def _git_sha() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SUITE_DIR, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+
+def _summary(error: str | None) -> str | None:
+    if not error:
+        return None
+    lines = [line for line in error.strip().splitlines() if line.strip()]
+    return lines[-1][:ERROR_SUMMARY_CHARS] if lines else None
+
+
+class ResultStore:
+    """Thin wrapper over the SQLite file; safe to open from several runs."""
+
+    def __init__(self, path: Path = DB_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def put_blob(self, text: str, kind: str) -> str:
+        data = text.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        self.db.execute(
+            "INSERT OR IGNORE INTO blobs (sha, kind, content) VALUES (?, ?, ?)",
+            (sha, kind, zlib.compress(data, 6)),
+        )
+        return sha
+
+    def blob(self, sha: str) -> str | None:
+        row = self.db.execute("SELECT content FROM blobs WHERE sha = ?", (sha,)).fetchone()
+        return zlib.decompress(row["content"]).decode("utf-8") if row else None
+
+    def add_run(
+        self,
+        rows: Iterable[dict],
+        started_at: float,
+        wall_s: float | None = None,
+        source: str = "runner",
+        label: str | None = None,
+    ) -> int:
+        """Insert a run and its per-test rows; returns the new ``run_id``.
+
+        Each row has ``test_id``, ``status`` and optionally ``title``,
+        ``duration_s``, ``started_at``, ``waited_s``, ``error``, ``code``
+        (source text) and ``artifacts`` (dict of name -> path or URL).
+        """
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (started_at, wall_s, source, git_sha, host, label) VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at, wall_s, source, _git_sha(), socket.gethostname(), label),
+            )
+            run_id = cursor.lastrowid
+            for row in rows:
+                error = row.get("error")
+                self.db.execute(
+                    "INSERT INTO results (run_id, test_id, title, status, duration_s, started_at, waited_s,"
+                    " error, error_sha, code_sha, artifacts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        row["test_id"],
+                        row.get("title"),
+                        row["status"],
+                        row.get("duration_s"),
+                        row.get("started_at"),
+                        row.get("waited_s"),
+                        _summary(error),
+                        self.put_blob(error, "error") if error else None,
+                        self.put_blob(row["code"], "code") if row.get("code") else None,
+                        json.dumps(row["artifacts"]) if row.get("artifacts") else None,
+                    ),
+                )
+        return run_id
+
+    def add_run_metrics(self, run_id: int, samples: Iterable[tuple[str, str, float]]) -> None:
+        """Attach ``(subject, metric, value)`` samples to ``run_id``."""
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO metrics (run_id, subject, metric, value) VALUES (?, ?, ?, ?)",
+                ((run_id, subject, metric, float(value)) for subject, metric, value in samples if value is not None),
+            )
+
+    def series(self) -> list[tuple[str, str]]:
+        return [tuple(r) for r in self.db.execute("SELECT DISTINCT subject, metric FROM metrics ORDER BY 1, 2")]
+
+    def metric_runs(self, subject: str, metric: str, label: str | None = None,
+                    source: str | None = None) -> list[int]:
+        """Run ids with samples of ``subject``/``metric``, newest first, optionally of one label/source."""
+        query = "SELECT DISTINCT m.run_id FROM metrics m JOIN runs r USING (run_id) WHERE m.subject = ? AND m.metric = ?"
+        params: list = [subject, metric]
+        if label is not None:
+            query += " AND r.label = ?"
+            params.append(label)
+        if source is not None:
+            query += " AND r.source = ?"
+            params.append(source)
+        return [r[0] for r in self.db.execute(query + " ORDER BY m.run_id DESC", params)]
+
+    def latest_source(self, subject: str, metric: str) -> str | None:
+        """``runs.source`` of the newest run in the series, retry rounds aside."""
+        row = self.db.execute(
+            """SELECT r.source FROM metrics m JOIN runs r USING (run_id)
+               WHERE m.subject = ? AND m.metric = ? AND r.source NOT LIKE '%:retry'
+               ORDER BY m.run_id DESC LIMIT 1""",
+            (subject, metric),
+        ).fetchone()
+        return row[0] if row else None
+
+    def metric_values(self, subject: str, metric: str, run_ids: Iterable[int]) -> list[float]:
+        run_ids = list(run_ids)
+        if not run_ids:
+            return []
+        marks = ", ".join("?" * len(run_ids))
+        return [r[0] for r in self.db.execute(
+            f"SELECT value FROM metrics WHERE subject = ? AND metric = ? AND run_id IN ({marks})",
+            [subject, metric, *run_ids],
+        )]
+
+    def durations(self, last: int = 20) -> dict[str, float]:
+        """Median ``duration_s`` of each test over its last ``last`` runs."""
+        rows = self.db.execute(
+            """SELECT test_id, duration_s FROM (
+                   SELECT test_id, duration_s,
+                          ROW_NUMBER() OVER (PARTITION BY test_id ORDER BY run_id DESC) AS age
+                   FROM results WHERE duration_s IS NOT NULL
+               ) WHERE age <= ?""",
+            (last,),
+        ).fetchall()
+        by_test: dict[str, list[float]] = {}
+        for row in rows:
+            by_test.setdefault(row["test_id"], []).append(row["duration_s"])
+        return {test_id: statistics.median(values) for test_id, values in by_test.items()}
+
+    def runs(self, limit: int = 20) -> list[sqlite3.Row]:
+        return self.db.execute(
+            """SELECT r.run_id, r.started_at, r.wall_s, r.source, substr(r.git_sha, 1, 12) AS git, r.label,
+                      COUNT(t.test_id) AS tests,
+                      SUM(t.status = 'passed') AS passed
+               FROM runs r LEFT JOIN results t USING (run_id)
+               GROUP BY r.run_id ORDER BY r.run_id DESC LIMIT ?""",
+            (limit,),
+        ).fetchall()
+
+    def history(self, test_id: str, limit: int = 50) -> list[sqlite3.Row]:
+        """Most recent results of ``test_id``, newest first."""
+        return self.db.execute(
+            """SELECT t.run_id, t.status, t.duration_s, t.waited_s, t.error,
+                      substr(t.code_sha, 1, 12) AS code, substr(r.git_sha, 1, 12) AS git, r.started_at
+               FROM results t JOIN runs r USING (run_id)
+               WHERE t.test_id = ? ORDER BY t.run_id DESC LIMIT ?""",
+            (test_id, limit),
+        ).fetchall()
+
+    def flaky(self, last: int = 50, min_runs: int = 3) -> list[sqlite3.Row]:
+        """Tests whose status flipped within their last ``last`` runs.
+
+        ``flips`` counts pass/fail transitions; unlike the failure rate it
+        tells an intermittently failing test from one that broke once.
+        Runs where the test's code changed do not count as flips.
+        ``score`` is flips per transition, 1.0 for strict alternation.
+        """
+        return self.db.execute(
+            """WITH recent AS (
+                   SELECT test_id, run_id, status, code_sha,
+                          ROW_NUMBER() OVER (PARTITION BY test_id ORDER BY run_id DESC) AS age
+                   FROM results
+               ), ordered AS (
+                   SELECT test_id, status,
+                          LAG(status) OVER (PARTITION BY test_id ORDER BY run_id) AS previous,
+                          LAG(code_sha) OVER (PARTITION BY test_id ORDER BY run_id) AS previous_code,
+                          code_sha
+                   FROM recent WHERE age <= ?
+               )
+               SELECT test_id,
+                      COUNT(*) AS runs,
+                      SUM(status = 'passed') AS passed,
+                      SUM(previous IS NOT NULL AND previous != status
+                          AND previous_code IS code_sha) AS flips,
+                      ROUND(SUM(previous IS NOT NULL AND previous != status
+                                AND previous_code IS code_sha) * 1.0 / (COUNT(*) - 1), 3) AS score
+               FROM ordered GROUP BY test_id
+               HAVING runs >= ? AND flips > 0 AND passed > 0 AND passed < runs
+               ORDER BY flips * 1.0 / runs DESC, test_id""",
+            (last, min_runs),
+        ).fetchall()
+
+    def regressions(self, run_id: int | None = None) -> list[sqlite3.Row]:
+        """Tests failing in ``run_id`` (default: latest with results) that passed in their previous run."""
+        if run_id is None:  # bench runs only carry metrics
+            row = self.db.execute("SELECT MAX(run_id) FROM results").fetchone()
+            run_id = row[0]
+        return self.db.execute(
+            """SELECT cur.test_id, cur.status, cur.error, prev.run_id AS last_passed_run,
+                      prev.code_sha != cur.code_sha AS code_changed
+               FROM results cur
+               JOIN results prev ON prev.test_id = cur.test_id
+                    AND prev.run_id = (SELECT MAX(run_id) FROM results
+                                       WHERE test_id = cur.test_id AND run_id < cur.run_id)
+               WHERE cur.run_id = ? AND cur.status != 'passed' AND prev.status = 'passed'
+               ORDER BY cur.test_id""",
+            (run_id,),
+        ).fetchall()
+
+    def import_testsprite(self, path: Path) -> int:
+        """Import a TestSprite ``test_results.json`` as one run."""
+        entries = json.loads(path.read_text(encoding="utf-8"))
+
+        def epoch(value: str | None) -> float | None:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() if value else None
+
+        rows = []
+        for entry in entries:
+            test_id, _, title = entry["title"].partition("-")
+            created, modified = epoch(entry.get("created")), epoch(entry.get("modified"))
+            rows.append({
+                "test_id": test_id,
+                "title": title,
+                "status": TESTSPRITE_STATUS.get(entry.get("testStatus", ""), "error"),
+                "started_at": created,
+                "duration_s": modified - created if created and modified else None,
+                "error": entry.get("testError"),
+                "code": entry.get("code"),
+                "artifacts": {"video": entry["testVisualization"]} if entry.get("testVisualization") else None,
+            })
+        started = min((r["started_at"] for r in rows if r["started_at"]), default=time.time())
+        return self.add_run(rows, started, source="testsprite", label=path.name)
+
+
+def _print_rows(rows: list[sqlite3.Row]) -> None:
+    if not rows:
+        print("(none)")
+        return
+    keys = rows[0].keys()
+    print("  ".join(keys))
+    for row in rows:
+        values = []
+        for key in keys:
+            value = row[key]
+            if key == "started_at" and value:
+                value = time.strftime("%Y-%m-%d %H:%M", time.localtime(value))
+            elif isinstance(value, float):
+                value = f"{value:.2f}"
+            values.append("-" if value is None else str(value))
+        print("  ".join(values))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.results", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import a TestSprite test_results.json")
+    imp.add_argument("path", type=Path)
+    runs = sub.add_parser("runs", help="list recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    flaky = sub.add_parser("flaky", help="tests flipping between pass and fail")
+    flaky.add_argument("--last", type=int, default=50, help="runs per test to look at")
+    trend = sub.add_parser("trend", help="duration and status history of one test")
+    trend.add_argument("test_id")
+    trend.add_argument("--limit", type=int, default=50)
+    reg = sub.add_parser("regressions", help="tests that passed before and fail now")
+    reg.add_argument("--run", type=int, help="run id (default: latest)")
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.db) as store:
+        if args.command == "import":
+            print(f"imported as run {store.import_testsprite(args.path)}")
+        elif args.command == "runs":
+            _print_rows(store.runs(args.limit))
+        elif args.command == "flaky":
+            _print_rows(store.flaky(args.last))
+        elif args.command == "trend":
+            _print_rows(store.history(args.test_id.upper(), args.limit))
+        elif args.command == "regressions":
+            _print_rows(store.regressions(args.run))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
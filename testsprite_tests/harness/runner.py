@@ -0,0 +1,522 @@
+"""Run the TC scripts concurrently on a shared browser pool.
+
+Each ``TC0xx_*.py`` exposes ``run_test(context=None)``.  The runner imports
+them (the ``asyncio.run`` call is behind ``__main__``), then runs the cases
+as concurrent contexts of a few long-lived browsers, so a full pass takes
+about as long as the slowest case instead of the sum of all of them::
+
+    python -m harness.runner                      # one case per CPU core
+    python -m harness.runner --per-core 2 TC001 TC004
+    python -m harness.runner --concurrency 4 --browsers 2
+    python -m harness.runner --offline            # Supabase from fixtures
+    python -m harness.runner --record TC008       # capture traffic (harness.har)
+    python -m harness.runner --replay --latency zero
+    python -m harness.runner --changed origin/main  # only affected TCs
+    python -m harness.runner --retries 2 --retry-budget 300  # see harness.flaky
+    python -m harness.runner --warm               # reuse reset contexts (harness.warm)
+    python -m harness.runner --serve-build        # production build (harness.static)
+    python -m harness.runner --trace-on-failure   # see harness.artifacts
+    python -m harness.runner --geocache standin   # ViaCEP/geocoding cache (harness.geocache)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import importlib.util
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Sequence
+
+from playwright.async_api import BrowserContext
+
+from . import artifacts, flaky, geocache, har, impact, locators, mocks, perf, results as result_store, static, waits, warm as warm_pool
+from .auth import AuthCache, auth_dir
+from .config import SUITE_DIR, TMP_DIR
+from .pool import BrowserPool
+
+TC_FILE_RE = re.compile(r"^(TC\d{3})_(.+)\.py$")
+RESULTS_PATH = TMP_DIR / "run_results.json"
+
+
+@dataclass
+class TestCase:
+    test_id: str
+    title: str
+    path: Path
+    run_test: Callable[..., Awaitable[None]]
+    # Role whose cached session is preloaded; None starts signed out.
+    auth_role: str | None = None
+
+
+@dataclass
+class TestResult:
+    test_id: str
+    title: str
+    status: str
+    duration_s: float
+    started_at: float
+    error: str | None = None
+    # "quarantine" for flaky cases run after the main lane (harness.flaky).
+    lane: str = "main"
+    attempts: int = 1
+    # Seconds spent in harness.waits helpers, and the individual waits.
+    waited_s: float = 0.0
+    waits: list[dict] = field(default_factory=list)
+    # harness.locators lookups: which strategy resolved each name, and its cost.
+    lookups: list[dict] = field(default_factory=list)
+    # Trace/screenshot/video directory when the case did not pass (harness.artifacts).
+    artifacts: str | None = None
+    # Page performance samples (see harness.perf), reported separately.
+    perf_samples: list[dict] = field(default_factory=list, repr=False)
+
+
+def _load_module(path: Path):
+    spec = importlib.util.spec_from_file_location(f"testsprite_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover(test_ids: Iterable[str] = (), suite_dir: Path = SUITE_DIR) -> list[TestCase]:
+    """Import the TC scripts, optionally restricted to ``test_ids``."""
+    wanted = {t.upper() for t in test_ids}
+    cases = []
+    for path in sorted(suite_dir.glob("TC*.py")):
+        match = TC_FILE_RE.match(path.name)
+        if not match or (wanted and match.group(1) not in wanted):
+            continue
+        module = _load_module(path)
+        run_test = getattr(module, "run_test", None)
+        if not asyncio.iscoroutinefunction(run_test):
+            raise TypeError(f"{path.name} does not define an async run_test()")
+        title = match.group(2).replace("___", " - ").replace("_", " ")
+        auth_role = getattr(module, "AUTH_ROLE", None)
+        cases.append(TestCase(match.group(1), title, path, run_test, auth_role))
+    missing = wanted - {c.test_id for c in cases}
+    if missing:
+        raise SystemExit(f"unknown test ids: {', '.join(sorted(missing))}")
+    return cases
+
+
+def default_concurrency(per_core: float = 1.0) -> int:
+    return max(1, round((os.cpu_count() or 1) * per_core))
+
+
+async def run_case(
+    pool: BrowserPool,
+    auth_cache: AuthCache | None,
+    case: TestCase,
+    timeout: float,
+    probe: bool = True,
+    archive: har.Archive | None = None,
+    warm: warm_pool.WarmPool | None = None,
+    capture: artifacts.Capture | None = None,
+) -> TestResult:
+    started = time.time()
+    t0 = time.perf_counter()
+    status, error = "passed", None
+    recorded: list[waits.WaitRecord] = []
+    lookups: list[locators.LookupRecord] = []
+    samples: list[dict] = []
+    passed = False
+    captured: list[Path] = []
+    videos: list = []
+    ring = None
+    try:
+        if warm is not None:
+            lease = warm.context(case.auth_role)
+        else:
+            options = {}
+            if auth_cache is not None and case.auth_role:
+                options["storage_state"] = await auth_cache.storage_state(case.auth_role)
+            if capture is not None and capture.video:
+                options["record_video_dir"] = artifacts.VIDEO_DIR
+            lease = pool.context(**options)
+        async with lease as context:
+            waits.track(context)
+            if probe:
+                await perf.attach(context)
+            recorder = har.Recorder(archive, case.test_id) if archive is not None else None
+            if recorder is not None:
+                recorder.attach(context)
+            if capture is not None and capture.trace:
+                ring = artifacts.TraceRing(context, case.test_id, capture.window_s)
+                await ring.start()
+            if warm is None and capture is not None and capture.video:
+                # Videos are finalized when the context closes; keep the handles until then.
+                context.on("page", lambda page: videos.append(page.video))
+            try:
+                await asyncio.wait_for(case.run_test(context), timeout)
+                passed = True
+            finally:
+                recorded = waits.records(context)
+                lookups = locators.records(context)
+                samples = await perf.collect(context)
+                if recorder is not None:
+                    recorder.detach(context)
+                    await recorder.finish()
+                if ring is not None:
+                    captured = await ring.stop(keep=not passed)
+    except AssertionError as exc:
+        status, error = "failed", str(exc) or "assertion failed"
+    except asyncio.TimeoutError:
+        status, error = "error", f"timed out after {timeout:.0f}s"
+    except Exception:
+        status, error = "error", traceback.format_exc(limit=5)
+    saved = None
+    if capture is not None:
+        spool = ring.spool if ring is not None else Path(tempfile.mkdtemp(prefix=f"video-{case.test_id}-"))
+        captured += await artifacts.finish_videos([v for v in videos if v], not passed, spool)
+        if not passed:
+            saved = capture.store.save(case.test_id, captured, {"status": status, "error": error})
+        shutil.rmtree(spool, ignore_errors=True)
+    return TestResult(
+        case.test_id,
+        case.title,
+        status,
+        time.perf_counter() - t0,
+        started,
+        error,
+        waited_s=round(sum(w.waited_s for w in recorded), 3),
+        waits=[asdict(w) for w in recorded],
+        lookups=[asdict(lookup) for lookup in lookups],
+        artifacts=str(saved) if saved else None,
+        perf_samples=samples,
+    )
+
+
+async def run_suite(
+    cases: list[TestCase],
+    concurrency: int,
+    browsers: int | None = None,
+    timeout: float = 300.0,
+    headless: bool = True,
+    auth_cache: bool = True,
+    probe: bool = True,
+    network: Callable[[BrowserContext], Awaitable[None]] | None = None,
+    archive: har.Archive | None = None,
+    warm: bool = False,
+    capture: artifacts.Capture | None = None,
+    hooks: Sequence[Callable[[BrowserContext], Awaitable[None]]] = (),
+) -> list[TestResult]:
+    """Run ``cases`` with at most ``concurrency`` open at once.
+
+    With ``auth_cache`` each role logs in at most once per token lifetime
+    and cases start from its saved session instead of the login form.
+    ``probe`` attaches the page performance probe to every case.
+    ``network`` is installed on every context to answer Supabase traffic
+    offline, login included (:func:`harness.mocks.install` or a
+    :class:`harness.har.Replayer`); ``archive`` records each case's traffic.
+    With ``warm`` cases reuse reset contexts (:mod:`harness.warm`).
+    ``capture`` keeps traces of cases that do not pass (:mod:`harness.artifacts`).
+    ``hooks`` are installed on every context after ``network`` (e.g.
+    :func:`harness.geocache.install`).
+    """
+    if not cases:
+        return []
+    concurrency = min(concurrency, len(cases))
+    browsers = browsers or max(1, math.ceil(concurrency / 4))
+    per_browser = math.ceil(concurrency / browsers)
+    async with BrowserPool(browsers, per_browser, headless=headless) as pool:
+        if network is not None:
+            pool.context_hooks.append(network)
+        pool.context_hooks.extend(hooks)
+        cache = AuthCache(pool, auth_dir(offline=network is not None)) if auth_cache else None
+        contexts = warm_pool.WarmPool(pool, concurrency, cache) if warm else None
+        try:
+            if contexts is not None:
+                # Cases of one role back to back, so each reuses the last one's context.
+                cases = sorted(cases, key=lambda c: c.auth_role or "")
+                await contexts.prewarm([c.auth_role for c in cases])
+            return list(await asyncio.gather(*(
+                run_case(pool, cache, c, timeout, probe, archive, contexts, capture) for c in cases
+            )))
+        finally:
+            locators.save_cache()
+            if contexts is not None:
+                await contexts.close()
+                print(contexts.stats.summary())
+
+
+def write_results(results: list[TestResult], wall_s: float, path: Path = RESULTS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "wall_s": round(wall_s, 3),
+        "sum_s": round(sum(r.duration_s for r in results), 3),
+        "results": [{k: v for k, v in asdict(r).items() if k != "perf_samples"} for r in results],
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def store_run(
+    results: list[TestResult],
+    cases: list[TestCase],
+    started_at: float,
+    wall_s: float,
+    args: argparse.Namespace,
+    source: str | None = None,
+) -> int:
+    """Append the run to the result store (see :mod:`harness.results`)."""
+    paths = {c.test_id: c.path for c in cases}
+    shared = {"results": str(RESULTS_PATH)}
+    if not args.no_perf:
+        shared["perf"] = str(perf.PERF_RESULTS_PATH)
+    if source is None:
+        source = "runner:" + ("offline" if args.offline else "replay" if args.replay else "online")
+        if args.serve_build:
+            source += "+build"
+    rows = []
+    for r in results:
+        row = {k: v for k, v in asdict(r).items() if k not in ("waits", "lookups", "perf_samples")}
+        row["code"] = paths[r.test_id].read_text(encoding="utf-8")
+        row["artifacts"] = dict(shared)
+        if r.artifacts:
+            row["artifacts"]["failure"] = r.artifacts
+        if args.record:
+            row["artifacts"]["har"] = str(har.Archive(args.record).manifest_path(r.test_id))
+        rows.append(row)
+    metrics = []
+    for r in results:
+        if r.status == "passed":
+            metrics.append((r.test_id, "duration_s", r.duration_s))
+        if r.perf_samples:
+            metrics.append((r.test_id, "lcp_ms", perf.summarize(r.perf_samples)["max_lcp_ms"]))
+    with result_store.ResultStore() as store:
+        run_id = store.add_run(rows, started_at, wall_s, source=source, label=args.label)
+        store.add_run_metrics(run_id, metrics)
+        return run_id
+
+
+def print_summary(results: list[TestResult], wall_s: float) -> None:
+    for r in sorted(results, key=lambda r: r.test_id):
+        notes = "".join([" [quarantined]" if r.lane == "quarantine" else "", f" [attempt {r.attempts}]" if r.attempts > 1 else ""])
+        print(f"{r.test_id}  {r.status:<6}  {r.duration_s:7.1f}s  (waits {r.waited_s:5.1f}s)  {r.title}{notes}")
+        if r.error:
+            print("        " + r.error.strip().splitlines()[-1])
+    serial = sum(r.duration_s for r in results)
+    passed = sum(r.status == "passed" for r in results)
+    print(f"\n{passed}/{len(results)} passed in {wall_s:.1f}s wall ({serial:.1f}s of case time)")
+
+
+def print_locator_summary(results: list[TestResult]) -> None:
+    """Names that only resolved through a fallback strategy, per TC."""
+    lookups = [(r.test_id, locators.LookupRecord(**entry)) for r in results for entry in r.lookups]
+    if not lookups:
+        return
+    degraded: dict[str, set[str]] = {}
+    for test_id, lookup in lookups:
+        if lookup.rank > 0:
+            degraded.setdefault(f"{lookup.name} -> {lookup.strategy}", set()).add(test_id)
+    spent = sum(lookup.lookup_s for _, lookup in lookups)
+    cached = sum(lookup.cached for _, lookup in lookups)
+    print(f"locators: {len(lookups)} lookups ({cached} cached) in {spent:.2f}s")
+    for entry, test_ids in sorted(degraded.items()):
+        print(f"        fallback {entry}  ({', '.join(sorted(test_ids))})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m harness.runner", description=__doc__.splitlines()[0])
+    parser.add_argument("test_ids", nargs="*", help="TC ids to run (default: all)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--concurrency", type=int, help="cases running at once")
+    group.add_argument("--per-core", type=float, default=1.0, help="cases per CPU core (default: 1)")
+    parser.add_argument("--browsers", type=int, help="browsers in the pool (default: one per 4 cases)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-case timeout in seconds")
+    parser.add_argument("--headed", action="store_true", help="show the browser windows")
+    parser.add_argument("--no-auth-cache", action="store_true", help="sign in through the form in every case")
+    parser.add_argument("--no-perf", action="store_true", help="skip the page performance probe")
+    parser.add_argument("--warm", action="store_true", help="reset and reuse contexts between cases")
+    parser.add_argument("--serve-build", action="store_true",
+                        help="build dist/ if stale and test against it instead of the dev server")
+    parser.add_argument("--trace-on-failure", action="store_true",
+                        help="keep a rolling trace and save it for cases that do not pass")
+    parser.add_argument("--video-on-failure", action="store_true",
+                        help="record video, keep it only on failure (not with --warm)")
+    parser.add_argument("--trace-window", type=float, default=artifacts.DEFAULT_WINDOW_S, metavar="SECONDS",
+                        help="seconds of trace kept before a failure (default: %(default)s)")
+    parser.add_argument("--artifact-quota-mb", type=float, default=artifacts.DEFAULT_QUOTA_MB,
+                        help="disk quota for tmp/artifacts, least recently used evicted (default: %(default)s)")
+    parser.add_argument("--static-port", type=int, default=static.DEFAULT_PORT, help="port for --serve-build")
+    parser.add_argument("--geocache", nargs="?", const="live", choices=["live", "standin"], metavar="UPSTREAM",
+                        help="answer ViaCEP and Google geocoding from the local cache (harness.geocache); "
+                             "upstream live (default) or standin")
+    parser.add_argument("--geocache-port", type=int, default=geocache.DEFAULT_PORT, help="port for --geocache")
+    parser.add_argument("--changed", nargs="?", const=impact.DEFAULT_BASE, metavar="BASE",
+                        help="run only the TCs affected by changes since BASE (see harness.impact)")
+    parser.add_argument("--no-store", action="store_true", help="do not append the run to tmp/results.db")
+    parser.add_argument("--label", help="free-form label stored with the run")
+    parser.add_argument("--retries", type=int, default=flaky.DEFAULT_RETRIES,
+                        help="retries per failed flaky case (default: %(default)s)")
+    parser.add_argument("--retry-budget", type=float, default=flaky.DEFAULT_BUDGET_S, metavar="SECONDS",
+                        help="case time all retries may take together (default: %(default)s)")
+    parser.add_argument("--quarantine-threshold", type=float, default=flaky.DEFAULT_THRESHOLD, metavar="SCORE",
+                        help="flakiness score that quarantines a case; 0 disables (default: %(default)s)")
+    parser.add_argument("--quarantine", action="append", default=[], metavar="TC",
+                        help="always quarantine this case (repeatable)")
+    parser.add_argument("--skip-quarantined", action="store_true", help="do not run the quarantine lane")
+    network = parser.add_mutually_exclusive_group()
+    network.add_argument(
+        "--offline", nargs="?", type=Path, const=mocks.FIXTURES_DIR, metavar="FIXTURES_DIR",
+        help="serve Supabase from HAR fixtures instead of the network",
+    )
+    network.add_argument("--record", nargs="?", type=Path, const=har.ARCHIVE_DIR, metavar="ARCHIVE_DIR",
+                         help="record each case's traffic into a HAR archive")
+    network.add_argument("--replay", nargs="?", type=Path, const=har.ARCHIVE_DIR, metavar="ARCHIVE_DIR",
+                         help="serve recorded traffic back instead of the network")
+    parser.add_argument("--latency", type=har.latency_scale, default=0.0, metavar="MODE",
+                        help="offline/replay latency: original, zero (default) or a factor")
+    return parser
+
+
+def network_options(args: argparse.Namespace) -> tuple[mocks.SupabaseMock | None, Callable | None, har.Archive | None]:
+    """The mock, context hook and recording archive selected by ``args``."""
+    mock = network = None
+    if args.offline:
+        mock = mocks.SupabaseMock(mocks.FixtureStore.from_dir(args.offline), args.latency)
+        network = functools.partial(mocks.install, mock=mock)
+    elif args.replay:
+        replayer = har.replayer(har.Archive(args.replay), args.latency)
+        mock, network = replayer.mock, replayer.install
+    archive = har.Archive(args.record) if args.record else None
+    return mock, network, archive
+
+
+def capture_options(args: argparse.Namespace) -> artifacts.Capture | None:
+    """Failure capture selected by ``args``, or None."""
+    if not (args.trace_on_failure or args.video_on_failure):
+        return None
+    store = artifacts.ArtifactStore(quota_bytes=int(args.artifact_quota_mb * 2**20))
+    return artifacts.Capture(store, args.trace_on_failure, args.video_on_failure, args.trace_window)
+
+
+def print_network_summary(mock: mocks.SupabaseMock | None, archive: har.Archive | None) -> None:
+    if mock is not None:
+        print(f"offline: {mock.served} from fixtures, {mock.synthesized} synthesized, {len(mock.misses)} unmatched")
+        for miss in sorted(set(mock.misses))[:20]:
+            print("        " + miss)
+    if archive is not None:
+        print(f"recorded: {archive.new_blobs} new bodies, {archive.reused_blobs} deduplicated -> {archive.directory}")
+
+
+def retry_flaky(
+    results: list[TestResult],
+    cases: list[TestCase],
+    flakiness: flaky.Flakiness,
+    args: argparse.Namespace,
+    suite: Callable[..., Awaitable[list[TestResult]]],
+) -> list[TestResult]:
+    """Rerun failed flaky cases one at a time within the retry budget.
+
+    Each round is stored as a run of its own (source ``runner:retry``);
+    returns ``results`` with the retried cases replaced by their last attempt.
+    """
+    by_id = {r.test_id: r for r in results}
+    by_case = {c.test_id: c for c in cases}
+    budget = flaky.RetryBudget(args.retry_budget, args.retries)
+    expected = {t: r.duration_s for t, r in by_id.items()}
+    for _ in range(args.retries):
+        failed = [t for t, r in by_id.items() if r.status != "passed" and flakiness.is_flaky(t)]
+        chosen = budget.pick(failed, expected)
+        if not chosen:
+            break
+        print(f"retrying {' '.join(chosen)} ({budget.seconds - budget.spent_s:.0f}s of retry budget left)")
+        started_at = time.time()
+        t0 = time.perf_counter()
+        retried = asyncio.run(suite([by_case[t] for t in chosen], 1))
+        for r in retried:
+            budget.charge(r.test_id, r.duration_s)
+            r.lane = by_id[r.test_id].lane
+            r.attempts = by_id[r.test_id].attempts + 1
+            by_id[r.test_id] = r
+        if not args.no_store:
+            store_run(retried, cases, started_at, time.perf_counter() - t0, args, source="runner:retry")
+    return [by_id[r.test_id] for r in results]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.warm and args.video_on_failure:
+        # Video recording is fixed when a context is created, and warm contexts outlive their cases.
+        parser.error("--video-on-failure needs a fresh context per case; drop --warm")
+    if args.changed:
+        selection = impact.select_changed(args.changed, args.test_ids or None)
+        if not selection.test_ids:
+            print(f"no TC affected by changes since {args.changed}")
+            return 0
+        print(f"{'full suite' if selection.full else 'affected'}: {' '.join(selection.test_ids)}")
+        args.test_ids = selection.test_ids
+    cases = discover(args.test_ids)
+    concurrency = args.concurrency or default_concurrency(args.per_core)
+    mock, network, archive = network_options(args)
+    suite = functools.partial(
+        run_suite,
+        browsers=args.browsers,
+        timeout=args.timeout,
+        headless=not args.headed,
+        auth_cache=not args.no_auth_cache,
+        probe=not args.no_perf,
+        network=network,
+        archive=archive,
+        warm=args.warm,
+        capture=capture_options(args),
+        hooks=[functools.partial(geocache.install, url=geocache.service_url(args.geocache_port))] if args.geocache else [],
+    )
+    flakiness = flaky.assess(args.quarantine_threshold, pinned=args.quarantine)
+    main_lane = [c for c in cases if c.test_id not in flakiness.quarantined]
+    quarantine_lane = [c for c in cases if c.test_id in flakiness.quarantined]
+    for case in quarantine_lane:
+        print(f"quarantined {case.test_id}: {flakiness.quarantined[case.test_id]}")
+
+    with contextlib.ExitStack() as stack:
+        served = geo = None
+        if args.serve_build:
+            if static.build():
+                print(f"built {static.DIST_DIR}")
+            served = stack.enter_context(static.serve(port=args.static_port))
+        geo = stack.enter_context(geocache.serve(args.geocache_port, args.geocache)) if args.geocache else None
+        started_at = time.time()
+        t0 = time.perf_counter()
+        results = asyncio.run(suite(main_lane, concurrency))
+        if quarantine_lane and not args.skip_quarantined:
+            # One case at a time, after the main lane, so it never competes with it.
+            lane = asyncio.run(suite(quarantine_lane, 1))
+            for r in lane:
+                r.lane = "quarantine"
+            results += lane
+        wall_s = time.perf_counter() - t0
+        write_results(results, wall_s)
+        if not args.no_store:
+            store_run(results, cases, started_at, wall_s, args)
+        if args.retries:
+            results = retry_flaky(results, cases, flakiness, args, suite)
+            write_results(results, wall_s)
+    if not args.no_perf:
+        perf.write_report({r.test_id: r.perf_samples for r in results})
+    print_summary(results, wall_s)
+    print_locator_summary(results)
+    print_network_summary(mock, archive)
+    if served is not None:
+        print(static.summary(served))
+    if geo is not None:
+        print(geocache.summary(geo))
+    for r in sorted(results, key=lambda r: r.test_id):
+        if r.artifacts:
+            print(f"artifacts {r.test_id}: {os.path.relpath(r.artifacts)}")
+    return 0 if all(r.status == "passed" for r in results if r.lane == "main") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""Spread the TC suite over worker processes and hosts.
+
+One runner process drives every browser from a single asyncio loop, which
+stops scaling once the plan outgrows a core or two.  Here a coordinator
+holds the selected cases in a queue (:mod:`harness.workqueue`), longest
+first by their median duration in ``tmp/results.db`` (cases without
+history go first, at the median of the others), and workers lease one
+case at a time over HTTP.
+Pulling the longest remaining case whenever a slot frees up is the
+classic LPT schedule, so shards end up balanced by time, not by count.
+Leases expire after the case timeout and are handed out again, so a dead
+worker only delays its cases.  The coordinator merges everything into the
+usual ``tmp/run_results.json`` / ``tmp/perf_results.json`` and one run in
+the result store.
+
+Runner options (``--offline``, ``--concurrency``, ``--no-perf`` ...) are
+accepted after the shard options and apply to every worker; ``--changed``
+narrows the queued cases and the flaky policy (quarantine lane, retries
+within ``--retry-budget``, see :mod:`harness.flaky`) is applied by the
+coordinator, the same way as in a runner run::
+
+    python -m harness.shard run --shards 4 --concurrency 2
+    python -m harness.shard serve --host 0.0.0.0 --port 8765 TC004 TC008
+    python -m harness.shard work http://coordinator:8765 --concurrency 4
+    python -m harness.shard plan --shards 3
+
+Every host needs the same checkout of ``testsprite_tests`` and access to
+the app under test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import math
+import os
+import socket
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Sequence
+
+from . import flaky, impact, locators, perf, runner, static
+from .auth import AuthCache, auth_dir
+from .config import BASE_URL_ENV, SUITE_DIR
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .pool import BrowserPool
+from .warm import WarmPool
+from .results import ResultStore
+from .workqueue import WorkQueue, balance
+
+DEFAULT_DURATION_S = 60.0
+POLL_S = 1.0
+
+
+def expected_durations(test_ids: list[str]) -> dict[str, float]:
+    """Historical median per test; unknown tests get the median of the rest."""
+    try:
+        with ResultStore() as store:
+            history = store.durations()
+    except Exception:
+        history = {}
+    known = [history[t] for t in test_ids if t in history]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION_S
+    return {t: history.get(t, fallback) for t in test_ids}
+
+
+def serve(queue: WorkQueue, host: str, port: int) -> HttpServer:
+    """The coordinator's HTTP API over ``queue``."""
+    server = HttpServer(host, port, cors=False)
+
+    async def lease(request: Request) -> Response:
+        if queue.closed:
+            return Response(410, {"done": True})
+        leased = queue.lease(request.json()["worker"])
+        if leased is None:
+            return Response(204)
+        return Response(200, {"test_id": leased.test_id, "attempt": leased.attempt})
+
+    async def result(request: Request) -> Response:
+        body = request.json()
+        accepted = queue.complete(body["worker"], runner.TestResult(**body["result"]), body["attempt"])
+        return Response(200, {"accepted": accepted, "remaining": len(queue.pending) + len(queue.leases)})
+
+    async def status(request: Request) -> Response:
+        return Response(200, {
+            "pending": queue.pending,
+            "leased": {t: lease.worker for t, lease in queue.leases.items()},
+            "finished": sorted(queue.results),
+        })
+
+    server.route("POST", r"/lease", lease)
+    server.route("POST", r"/result", result)
+    server.route("GET", r"/status", status)
+    return server
+
+
+# --------------------------------------------------------------------------
+# Worker
+
+
+async def work(url: str, args: argparse.Namespace, name: str) -> int:
+    """Lease and run cases from the coordinator at ``url`` until it is done."""
+    cases = {c.test_id: c for c in runner.discover()}
+    concurrency = args.concurrency or runner.default_concurrency(args.per_core)
+    browsers = args.browsers or max(1, math.ceil(concurrency / 4))
+    mock, network, archive = runner.network_options(args)
+    client = HttpClient(url, max_connections=concurrency)
+    ran = 0
+
+    async with BrowserPool(browsers, math.ceil(concurrency / browsers), headless=not args.headed) as pool:
+        if network is not None:
+            pool.context_hooks.append(network)
+        cache = None
+        if not args.no_auth_cache:
+            cache = AuthCache(pool, auth_dir(offline=network is not None))
+        contexts = WarmPool(pool, concurrency, cache) if args.warm else None
+        capture = runner.capture_options(args)
+
+        async def slot() -> None:
+            nonlocal ran
+            while True:
+                try:
+                    response = await client.request("POST", "/lease", json={"worker": name})
+                except OSError:
+                    # The coordinator finished and went away.
+                    return
+                if response.status == 410:
+                    return
+                if response.status == 204:
+                    await asyncio.sleep(POLL_S)
+                    continue
+                leased = response.json()
+                case = cases[leased["test_id"]]
+                result = await runner.run_case(
+                    pool, cache, case, args.timeout, not args.no_perf, archive, contexts, capture
+                )
+                await client.request("POST", "/result",
+                                     json={"worker": name, "attempt": leased["attempt"], "result": asdict(result)})
+                ran += 1
+                print(f"[{name}] {result.test_id} {result.status} in {result.duration_s:.1f}s", flush=True)
+
+        try:
+            await asyncio.gather(*(slot() for _ in range(concurrency)))
+        finally:
+            await client.close()
+            locators.save_cache()
+            if contexts is not None:
+                await contexts.close()
+                print(f"[{name}] {contexts.stats.summary()}")
+    runner.print_network_summary(mock, archive)
+    return ran
+
+
+# --------------------------------------------------------------------------
+# Coordinator
+
+
+@dataclass
+class Sharded:
+    """What :func:`coordinate` ran: first attempts, then each retry round."""
+
+    queue: WorkQueue
+    first: list[runner.TestResult]
+    wall_s: float
+    retries: list[tuple[list[runner.TestResult], float, float]] = field(default_factory=list)  # results, started_at, wall_s
+
+
+async def coordinate(host: str, port: int, args: argparse.Namespace, shards: int = 0,
+                     worker_args: Sequence[str] = ()) -> Sharded:
+    """Queue the main lane, then the quarantine lane and flaky retries one case at a time (harness.flaky)."""
+    cases = runner.discover(args.test_ids)
+    if not cases:
+        raise SystemExit("no cases selected; nothing to shard")
+    flakiness = flaky.assess(args.quarantine_threshold, pinned=args.quarantine)
+    main_ids = [c.test_id for c in cases if c.test_id not in flakiness.quarantined]
+    quarantined = [c.test_id for c in cases if c.test_id in flakiness.quarantined]
+    for test_id in quarantined:
+        print(f"quarantined {test_id}: {flakiness.quarantined[test_id]}")
+    durations = expected_durations(main_ids)
+    queue = WorkQueue(sorted(durations, key=lambda t: (-durations[t], t)), lease_s=args.timeout + 60)
+    t0 = time.perf_counter()
+    async with serve(queue, host, port) as server:
+        print(f"coordinator on {server.url}: {len(cases)} cases, ~{sum(durations.values()):.0f}s of work", flush=True)
+        procs = []
+        for index in range(shards):
+            procs.append(await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "harness.shard", "work", server.url,
+                "--name", f"shard-{index + 1}", *worker_args, cwd=SUITE_DIR,
+            ))
+        waiters = [asyncio.ensure_future(p.wait()) for p in procs]
+
+        async def settle() -> None:
+            done = asyncio.ensure_future(queue.done.wait())
+            while not done.done():
+                await asyncio.wait([done, *waiters], return_when=asyncio.FIRST_COMPLETED)
+                if procs and all(w.done() for w in waiters) and not done.done():
+                    done.cancel()
+                    raise SystemExit(f"all workers exited with {len(queue.pending) + len(queue.leases)} cases left")
+
+        await settle()
+        if quarantined and not args.skip_quarantined:
+            # After the main lane and one at a time, as in runner.main.
+            queue.extend(quarantined, serial=True)
+            await settle()
+            for test_id in quarantined:
+                queue.results[test_id].lane = "quarantine"
+        sharded = Sharded(queue, [queue.results[t] for t in sorted(queue.results)], time.perf_counter() - t0)
+
+        by_id = dict(queue.results)
+        budget = flaky.RetryBudget(args.retry_budget, args.retries)
+        expected = {t: r.duration_s for t, r in by_id.items()}
+        for _ in range(args.retries):
+            failed = [t for t, r in by_id.items() if r.status != "passed" and flakiness.is_flaky(t)]
+            chosen = budget.pick(failed, expected)
+            if not chosen:
+                break
+            print(f"retrying {' '.join(chosen)} ({budget.seconds - budget.spent_s:.0f}s of retry budget left)", flush=True)
+            started_at, t1 = time.time(), time.perf_counter()
+            queue.extend(chosen, serial=True)
+            await settle()
+            retried = [queue.results[t] for t in chosen]
+            for r in retried:
+                budget.charge(r.test_id, r.duration_s)
+                r.lane = by_id[r.test_id].lane
+                r.attempts = by_id[r.test_id].attempts + 1
+                by_id[r.test_id] = r
+            sharded.retries.append((retried, started_at, time.perf_counter() - t1))
+
+        # Let workers see the 410 and shut their browsers down.
+        queue.closed = True
+        if waiters:
+            await asyncio.gather(*waiters)
+        else:
+            await asyncio.sleep(2 * POLL_S)
+    return sharded
+
+
+def report(sharded: Sharded, args: argparse.Namespace, started_at: float) -> int:
+    queue, wall_s = sharded.queue, sharded.wall_s
+    results = [queue.results[t] for t in sorted(queue.results)]
+    runner.write_results(results, wall_s)
+    workers = sorted(set(queue.worker_of.values()))
+    if not args.no_store:
+        cases = runner.discover([r.test_id for r in results])
+        runner.store_run(sharded.first, cases, started_at, wall_s, args, source=f"shard:{len(workers)}")
+        for retried, retry_started_at, retry_wall_s in sharded.retries:
+            runner.store_run(retried, cases, retry_started_at, retry_wall_s, args, source="shard:retry")
+    if not args.no_perf:
+        perf.write_report({r.test_id: r.perf_samples for r in results})
+    runner.print_summary(results, wall_s)
+    runner.print_locator_summary(results)
+    print()
+    for worker in workers:
+        mine = [r for r in results if queue.worker_of[r.test_id] == worker]
+        print(f"{worker:<24} {len(mine):3d} cases  {sum(r.duration_s for r in mine):7.1f}s")
+    if queue.requeued:
+        print(f"{queue.requeued} expired lease(s) were requeued")
+    if queue.stale:
+        print(f"{queue.stale} result(s) from superseded attempts were ignored")
+    return 0 if all(r.status == "passed" for r in results if r.lane == "main") else 1
+
+
+def _split(argv: list[str] | None) -> tuple[argparse.Namespace, argparse.Namespace, list[str]]:
+    parser = argparse.ArgumentParser(prog="python -m harness.shard", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="coordinator plus local worker processes")
+    run.add_argument("--shards", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    serve = sub.add_parser("serve", help="coordinator only; workers join from other hosts")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8765)
+    work_parser = sub.add_parser("work", help="lease cases from a coordinator")
+    work_parser.add_argument("url")
+    work_parser.add_argument("--name", default=f"{socket.gethostname()}:{os.getpid()}")
+    plan = sub.add_parser("plan", help="print the duration-balanced split")
+    plan.add_argument("--shards", type=int, default=2)
+    own, rest = parser.parse_known_args(argv)
+    return own, runner.build_parser().parse_args(rest), rest
+
+
+def _served(args: argparse.Namespace) -> contextlib.AbstractContextManager:
+    """Serve the build for ``--serve-build`` unless a parent process already does."""
+    if not args.serve_build or BASE_URL_ENV in os.environ:
+        return contextlib.nullcontext()
+    static.build()
+    return static.serve(port=args.static_port)
+
+
+def select_changed(args: argparse.Namespace) -> bool:
+    """Narrow ``args.test_ids`` for ``--changed`` as the runner does; False if nothing is affected."""
+    if not args.changed:
+        return True
+    selection = impact.select_changed(args.changed, args.test_ids or None)
+    if not selection.test_ids:
+        print(f"no TC affected by changes since {args.changed}")
+        return False
+    print(f"{'full suite' if selection.full else 'affected'}: {' '.join(selection.test_ids)}")
+    args.test_ids = selection.test_ids
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    own, args, rest = _split(argv)
+    positional = set(args.test_ids)
+    # Workers lease whatever the coordinator queued; only the coordinator selects.
+    if own.command != "work" and not select_changed(args):
+        return 0
+
+    if own.command == "plan":
+        cases = runner.discover(args.test_ids)
+        durations = expected_durations([c.test_id for c in cases])
+        for index, ids in enumerate(balance(durations, own.shards), 1):
+            print(f"shard {index}: ~{sum(durations[t] for t in ids):6.0f}s  {' '.join(ids)}")
+        return 0
+
+    if own.command == "work":
+        with _served(args):
+            ran = asyncio.run(work(own.url, args, own.name))
+        print(f"[{own.name}] ran {ran} case(s)")
+        return 0
+
+    started_at = time.time()
+    if own.command == "run":
+        # Each worker gets its share of the cores unless told otherwise.
+        worker_args = [a for a in rest if a not in positional]
+        if not args.concurrency:
+            worker_args += ["--concurrency", str(max(1, runner.default_concurrency(args.per_core) // own.shards))]
+        # Workers inherit TESTSPRITE_BASE_URL and use this process's server.
+        with _served(args):
+            sharded = asyncio.run(coordinate("127.0.0.1", 0, args, own.shards, worker_args))
+    else:
+        sharded = asyncio.run(coordinate(own.host, own.port, args))
+    return report(sharded, args, started_at)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Serve the production build to the TC scripts instead of the Vite dev server.
+
+Against ``npm run dev`` every page load pulls hundreds of unbundled modules
+from ``node_modules/.vite/deps``, so case timings measure the dev server.
+Here ``dist/`` is built once (again only when a source is newer than the
+last build) and served by a small static server that behaves like
+production:
+
+* gzip at ``nginx.prod.conf``'s settings, plus brotli when the ``brotli``
+  module is installed, all precompressed at startup;
+* ``Cache-Control: public, immutable`` on the hashed ``/assets`` bundles;
+* ETags and 304s;
+* every other path rewritten to ``index.html``, as ``vercel.json`` does.
+
+The server runs on its own thread so it outlives the runner's event loops,
+and it sets ``TESTSPRITE_BASE_URL``, which the harness (and through
+:func:`harness.config.app_url` the TC scripts) navigates to::
+
+    python -m harness.runner --serve-build
+    python -m harness.static --port 4173          # just serve dist/
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from .config import BASE_URL_ENV, SUITE_DIR
+from .localhttp import HttpServer, Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is what nginx.prod.conf serves anyway
+    brotli = None
+
+REPO_DIR = SUITE_DIR.parent
+DIST_DIR = REPO_DIR / "dist"
+DEFAULT_PORT = 4173  # vite preview's default
+BUILD_INPUTS = ["src", "public", "index.html", "vite.config.ts", "package.json", "tailwind.config.ts",
+                "postcss.config.js", "tsconfig.json", "tsconfig.app.json"]
+
+GZIP_LEVEL = 6
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml",
+                "image/svg+xml", "application/wasm", "application/manifest+json")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _newest_mtime(paths: list[Path]) -> float:
+    newest = 0.0
+    for path in paths:
+        if path.is_file():
+            newest = max(newest, path.stat().st_mtime)
+        elif path.is_dir():
+            for child in path.rglob("*"):
+                if child.is_file():
+                    newest = max(newest, child.stat().st_mtime)
+    return newest
+
+
+def stale(dist: Path = DIST_DIR, repo: Path = REPO_DIR) -> bool:
+    """True when ``dist`` is missing or older than any build input."""
+    index = dist / "index.html"
+    if not index.is_file():
+        return True
+    return _newest_mtime([repo / p for p in BUILD_INPUTS] + list(repo.glob(".env*"))) > index.stat().st_mtime
+
+
+def build(force: bool = False, dist: Path = DIST_DIR, repo: Path = REPO_DIR) -> bool:
+    """Run ``npm run build`` when ``dist`` is stale; returns whether it built."""
+    if not force and not stale(dist, repo):
+        return False
+    npm = "npm.cmd" if os.name == "nt" else "npm"
+    subprocess.run([npm, "run", "build"], cwd=repo, check=True)
+    return True
+
+
+@dataclass
+class Asset:
+    body: bytes
+    content_type: str
+    etag: str
+    cache_control: str
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+def _content_type(path: Path) -> str:
+    guessed = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if path.suffix in (".js", ".mjs"):
+        guessed = "application/javascript"
+    return guessed + ("; charset=utf-8" if guessed.startswith("text/") or guessed.endswith("javascript") else "")
+
+
+def load_assets(dist: Path = DIST_DIR) -> dict[str, Asset]:
+    """Every file under ``dist`` by URL path, compressed where it pays off."""
+    assets = {}
+    for path in sorted(p for p in dist.rglob("*") if p.is_file()):
+        rel = "/" + path.relative_to(dist).as_posix()
+        body = path.read_bytes()
+        content_type = _content_type(path)
+        # Vite puts content-hashed bundles under /assets; everything else may change.
+        cache_control = IMMUTABLE if rel.startswith("/assets/") else "no-cache"
+        asset = Asset(body, content_type, '"' + hashlib.sha1(body).hexdigest()[:16] + '"', cache_control)
+        if len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE):
+            asset.encoded["gzip"] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                asset.encoded["br"] = brotli.compress(body)
+        assets[rel] = asset
+    if "/index.html" not in assets:
+        raise FileNotFoundError(f"{dist / 'index.html'} not found; build the app first")
+    return assets
+
+
+def _accepts(request: Request) -> list[str]:
+    accepted = [e.split(";")[0].strip() for e in request.headers.get("accept-encoding", "").split(",")]
+    return [e for e in ("br", "gzip") if e in accepted]
+
+
+@dataclass
+class StaticStats:
+    requests: int = 0
+    not_modified: int = 0
+    bytes_sent: int = 0
+    bytes_uncompressed: int = 0
+
+
+def site(assets: dict[str, Asset], host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+         stats: StaticStats | None = None) -> HttpServer:
+    """An :class:`HttpServer` answering GETs from ``assets``."""
+    server = HttpServer(host, port, cors=False)
+    stats = stats if stats is not None else StaticStats()
+
+    async def get(request: Request) -> Response:
+        asset = assets.get(request.path) or assets.get(request.path.rstrip("/") + "/index.html")
+        if asset is None:
+            if os.path.splitext(request.path)[1] and request.path.startswith("/assets/"):
+                return Response(404, "not found")
+            asset = assets["/index.html"]
+        stats.requests += 1
+        headers = {
+            "content-type": asset.content_type,
+            "cache-control": asset.cache_control,
+            "etag": asset.etag,
+            "vary": "accept-encoding",
+            "x-content-type-options": "nosniff",
+        }
+        if request.headers.get("if-none-match") == asset.etag:
+            stats.not_modified += 1
+            return Response(304, b"", headers)
+        body = asset.body
+        for encoding in _accepts(request):
+            if encoding in asset.encoded:
+                body = asset.encoded[encoding]
+                headers["content-encoding"] = encoding
+                break
+        stats.bytes_sent += len(body)
+        stats.bytes_uncompressed += len(asset.body)
+        return Response(200, body, headers)
+
+    server.route("GET", r"/.*", get)
+    return server
+
+
+@contextmanager
+def serve(dist: Path = DIST_DIR, port: int = DEFAULT_PORT, host: str = "127.0.0.1") -> Iterator[StaticStats]:
+    """Serve ``dist`` on a background thread and point the harness at it."""
+    assets = load_assets(dist)
+    stats = StaticStats()
+    loop = asyncio.new_event_loop()
+    server = site(assets, host, port, stats)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, name="harness-static", daemon=True)
+    thread.start()
+    previous = os.environ.get(BASE_URL_ENV)
+    os.environ[BASE_URL_ENV] = server.url
+    try:
+        yield stats
+    finally:
+        if previous is None:
+            os.environ.pop(BASE_URL_ENV, None)
+        else:
+            os.environ[BASE_URL_ENV] = previous
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+
+
+def summary(stats: StaticStats) -> str:
+    ratio = stats.bytes_sent / stats.bytes_uncompressed if stats.bytes_uncompressed else 1.0
+    return (f"static: {stats.requests} requests ({stats.not_modified} not modified), "
+            f"{stats.bytes_sent / 1e6:.1f} MB sent ({ratio:.0%} of uncompressed)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.static", description=__doc__.splitlines()[0])
+    parser.add_argument("--dist", type=Path, default=DIST_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--build", action="store_true", help="rebuild first even if dist/ is up to date")
+    parser.add_argument("--no-build", action="store_true", help="serve dist/ as it is")
+    args = parser.parse_args(argv)
+
+    if not args.no_build:
+        build(args.build, args.dist)
+    assets = load_assets(args.dist)
+
+    async def run() -> None:
+        async with site(assets, args.host, args.port) as server:
+            print(f"serving {args.dist} ({len(assets)} files) on {server.url}", flush=True)
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
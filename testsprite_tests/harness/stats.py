@@ -0,0 +1,68 @@
+"""Small statistics helpers shared by the benchmarks and load generators."""
+
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float | None:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(latencies_s: Sequence[float], elapsed_s: float | None = None) -> dict:
+    """p50/p95/p99/max in milliseconds, plus throughput when ``elapsed_s`` is given."""
+    ms = [v * 1000 for v in latencies_s]
+
+    def r(v):
+        return None if v is None else round(v, 2)
+
+    summary = {
+        "count": len(ms),
+        "p50_ms": r(percentile(ms, 50)),
+        "p95_ms": r(percentile(ms, 95)),
+        "p99_ms": r(percentile(ms, 99)),
+        "max_ms": r(max(ms)) if ms else None,
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = round(len(ms) / elapsed_s, 2)
+    return summary
+
+
+def mann_whitney_u(sample: Sequence[float], baseline: Sequence[float]) -> tuple[float, float]:
+    """One-sided Mann-Whitney U test that ``sample`` tends to exceed ``baseline``.
+
+    Returns ``(U, p)`` using the normal approximation with tie and
+    continuity corrections, which is adequate from about five samples each.
+    """
+    n1, n2 = len(sample), len(baseline)
+    if not n1 or not n2:
+        raise ValueError("both samples must be non-empty")
+    pooled = sorted((v, i < n1) for i, v in enumerate(list(sample) + list(baseline)))
+    ranks_sample = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        ranks_sample += rank * sum(1 for k in range(i, j + 1) if pooled[k][1])
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    u = ranks_sample - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
@@ -0,0 +1,352 @@
+"""Deterministic synthetic data shaped like the app's Supabase rows.
+
+Generators take an explicit ``seed`` so a given size always produces the
+same rows; benchmarks stay comparable across runs and machines.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import random
+import uuid
+from typing import Iterator
+
+# (city, state, lat, lng, relative weight) - weights loosely follow where
+# the screen inventory is concentrated.
+BRAZILIAN_CITIES = [
+    ("São Paulo", "SP", -23.5505, -46.6333, 30),
+    ("Rio de Janeiro", "RJ", -22.9068, -43.1729, 14),
+    ("Belo Horizonte", "MG", -19.9167, -43.9345, 8),
+    ("Brasília", "DF", -15.7939, -47.8828, 6),
+    ("Curitiba", "PR", -25.4284, -49.2733, 6),
+    ("Porto Alegre", "RS", -30.0346, -51.2177, 5),
+    ("Salvador", "BA", -12.9714, -38.5014, 5),
+    ("Recife", "PE", -8.0476, -34.8770, 4),
+    ("Fortaleza", "CE", -3.7319, -38.5267, 4),
+    ("Goiânia", "GO", -16.6869, -49.2648, 3),
+    ("Campinas", "SP", -22.9099, -47.0626, 3),
+    ("Florianópolis", "SC", -27.5954, -48.5480, 2),
+    ("Manaus", "AM", -3.1190, -60.0217, 2),
+    ("Belém", "PA", -1.4558, -48.4902, 2),
+    ("Vitória", "ES", -20.3155, -40.3128, 2),
+    ("Natal", "RN", -5.7945, -35.2110, 1),
+    ("Campo Grande", "MS", -20.4697, -54.6201, 1),
+    ("Cuiabá", "MT", -15.6014, -56.0979, 1),
+]
+
+SCREEN_CLASSES = ["A", "AB", "B", "C", "D", "ND"]
+CLASS_WEIGHTS = [20, 25, 25, 15, 5, 10]
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def pick_city(rng: random.Random) -> tuple[str, str, float, float]:
+    city, state, lat, lng, _ = rng.choices(BRAZILIAN_CITIES, weights=[c[4] for c in BRAZILIAN_CITIES])[0]
+    return city, state, lat, lng
+
+
+def jitter(rng: random.Random, lat: float, lng: float, km: float = 8.0) -> tuple[float, float]:
+    """Gaussian offset of roughly ``km`` standard deviation around a point."""
+    deg = km / 111.0
+    return round(lat + rng.gauss(0, deg), 6), round(lng + rng.gauss(0, deg), 6)
+
+
+# First CEP digit -> postal region, placed on one of its larger cities.
+CEP_REGIONS = {
+    "0": "São Paulo", "1": "Campinas", "2": "Rio de Janeiro", "3": "Belo Horizonte", "4": "Salvador",
+    "5": "Recife", "6": "Fortaleza", "7": "Brasília", "8": "Curitiba", "9": "Porto Alegre",
+}
+
+
+def cep_city(cep: str) -> tuple[str, str, float, float]:
+    """``(city, state, lat, lng)`` of the postal region of ``cep`` (digits or ``XXXXX-XXX``)."""
+    city = next(c for c in BRAZILIAN_CITIES if c[0] == CEP_REGIONS[cep[0]])
+    return city[:4]
+
+
+def cep_point(cep: str, seed: int = 1) -> tuple[float, float]:
+    """A point near ``cep``'s region city, the same one for the same CEP and seed."""
+    _, _, lat, lng = cep_city(cep)
+    return jitter(random.Random(f"{seed}:{cep}"), lat, lng, km=12.0)
+
+
+def viacep_address(cep: str) -> dict:
+    """A ViaCEP ``/ws/<cep>/json/`` body for ``cep`` (8 digits)."""
+    city, state, _, _ = cep_city(cep)
+    return {
+        "cep": f"{cep[:5]}-{cep[5:]}", "logradouro": f"Rua {int(cep[5:]) + 1}", "complemento": "",
+        "bairro": f"Setor {cep[2:5]}", "localidade": city, "uf": state, "ibge": "", "gia": "", "ddd": "",
+        "siafi": "",
+    }
+
+
+def screen_rows(count: int, seed: int = 42) -> list[dict]:
+    """Rows as returned by the InteractiveMap ``screens`` select.
+
+    About a third of the screens have proposals, with a long-tailed count,
+    which is what the heatmap layer plots.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        city, state, lat, lng = pick_city(rng)
+        lat, lng = jitter(rng, lat, lng)
+        proposals = int(rng.paretovariate(1.5)) if rng.random() < 0.35 else 0
+        rows.append({
+            "id": _uuid(rng),
+            "code": f"P{i + 1:06d}",
+            "name": f"Tela {i + 1}",
+            "display_name": f"Clínica {city} {i + 1}",
+            "city": city,
+            "state": state,
+            "class": rng.choices(SCREEN_CLASSES, weights=CLASS_WEIGHTS)[0],
+            "active": rng.random() < 0.9,
+            "lat": lat,
+            "lng": lng,
+            "venue_id": _uuid(rng),
+            "audience_monthly": rng.randint(500, 20000),
+            "audiencia_pacientes": rng.randint(100, 5000),
+            "audiencia_local": rng.randint(50, 2000),
+            "proposal_screens": [{"count": proposals}],
+        })
+    return rows
+
+
+def proposal_row(screen_count: int, proposal_id: int = 1, seed: int = 42) -> dict:
+    """A proposal as selected by ``generate-proposal-pdf``, with nested screens."""
+    rng = random.Random(seed * 100003 + screen_count)
+    screens = screen_rows(screen_count, seed)
+    days = rng.randint(7, 90)
+    impacts = sum(s["audience_monthly"] for s in screens) * days // 30
+    gross = round(impacts / 1000 * 25.0, 2)
+    discount = rng.choice([0, 5, 10, 15])
+    return {
+        "id": proposal_id,
+        "customer_name": f"Agência Exemplo {proposal_id}",
+        "customer_email": f"contato{proposal_id}@example.com",
+        "proposal_type": rng.choice(["avulsa", "projeto"]),
+        "status": rng.choice(["rascunho", "enviada", "em_analise", "aceita"]),
+        "start_date": "2025-03-01",
+        "end_date": "2025-05-31",
+        "created_at": "2025-02-20T12:00:00Z",
+        "updated_at": "2025-02-21T12:00:00Z",
+        "insertions_per_hour": rng.choice([4, 6, 8, 12]),
+        "film_seconds": rng.choice([15, 30]),
+        "cpm_mode": rng.choice(["manual", "blended"]),
+        "cpm_value": 25.0,
+        "discount_pct": discount,
+        "discount_fixed": 0,
+        "days_calendar": days,
+        "days_business": days * 5 // 7,
+        "impacts_calendar": impacts,
+        "impacts_business": impacts * 5 // 7,
+        "gross_calendar": gross,
+        "gross_business": round(gross * 5 / 7, 2),
+        "net_calendar": round(gross * (1 - discount / 100), 2),
+        "net_business": round(gross * 5 / 7 * (1 - discount / 100), 2),
+        "proposal_screens": [{
+            "id": i + 1,
+            "screen_id": s["id"],
+            "custom_cpm": round(rng.uniform(18, 40), 2) if rng.random() < 0.2 else None,
+            "screens": {
+                "id": s["id"],
+                "name": s["name"],
+                "venue_id": s["venue_id"],
+                "city": s["city"],
+                "state": s["state"],
+                "address": f"Rua {rng.randint(1, 999)}, {s['city']}",
+                "class": s["class"],
+                "venues": {"name": s["display_name"], "type": rng.choice(["clinica", "hospital", "laboratorio"])},
+            },
+        } for i, s in enumerate(screens)],
+    }
+
+
+# --------------------------------------------------------------------------
+# Database rows for harness.seed: integer keys as in the migrations, and
+# generators so the 100x scale never has to sit in memory at once.
+
+# Rough production volumes; harness.seed multiplies them.
+BASE_VOLUME = {
+    "agencias": 30,
+    "agencia_projetos": 90,
+    "venues": 1200,
+    "screens": 2000,
+    "proposals": 600,
+}
+VENUE_KINDS = ["Clínica", "Hospital", "Laboratório", "Consultório", "Centro Médico"]
+SPECIALTIES = ["Cardiologia", "Dermatologia", "Ginecologia", "Oftalmologia", "Ortopedia", "Pediatria",
+               "Clínica Geral", "Odontologia", "Endocrinologia", "Neurologia"]
+PROJECT_STATUSES = ["ativo", "pausado", "concluido", "cancelado"]
+PROPOSAL_STATUSES = ["rascunho", "enviada", "em_analise", "aceita", "rejeitada"]
+SEED_USER_ID = str(uuid.uuid5(uuid.NAMESPACE_URL, "mailto:seed@tvdoutor.test"))
+
+
+def table_rng(seed: int, table: str) -> random.Random:
+    """One stream per table, so changing one table's size leaves the others alone."""
+    return random.Random(f"{seed}:{table}")
+
+
+def agency_records(count: int, seed: int = 42) -> Iterator[dict]:
+    rng = table_rng(seed, "agencias")
+    for i in range(count):
+        city, state, _, _ = pick_city(rng)
+        yield {
+            "id": _uuid(rng),
+            "nome_agencia": f"Agência {city} {i + 1}",
+            "codigo_agencia": f"AG{i + 1:05d}",
+            "cnpj": f"{rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{i % 100:02d}",
+            "email_empresa": f"contato{i + 1}@agencia.example.com",
+            "cidade": city,
+            "estado": state,
+            "taxa_porcentagem": rng.choice([0, 5, 10, 15, 20]),
+            "created_by": SEED_USER_ID,
+        }
+
+
+def project_records(count: int, agency_ids: list[str], seed: int = 42) -> Iterator[dict]:
+    rng = table_rng(seed, "agencia_projetos")
+    for i in range(count):
+        budget = round(rng.lognormvariate(11, 0.8), 2)
+        start = rng.randint(0, 330)
+        yield {
+            "id": _uuid(rng),
+            "nome_projeto": f"Projeto {i + 1}",
+            "agencia_id": agency_ids[i % len(agency_ids)],
+            "status_projeto": rng.choices(PROJECT_STATUSES, weights=[60, 10, 25, 5])[0],
+            "orcamento_projeto": budget,
+            "valor_gasto": round(budget * rng.random(), 2),
+            "data_inicio": f"2025-{start // 30 % 12 + 1:02d}-{start % 28 + 1:02d}",
+            "data_fim": f"2026-{start // 30 % 12 + 1:02d}-{start % 28 + 1:02d}",
+            "cliente_final": f"Cliente {rng.randint(1, max(1, count // 3))}",
+            "prioridade": rng.choice(["baixa", "media", "alta"]),
+            "progresso": rng.randint(0, 100),
+            "created_by": SEED_USER_ID,
+        }
+
+
+def venue_records(count: int, seed: int = 42) -> Iterator[dict]:
+    rng = table_rng(seed, "venues")
+    for i in range(count):
+        city, state, lat, lng = pick_city(rng)
+        lat, lng = jitter(rng, lat, lng)
+        yield {
+            "id": i + 1,
+            "code": f"V{i + 1:06d}",
+            "name": f"{rng.choice(VENUE_KINDS)} {city} {i + 1}",
+            "country": "BR",
+            "state": state,
+            "district": city,
+            "lat": lat,
+            "lng": lng,
+        }
+
+
+def db_screen_records(count: int, venues: int, seed: int = 42) -> Iterator[dict]:
+    """``screens`` rows spread over venue ids ``1..venues``, near their venue's city."""
+    rng = table_rng(seed, "screens")
+    for i in range(count):
+        city, state, lat, lng = pick_city(rng)
+        lat, lng = jitter(rng, lat, lng)
+        # The code CHECK allows P + 4-5 digits and an optional .N suffix.
+        code = f"P{i % 99999 + 1:05d}" + (f".{i // 99999}" if i >= 99999 else "")
+        yield {
+            "id": i + 1,
+            "code": code,
+            "name": code,
+            "display_name": f"Tela {city} {i + 1}",
+            "city": city,
+            "state": state,
+            "cep": f"{rng.randint(1000, 99999):05d}-{rng.randint(0, 999):03d}",
+            "lat": lat,
+            "lng": lng,
+            "class": rng.choices(SCREEN_CLASSES, weights=CLASS_WEIGHTS)[0],
+            "specialty": rng.sample(SPECIALTIES, rng.randint(0, 3)),
+            "active": rng.random() < 0.9,
+            "venue_id": rng.randint(1, venues),
+        }
+
+
+def proposal_records(count: int, agency_ids: list[str], project_ids: list[str], seed: int = 42) -> Iterator[dict]:
+    rng = table_rng(seed, "proposals")
+    for i in range(count):
+        agency = rng.random() < 0.6
+        yield {
+            "id": i + 1,
+            "customer_name": f"Cliente {rng.randint(1, max(1, count // 4))}",
+            "customer_email": f"cliente{i + 1}@example.com",
+            "proposal_type": rng.choice(["avulsa", "projeto"]),
+            "status": rng.choices(PROPOSAL_STATUSES, weights=[25, 30, 15, 20, 10])[0],
+            "start_date": "2025-03-01",
+            "end_date": "2025-05-31",
+            "insertions_per_hour": rng.choice([4, 6, 8, 12]),
+            "film_seconds": rng.choice([15, 30]),
+            "cpm_mode": rng.choice(["manual", "blended"]),
+            "cpm_value": 25.0,
+            "discount_pct": rng.choice([0, 5, 10, 15]),
+            "discount_fixed": 0,
+            "filters": {},
+            "quote": {"pricing_mode": "cpm", "pricing_variant": "avulsa"},
+            "created_by": SEED_USER_ID,
+            "agencia_id": rng.choice(agency_ids) if agency and agency_ids else None,
+            "projeto_id": rng.choice(project_ids) if agency and project_ids else None,
+        }
+
+
+def proposal_screen_records(proposals: int, screens: int, seed: int = 42, median: int = 40) -> Iterator[dict]:
+    """Links for every proposal: log-normal screen counts with a tail into the thousands."""
+    rng = table_rng(seed, "proposal_screens")
+    link_id = 0
+    for proposal_id in range(1, proposals + 1):
+        size = min(screens, max(1, int(rng.lognormvariate(0, 1.1) * median)))
+        for screen_id in sorted(rng.sample(range(1, screens + 1), size)):
+            link_id += 1
+            yield {
+                "id": link_id,
+                "proposal_id": proposal_id,
+                "screen_id": screen_id,
+                "custom_cpm": round(rng.uniform(18, 40), 2) if rng.random() < 0.05 else None,
+            }
+
+
+# Timestamps are anchored so a given seed always yields the same players.
+TVD_PLAYERS_AS_OF = dt.datetime(2026, 1, 29, 12, 0, tzinfo=dt.timezone.utc)
+
+
+def iso_z(moment: dt.datetime) -> str:
+    """``Date.prototype.toISOString`` format, as the TVD API and ``index.ts`` emit."""
+    return moment.astimezone(dt.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def tvd_player_records(count: int, seed: int = 42, as_of: dt.datetime = TVD_PLAYERS_AS_OF) -> Iterator[dict]:
+    """``organization.players`` nodes of the TVD GraphQL API (``tvd-sync-players``).
+
+    Most names start with a venue code (``P2000``, ``P2000.01``, ``P2000.F02``),
+    a few are lower-case and some carry no code at all; roughly 85% of the
+    fleet is connected and 1% has never reported in.
+    """
+    rng = table_rng(seed, "tvd_players")
+    for i in range(count):
+        city, _, _, _ = pick_city(rng)
+        code = f"P{1000 + i // 3}" + rng.choice(["", f".{i % 3 + 1:02d}", f".F{i % 3 + 1:02d}"])
+        label = rng.random()
+        if label < 0.03:
+            name = f"Player teste {i + 1}"
+        elif label < 0.08:
+            name = f"{code.lower()} {rng.choice(VENUE_KINDS)} {city}"
+        else:
+            name = f"{code} - {rng.choice(VENUE_KINDS)} {city}"
+        player = {"id": _uuid(rng), "name": name, "isConnected": False,
+                  "lastSeen": None, "lastSync": None, "syncProgress": None}
+        if rng.random() >= 0.01:
+            connected = rng.random() < 0.85
+            seen = as_of - dt.timedelta(seconds=rng.uniform(0, 300) if connected else rng.expovariate(1 / 259200))
+            player.update(
+                isConnected=connected,
+                lastSeen=iso_z(seen),
+                lastSync=iso_z(seen - dt.timedelta(seconds=rng.uniform(0, 3600))),
+                syncProgress=100 if rng.random() < 0.9 else rng.randint(0, 99),
+            )
+        yield player
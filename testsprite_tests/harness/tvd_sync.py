@@ -0,0 +1,717 @@
+"""Fleet-scale simulator for the ``tvd-sync-players`` edge function.
+
+``supabase/functions/tvd-sync-players/index.ts`` walks ``organization.players``
+of the TVD GraphQL API page by page (``TVD_SYNC_PAGE_SIZE``, default 100,
+capped at 500) and awaits one ``upsert`` into ``tvd_player_status`` per page,
+so every page pays a GraphQL round trip *and* an upsert round trip on the
+critical path, and an upsert error aborts the whole run.  This module sizes
+that loop for 10k-200k players before the fleet gets there:
+
+* :class:`PlayerFleet` / :class:`GraphqlStandIn`: ``organization.players``
+  over synthetic players with Relay cursors (keyset, or graphql-relay's
+  offset ``arrayconnection:N``), a latency model, injected HTTP errors,
+  GraphQL ``errors`` and hangs past the function's 15 s abort, and optional
+  churn: players reporting in mid-sync move to the end of the
+  ``LAST_SEEN_AT`` order, so they are fetched twice (keyset) or shift the
+  pages under an offset cursor and get skipped.
+* :class:`StatusTable`: ``POST /rest/v1/tvd_player_status?on_conflict=player_id``
+  with PostgREST upsert semantics, including error ``21000`` when one
+  statement touches a ``player_id`` twice, a per-statement plus per-row
+  cost and a connection pool.  It counts inserted, changed and unchanged
+  rows, so a re-sync of an unchanged fleet must come out as zero inserts
+  and zero changes (``fetched_at`` aside).
+* :data:`STRATEGIES`: ``current`` replays ``index.ts`` (same retry count,
+  backoff and abort timeout, one upsert per page); ``pipelined`` fetches the
+  next page while up to ``--concurrency`` upserts of ``--batch-rows``
+  rows are in flight.  Batches are de-duplicated by ``player_id`` (the
+  latest sighting wins) and retried, which is safe because the upsert is
+  idempotent.  Cursor pages stay sequential in both: ``endCursor`` is the
+  only way to reach the next page.
+
+Each run reports end-to-end time, rows/s, upsert statements, rows per
+statement and upsert cost per 1k rows, fetch/upsert latency, retries,
+coverage of the fleet and whether the run fits the cron interval.  Latencies
+are modelled; ``--time-scale 0.1`` runs everything ten times faster and
+reports modelled seconds (the harness's own CPU time is magnified by the
+same factor, so keep it at 0.1 or above for sizing).  ``--rest`` points the
+upserts at a real PostgREST, e.g. a local ``supabase start``, to calibrate
+the upsert cost; the GraphQL side always stays local.  ``--serve`` exposes
+the stand-in for ``supabase functions serve`` and ``--target`` invokes the
+real function against it.
+
+::
+
+    python -m harness.tvd_sync --players 10000 50000 --page-sizes 100 250 500 --concurrency 1 2 4
+    python -m harness.tvd_sync --players 200000 --time-scale 0.1 --error-rate 0.02 --churn 50
+    python -m harness.tvd_sync --players 50000 --rest http://127.0.0.1:54321 --service-key "$SERVICE_ROLE_KEY"
+    python -m harness.tvd_sync --serve 54410 --players 50000
+    python -m harness.tvd_sync --target http://localhost:54321/functions/v1/tvd-sync-players --cron-secret dev
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import bisect
+import datetime as dt
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from .config import TMP_DIR
+from .heatmap_load import LatencyModel
+from .localhttp import HttpClient, HttpServer, Request, Response
+from .stats import latency_summary
+from .synthetic import iso_z, tvd_player_records
+
+RESULTS_PATH = TMP_DIR / "tvd_sync_results.json"
+TABLE = "tvd_player_status"
+# Mirrors index.ts: page size cap, fetch attempts and AbortController timeout.
+MAX_PAGE_SIZE = 500
+FETCH_RETRIES = 3
+FETCH_TIMEOUT_S = 15.0
+STATUS_COLUMNS = ("player_name", "venue_code", "is_connected", "last_seen", "last_sync", "sync_progress")
+GRAPHQL_QUERY = """
+query PlayersStatus($first: Int!, $after: String) {
+  organization {
+    players(first: $first, after: $after, orderBy: { field: LAST_SEEN_AT }) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        id
+        name
+        isConnected
+        lastSeen
+        lastSync
+        syncProgress
+      }
+    }
+  }
+}
+"""
+AUTH_ERROR = "Authentication is required to access organization field"
+
+
+class SyncError(RuntimeError):
+    pass
+
+
+# --------------------------------------------------------------------------
+# GraphQL stand-in
+
+
+class PlayerFleet:
+    """Players in ``LAST_SEEN_AT`` order (ties on ``id``, never-seen first)."""
+
+    def __init__(self, count: int, seed: int = 1) -> None:
+        self.players = {p["id"]: p for p in tvd_player_records(count, seed)}
+        self.ids = list(self.players)
+        self.order = sorted(self._key(p) for p in self.players.values())
+        self.touched = 0
+
+    @staticmethod
+    def _key(player: dict) -> tuple[str, str]:
+        return player["lastSeen"] or "", player["id"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def page(self, first: int, start: int) -> list[dict]:
+        return [self.players[pid] for _, pid in self.order[start:start + first]]
+
+    def touch(self, rng: random.Random) -> None:
+        """One player reports in: it moves to the end of the order."""
+        player = self.players[rng.choice(self.ids)]
+        del self.order[bisect.bisect_left(self.order, self._key(player))]
+        now = dt.datetime.now(dt.timezone.utc)
+        player["isConnected"] = rng.random() < 0.95
+        player["lastSeen"] = iso_z(now)
+        if rng.random() < 0.3:
+            player["lastSync"] = iso_z(now)
+            player["syncProgress"] = 100 if rng.random() < 0.8 else rng.randint(0, 99)
+        bisect.insort(self.order, self._key(player))
+        self.touched += 1
+
+
+@dataclass
+class ErrorModel:
+    """Share of GraphQL requests that fail, by how they fail."""
+
+    http: float = 0.01
+    graphql: float = 0.0
+    hang: float = 0.0
+
+
+class GraphqlStandIn:
+    """``POST /graphql`` answering ``PlayersStatus`` from a :class:`PlayerFleet`."""
+
+    def __init__(self, fleet: PlayerFleet, latency: LatencyModel | None = None, errors: ErrorModel | None = None,
+                 cursor: str = "keyset", scale: float = 1.0, seed: int = 1) -> None:
+        self.fleet = fleet
+        self.latency = latency or LatencyModel(rtt_ms=150.0, ms_per_1k_rows=400.0, jitter=0.3)
+        self.errors = errors or ErrorModel()
+        self.cursor = cursor
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.nodes_served = 0
+        self.injected = {"http": 0, "graphql": 0, "hang": 0}
+
+    def _encode(self, start: int, nodes: list[dict]) -> str:
+        if self.cursor == "offset":
+            raw = f"arrayconnection:{start + len(nodes) - 1}"
+        else:
+            raw = json.dumps(PlayerFleet._key(nodes[-1]))
+        return base64.b64encode(raw.encode()).decode()
+
+    def _start(self, after: str | None) -> int:
+        if not after:
+            return 0
+        raw = base64.b64decode(after.encode(), validate=True).decode()
+        if self.cursor == "offset":
+            return int(raw.removeprefix("arrayconnection:")) + 1
+        return bisect.bisect_right(self.fleet.order, tuple(json.loads(raw)))
+
+    async def players(self, first: int, after: str | None) -> tuple[int, dict]:
+        self.requests += 1
+        roll = self.rng.random()
+        if roll < self.errors.hang:
+            self.injected["hang"] += 1
+            await asyncio.sleep((FETCH_TIMEOUT_S + 1) * self.scale)
+            return 504, {"message": "upstream timed out"}
+        roll -= self.errors.hang
+        if roll < self.errors.http:
+            self.injected["http"] += 1
+            await asyncio.sleep(self.latency.rpc_s(0, self.rng) * self.scale)
+            return self.rng.choice([429, 502, 503]), {"message": "upstream unavailable"}
+        roll -= self.errors.http
+        if roll < self.errors.graphql:
+            self.injected["graphql"] += 1
+            await asyncio.sleep(self.latency.rpc_s(0, self.rng) * self.scale)
+            return 200, {"data": None, "errors": [{"message": "Internal server error", "path": ["organization"]}]}
+        try:
+            start = self._start(after)
+        except (ValueError, TypeError):
+            return 200, {"data": None, "errors": [{"message": f"Invalid cursor: {after}"}]}
+        nodes = [dict(p) for p in self.fleet.page(first, start)]
+        await asyncio.sleep(self.latency.rpc_s(len(nodes), self.rng) * self.scale)
+        self.nodes_served += len(nodes)
+        page_info = {
+            "hasNextPage": start + len(nodes) < len(self.fleet.order),
+            "endCursor": self._encode(start, nodes) if nodes else None,
+        }
+        return 200, {"data": {"organization": {"players": {"pageInfo": page_info, "nodes": nodes}}}}
+
+    async def churn(self, per_s: float) -> None:
+        """Players reporting in at ``per_s`` (modelled seconds) until cancelled."""
+        carry, tick = 0.0, 0.05
+        while True:
+            await asyncio.sleep(tick)
+            carry += per_s * tick / self.scale
+            for _ in range(int(carry)):
+                self.fleet.touch(self.rng)
+            carry -= int(carry)
+
+    def report(self) -> dict:
+        return {"requests": self.requests, "nodes_served": self.nodes_served, "injected": dict(self.injected),
+                "churned_players": self.fleet.touched}
+
+
+# --------------------------------------------------------------------------
+# tvd_player_status stand-in
+
+
+class StatusTable:
+    """``tvd_player_status`` behind PostgREST's upsert (``on_conflict=player_id``).
+
+    The upsert is one ``INSERT ... ON CONFLICT DO UPDATE`` per request, so a
+    statement costs a round trip plus a per-row write whether or not the row
+    changed; unchanged rows are counted to show how much of a sync is no-op.
+    """
+
+    def __init__(self, latency: LatencyModel | None = None, pool_size: int = 4, error_rate: float = 0.0,
+                 scale: float = 1.0, seed: int = 1) -> None:
+        self.latency = latency or LatencyModel(rtt_ms=25.0, ms_per_1k_rows=60.0, jitter=0.2)
+        self.pool = asyncio.Semaphore(pool_size)
+        self.error_rate = error_rate
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.rows: dict[str, dict] = {}
+        self.counts = {"statements": 0, "failed": 0, "duplicate_key": 0, "inserted": 0, "changed": 0, "unchanged": 0}
+
+    def load(self, rows: list[dict]) -> None:
+        """Pre-populate without cost, as after earlier cron runs."""
+        self.rows.update((row["player_id"], row) for row in rows)
+
+    async def upsert(self, rows: list[dict]) -> tuple[int, dict]:
+        ids = [row.get("player_id") for row in rows]
+        if len(set(ids)) != len(ids):
+            self.counts["duplicate_key"] += 1
+            return 500, {"code": "21000", "message": "ON CONFLICT DO UPDATE command cannot affect row a second time"}
+        async with self.pool:
+            await asyncio.sleep(self.latency.rpc_s(len(rows), self.rng) * self.scale)
+            if self.rng.random() < self.error_rate:
+                self.counts["failed"] += 1
+                return 503, {"code": "PGRST000", "message": "Could not connect to the database"}
+            self.counts["statements"] += 1
+            for row in rows:
+                old = self.rows.get(row["player_id"])
+                if old is None:
+                    self.counts["inserted"] += 1
+                elif any(old.get(c) != row.get(c) for c in STATUS_COLUMNS):
+                    self.counts["changed"] += 1
+                else:
+                    self.counts["unchanged"] += 1
+                self.rows[row["player_id"]] = row
+        return 201, {}
+
+
+def http_server(graphql: GraphqlStandIn, table: StatusTable, host: str = "127.0.0.1", port: int = 0) -> HttpServer:
+    """``/graphql`` (TVDOUTOR_GRAPHQL_ENDPOINT) and ``/rest/v1/tvd_player_status`` (SUPABASE_URL)."""
+    server = HttpServer(host, port)
+
+    async def players(request: Request) -> Response:
+        if not (request.headers.get("authorization") or request.headers.get("x-api-key")):
+            return Response(200, {"data": {"organization": None}, "errors": [{"message": AUTH_ERROR}]})
+        try:
+            variables = request.json().get("variables") or {}
+            first = int(variables["first"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return Response(400, {"errors": [{"message": "Variable $first of required type Int! was not provided"}]})
+        status, body = await graphql.players(first, variables.get("after"))
+        return Response(status, body)
+
+    async def upsert(request: Request) -> Response:
+        if request.arg("on_conflict") != "player_id":
+            return Response(400, {"code": "42P10", "message": "there is no unique or exclusion constraint matching the ON CONFLICT specification"})
+        rows = request.json()
+        status, body = await table.upsert(rows if isinstance(rows, list) else [rows])
+        return Response(status, body or b"")
+
+    server.route("POST", r"/graphql", players)
+    server.route("POST", rf"/rest/v1/{TABLE}", upsert)
+    return server
+
+
+# --------------------------------------------------------------------------
+# Sync client
+
+
+VENUE_CODE = re.compile(r"^(P\d+(?:\.[A-Za-z0-9]+)*)\b", re.ASCII)
+
+
+def extract_venue_code(name: str) -> str | None:
+    match = VENUE_CODE.match(name.strip().upper())
+    return match.group(1) if match else None
+
+
+def to_rows(nodes: list[dict], fetched_at: str) -> list[dict]:
+    """The ``rows`` mapping of ``index.ts``."""
+    return [{
+        "player_id": p["id"],
+        "player_name": p["name"],
+        "venue_code": extract_venue_code(p["name"]),
+        "is_connected": bool(p.get("isConnected")),
+        "last_seen": p.get("lastSeen"),
+        "last_sync": p.get("lastSync"),
+        "sync_progress": p.get("syncProgress"),
+        "fetched_at": fetched_at,
+    } for p in nodes]
+
+
+@dataclass
+class SyncConfig:
+    strategy: str = "current"
+    page_size: int = 100
+    concurrency: int = 1
+    batch_rows: int = 0  # rows per upsert statement; 0 = one statement per page
+
+    @property
+    def label(self) -> str:
+        if self.strategy == "current":
+            return f"current page={self.page_size}"
+        batch = self.batch_rows or self.page_size
+        return f"pipelined page={self.page_size} conc={self.concurrency} batch={batch}"
+
+
+@dataclass
+class SyncRun:
+    graphql: HttpClient
+    rest: HttpClient
+    scale: float = 1.0
+    rng: random.Random = field(default_factory=random.Random)
+    pages: int = 0
+    fetch_retries: int = 0
+    upserts: int = 0
+    upsert_retries: int = 0
+    rows: int = 0
+    fetch_s: list[float] = field(default_factory=list)
+    upsert_s: list[float] = field(default_factory=list)
+    seen: dict[str, int] = field(default_factory=dict)
+
+    def _backoff_s(self, attempt: int) -> float:
+        return min(300 * 2 ** attempt + self.rng.random() * 200, 3000) / 1000 * self.scale
+
+    async def fetch(self, first: int, after: str | None) -> dict:
+        """``graphqlFetch``: three attempts, 15 s abort, exponential backoff."""
+        variables: dict = {"first": first}
+        if after:
+            variables["after"] = after
+        last: Exception | None = None
+        for attempt in range(FETCH_RETRIES):
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.graphql.request("POST", "", json={"query": GRAPHQL_QUERY, "variables": variables}),
+                    FETCH_TIMEOUT_S * self.scale)
+                if not 200 <= response.status < 300:
+                    raise SyncError(f"GraphQL HTTP {response.status}")
+                body = response.json()
+                if body.get("errors"):
+                    raise SyncError(json.dumps(body["errors"]))
+                players = ((body.get("data") or {}).get("organization") or {}).get("players")
+                if not players:
+                    raise SyncError("Missing organization.players in response")
+                self.fetch_s.append(time.perf_counter() - start)
+                self.pages += 1
+                for node in players.get("nodes") or []:
+                    self.seen[node["id"]] = self.seen.get(node["id"], 0) + 1
+                return players
+            except (SyncError, asyncio.TimeoutError, OSError, ValueError) as exc:
+                last = exc if not isinstance(exc, asyncio.TimeoutError) else SyncError("GraphQL request aborted")
+                if attempt < FETCH_RETRIES - 1:
+                    self.fetch_retries += 1
+                    await asyncio.sleep(self._backoff_s(attempt))
+        raise last or SyncError("GraphQL request failed")
+
+    async def upsert(self, rows: list[dict], retries: int = 1) -> None:
+        for attempt in range(retries):
+            start = time.perf_counter()
+            response = await self.rest.request(
+                "POST", f"/rest/v1/{TABLE}?on_conflict=player_id", json=rows,
+                headers={"prefer": "resolution=merge-duplicates,return=minimal"})
+            if 200 <= response.status < 300:
+                self.upsert_s.append(time.perf_counter() - start)
+                self.upserts += 1
+                self.rows += len(rows)
+                return
+            if attempt < retries - 1:
+                self.upsert_retries += 1
+                await asyncio.sleep(self._backoff_s(attempt))
+        raise SyncError(f"upsert HTTP {response.status}: {response.body[:200].decode(errors='replace')}")
+
+
+async def sync_current(run: SyncRun, config: SyncConfig) -> None:
+    """``index.ts`` as deployed: fetch a page, await its upsert, repeat."""
+    after = None
+    while True:
+        players = await run.fetch(config.page_size, after)
+        rows = to_rows(players.get("nodes") or [], iso_z(dt.datetime.now(dt.timezone.utc)))
+        if rows:
+            await run.upsert(rows)
+        info = players.get("pageInfo") or {}
+        if info.get("hasNextPage") is not True or not info.get("endCursor"):
+            return
+        after = info["endCursor"]
+
+
+async def sync_pipelined(run: SyncRun, config: SyncConfig) -> None:
+    """Prefetch the next page; upsert de-duplicated batches concurrently, with retries."""
+    limit = config.batch_rows or config.page_size
+    slots = asyncio.Semaphore(config.concurrency)
+    inflight: set[asyncio.Task] = set()
+    failed: list[BaseException] = []
+    batch: dict[str, dict] = {}
+
+    async def write(rows: list[dict]) -> None:
+        try:
+            await run.upsert(rows, retries=FETCH_RETRIES)
+        except Exception as exc:  # surfaced by the page loop
+            failed.append(exc)
+        finally:
+            slots.release()
+
+    async def flush() -> None:
+        nonlocal batch
+        rows, batch = list(batch.values()), {}
+        await slots.acquire()
+        task = asyncio.ensure_future(write(rows))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+
+    pending: asyncio.Future | None = asyncio.ensure_future(run.fetch(config.page_size, None))
+    try:
+        while pending is not None:
+            players = await pending
+            info = players.get("pageInfo") or {}
+            more = info.get("hasNextPage") is True and info.get("endCursor")
+            pending = asyncio.ensure_future(run.fetch(config.page_size, info["endCursor"])) if more else None
+            # A player seen again on a later page (it reported in mid-sync) replaces
+            # the older sighting; one statement may not touch a player_id twice.
+            for row in to_rows(players.get("nodes") or [], iso_z(dt.datetime.now(dt.timezone.utc))):
+                batch[row["player_id"]] = row
+            if len(batch) >= limit:
+                await flush()
+            if failed:
+                raise failed[0]
+        if batch:
+            await flush()
+        await asyncio.gather(*list(inflight))
+        if failed:
+            raise failed[0]
+    finally:
+        for task in [pending, *inflight]:
+            if task is not None and not task.done():
+                task.cancel()
+
+
+STRATEGIES: dict[str, Callable[[SyncRun, SyncConfig], Awaitable[None]]] = {
+    "current": sync_current,
+    "pipelined": sync_pipelined,
+}
+
+
+# --------------------------------------------------------------------------
+# Runs
+
+
+async def run_sync(config: SyncConfig, graphql_url: str, rest_url: str, rest_headers: dict[str, str],
+                   fleet_size: int, scale: float, seed: int) -> dict:
+    graphql = HttpClient(graphql_url, max_connections=2, headers={"authorization": "token local-stand-in"})
+    rest = HttpClient(rest_url, max_connections=max(1, config.concurrency), headers=rest_headers)
+    run = SyncRun(graphql, rest, scale, random.Random(seed))
+    start = time.perf_counter()
+    error = None
+    try:
+        await STRATEGIES[config.strategy](run, config)
+    except (SyncError, OSError) as exc:
+        error = str(exc)
+    finally:
+        await graphql.close()
+        await rest.close()
+    wall_s = time.perf_counter() - start
+    sync_s = wall_s / scale
+    distinct = len(run.seen)
+    return {
+        "strategy": config.strategy,
+        "page_size": config.page_size,
+        "concurrency": config.concurrency if config.strategy != "current" else 1,
+        "batch_rows": config.batch_rows or config.page_size,
+        "ok": error is None,
+        "error": error,
+        "sync_s": round(sync_s, 2),
+        "wall_s": round(wall_s, 2),
+        "rows": run.rows,
+        "rows_per_s": round(run.rows / sync_s, 1) if sync_s else None,
+        "pages": run.pages,
+        "fetch_retries": run.fetch_retries,
+        "upserts": run.upserts,
+        "upsert_retries": run.upsert_retries,
+        "rows_per_upsert": round(run.rows / run.upserts, 1) if run.upserts else None,
+        "upsert_ms_per_1k_rows": round(sum(run.upsert_s) / scale / run.rows * 1e6, 1) if run.rows else None,
+        "fetch_s_total": round(sum(run.fetch_s) / scale, 2),
+        "upsert_s_total": round(sum(run.upsert_s) / scale, 2),
+        "fetch": latency_summary([v / scale for v in run.fetch_s]),
+        "upsert": latency_summary([v / scale for v in run.upsert_s]),
+        "distinct_players": distinct,
+        "refetched": sum(run.seen.values()) - distinct,
+        "coverage": round(distinct / fleet_size, 4) if fleet_size else None,
+    }
+
+
+def configs_for(args) -> list[SyncConfig]:
+    configs = []
+    for page in sorted({min(max(1, p), MAX_PAGE_SIZE) for p in args.page_sizes}):
+        if "current" in args.strategies:
+            configs.append(SyncConfig("current", page))
+        if "pipelined" in args.strategies:
+            for concurrency in args.concurrency:
+                for batch in args.batch_rows:
+                    configs.append(SyncConfig("pipelined", page, concurrency, batch))
+    return configs
+
+
+def stand_ins(players: int, args) -> tuple[GraphqlStandIn, StatusTable]:
+    fleet = PlayerFleet(players, args.seed)
+    graphql = GraphqlStandIn(
+        fleet, LatencyModel(args.gql_rtt_ms, args.gql_ms_per_1k, jitter=0.3),
+        ErrorModel(args.error_rate, args.graphql_error_rate, args.hang_rate), args.cursor, args.time_scale, args.seed)
+    table = StatusTable(LatencyModel(args.upsert_rtt_ms, args.upsert_ms_per_1k), args.db_pool,
+                        args.upsert_error_rate, args.time_scale, args.seed)
+    return graphql, table
+
+
+def format_run(r: dict) -> str:
+    status = "ok " if r["ok"] else "ERR"
+    return (f"  {status} {r['strategy']:<9} page {r['page_size']:>3} conc {r['concurrency']:>2} batch {r['batch_rows']:>4}"
+            f"  {r['sync_s']:8.1f} s  {r['rows_per_s'] or 0:8.0f} rows/s  {r['upserts']:>5} upserts"
+            f" x {r['rows_per_upsert'] or 0:6.1f}  {r['upsert_ms_per_1k_rows'] or 0:6.1f} ms/1k"
+            f"  fetch p95 {r['fetch']['p95_ms'] or 0:6.0f} ms  retries {r['fetch_retries']}/{r['upsert_retries']}"
+            f"  coverage {r['coverage'] or 0:6.1%}" + ("" if r["ok"] else f"  ({r['error'][:60]})"))
+
+
+async def run_sweep(args) -> dict:
+    rest_headers = {}
+    if args.rest:
+        rest_headers = {"apikey": args.service_key, "authorization": f"Bearer {args.service_key}"}
+    fleets = []
+    for players in args.players:
+        graphql, table = stand_ins(players, args)
+        table.load(to_rows(list(graphql.fleet.players.values()), iso_z(dt.datetime.now(dt.timezone.utc))))
+        runs = []
+        print(f"{players} players ({args.cursor} cursor, churn {args.churn:g}/s)", flush=True)
+        async with http_server(graphql, table) as server:
+            churn = asyncio.ensure_future(graphql.churn(args.churn)) if args.churn > 0 else None
+            try:
+                for config in configs_for(args):
+                    before = dict(table.counts)
+                    result = await run_sync(config, f"{server.url}/graphql", args.rest or server.url, rest_headers,
+                                            players, args.time_scale, args.seed)
+                    if not args.rest:
+                        result["table"] = {k: table.counts[k] - before[k] for k in ("inserted", "changed", "unchanged")}
+                    result["fits_cron"] = result["ok"] and result["sync_s"] <= args.cron_interval
+                    runs.append(result)
+                    print(format_run(result), flush=True)
+            finally:
+                if churn is not None:
+                    churn.cancel()
+        fleets.append({"players": players, "runs": runs, "graphql": graphql.report(),
+                       "idempotency": None if args.rest else idempotency(runs, table, graphql.fleet, args.churn)})
+        print_sizing(fleets[-1], args.cron_interval)
+    return {"fleets": fleets}
+
+
+def idempotency(runs: list[dict], table: StatusTable, fleet: PlayerFleet, churn: float) -> dict:
+    """Re-syncs must leave one row per player and, without churn, nothing changed or inserted."""
+    ok_runs = [r for r in runs if r["ok"]]
+    check = {
+        "table_rows": len(table.rows),
+        "players": len(fleet),
+        "one_row_per_player": set(table.rows) == set(fleet.ids),
+        "inserted": sum(r["table"]["inserted"] for r in ok_runs),
+        "changed": sum(r["table"]["changed"] for r in ok_runs),
+        "duplicate_key_errors": table.counts["duplicate_key"],
+    }
+    if churn <= 0:
+        check["idempotent"] = check["one_row_per_player"] and check["inserted"] == 0 and check["changed"] == 0
+    return check
+
+
+def print_sizing(fleet: dict, cron_interval: float) -> None:
+    ok = [r for r in fleet["runs"] if r["ok"]]
+    baseline = next((r for r in ok if r["strategy"] == "current" and r["page_size"] == 100), None)
+    if baseline:
+        print(f"  deployed default (page 100): {baseline['sync_s']:.1f} s"
+              f" {'within' if baseline['fits_cron'] else 'OVER'} the {cron_interval:g} s cron interval")
+    if ok:
+        best = min(ok, key=lambda r: r["sync_s"])
+        print(f"  fastest: {best['strategy']} page {best['page_size']} conc {best['concurrency']}"
+              f" batch {best['batch_rows']}: {best['sync_s']:.1f} s, {best['rows_per_s']:.0f} rows/s")
+    check = fleet.get("idempotency")
+    if check:
+        print(f"  table: {check['table_rows']} rows for {check['players']} players,"
+              f" {check['inserted']} inserted / {check['changed']} changed by re-syncs,"
+              f" {check['duplicate_key_errors']} duplicate-key errors"
+              + (f"  idempotent: {check['idempotent']}" if "idempotent" in check else ""))
+
+
+async def serve(args) -> None:
+    graphql, table = stand_ins(args.players[0], args)
+    async with http_server(graphql, table, "0.0.0.0", args.serve) as server:
+        print(f"TVD GraphQL stand-in: TVDOUTOR_GRAPHQL_ENDPOINT={server.url}/graphql ({len(graphql.fleet)} players)")
+        print(f"tvd_player_status stand-in: SUPABASE_URL={server.url}", flush=True)
+        churn = asyncio.ensure_future(graphql.churn(args.churn)) if args.churn > 0 else None
+        try:
+            await asyncio.Event().wait()
+        finally:
+            if churn is not None:
+                churn.cancel()
+
+
+async def run_target(args) -> dict:
+    """Invoke the deployed function ``--runs`` times against the stand-in on ``--serve-port``."""
+    args.time_scale = 1.0  # the function's own timeouts and backoff are real
+    graphql, table = stand_ins(args.players[0], args)
+    client = HttpClient(args.target, max_connections=1, headers={"x-cron-secret": args.cron_secret})
+    calls = []
+    async with http_server(graphql, table, "0.0.0.0", args.serve_port) as server:
+        print(f"stand-ins on {server.url}; the function must run with TVDOUTOR_GRAPHQL_ENDPOINT={server.url}/graphql",
+              flush=True)
+        try:
+            for i in range(args.runs):
+                before_requests, before_statements = graphql.requests, table.counts["statements"]
+                start = time.perf_counter()
+                response = await client.request("POST", "", json={})
+                elapsed = time.perf_counter() - start
+                body = response.json() if response.body else {}
+                calls.append({
+                    "status": response.status,
+                    "sync_s": round(elapsed, 2),
+                    "total": body.get("total"),
+                    "error": body.get("error"),
+                    "graphql_requests": graphql.requests - before_requests,
+                    "upserts_seen": table.counts["statements"] - before_statements,
+                    "rows_per_s": round(body["total"] / elapsed, 1) if body.get("total") else None,
+                })
+                print(f"  run {i + 1}: HTTP {response.status} in {elapsed:.1f} s, total {body.get('total')}, "
+                      f"{calls[-1]['graphql_requests']} GraphQL requests", flush=True)
+        finally:
+            await client.close()
+    return {"target": args.target, "calls": calls, "graphql": graphql.report()}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.tvd_sync", description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[10000], help="fleet sizes")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 250, 500], help="clamped to 1..500 like index.ts")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4], help="upserts in flight (pipelined)")
+    parser.add_argument("--batch-rows", type=int, nargs="+", default=[0], help="rows per upsert; 0 = one per page")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--cursor", choices=["keyset", "offset"], default="keyset")
+    parser.add_argument("--churn", type=float, default=0.0, help="players reporting in per second during syncs")
+    parser.add_argument("--gql-rtt-ms", type=float, default=150.0)
+    parser.add_argument("--gql-ms-per-1k", type=float, default=400.0, help="GraphQL cost per 1k players returned")
+    parser.add_argument("--upsert-rtt-ms", type=float, default=25.0)
+    parser.add_argument("--upsert-ms-per-1k", type=float, default=60.0, help="upsert cost per 1k rows written")
+    parser.add_argument("--db-pool", type=int, default=4, help="concurrent statements the database serves")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="GraphQL requests failing with 429/502/503")
+    parser.add_argument("--graphql-error-rate", type=float, default=0.0, help="GraphQL responses carrying errors")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="GraphQL requests outlasting the 15 s abort")
+    parser.add_argument("--upsert-error-rate", type=float, default=0.0, help="upserts failing with 503")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply every modelled delay (reports stay modelled)")
+    parser.add_argument("--cron-interval", type=float, default=120.0, help="seconds between scheduled syncs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rest", help="real PostgREST/Supabase URL for the upserts")
+    parser.add_argument("--service-key", default="", help="service role key for --rest")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="only serve the stand-ins")
+    parser.add_argument("--target", help="URL of a running tvd-sync-players function")
+    parser.add_argument("--cron-secret", default="", help="x-cron-secret for --target")
+    parser.add_argument("--serve-port", type=int, default=54410, help="stand-in port for --target")
+    parser.add_argument("--runs", type=int, default=3, help="function invocations for --target")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.serve is not None:
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    results = asyncio.run(run_target(args) if args.target else run_sweep(args))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "service_key")}
+    args.output.write_text(json.dumps({"config": config, **results}, indent=2), encoding="utf-8")
+    # Failed syncs are expected once errors are injected; without them they are a bug.
+    injected = args.error_rate or args.graphql_error_rate or args.hang_rate or args.upsert_error_rate
+    failed = [r for fleet in results.get("fleets", []) for r in fleet["runs"] if not r["ok"]]
+    return 1 if failed and not injected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Condition-based waits that replace the fixed ``wait_for_timeout(3000)``.
+
+TestSprite generates a three second sleep before every fill and click.  The
+helpers here wait for the condition the step actually needs instead:
+
+* :func:`actionable` - the element is attached, visible and enabled;
+* :func:`network_idle` - no Supabase auth/REST/edge-function request is in
+  flight for a short quiet window (analytics, tiles, websockets are ignored);
+* :func:`route_change` - the SPA navigated to a matching URL;
+* :func:`condition` - a JS predicate became truthy.
+
+Every wait returns as soon as its condition holds and records how long it
+took on the page's context; :func:`records` hands them to the runner.
+Timeouts are in milliseconds, like the rest of Playwright.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Pattern
+
+from playwright.async_api import BrowserContext, Locator, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+DEFAULT_TIMEOUT = 5000
+ENABLED_POLL_S = 0.05
+
+# Substrings identifying Supabase endpoints the app blocks on.
+SUPABASE_ENDPOINTS = ("/auth/v1/", "/rest/v1/", "/functions/v1/")
+
+
+@dataclass
+class WaitRecord:
+    kind: str
+    target: str
+    waited_s: float
+    ok: bool
+
+
+_records: "weakref.WeakKeyDictionary[BrowserContext, list[WaitRecord]]" = weakref.WeakKeyDictionary()
+_trackers: "weakref.WeakKeyDictionary[BrowserContext, _NetworkTracker]" = weakref.WeakKeyDictionary()
+
+
+def records(context: BrowserContext) -> list[WaitRecord]:
+    """Waits recorded so far on ``context``, in order."""
+    return _records.get(context, [])
+
+
+def reset(context: BrowserContext) -> None:
+    """Forget the waits recorded on a context that is reused for another case."""
+    _records.pop(context, None)
+
+
+def _record(context: BrowserContext, kind: str, target: str, t0: float, ok: bool) -> float:
+    waited = time.perf_counter() - t0
+    _records.setdefault(context, []).append(WaitRecord(kind, target, round(waited, 4), ok))
+    return waited
+
+
+class _NetworkTracker:
+    """Counts in-flight requests matching ``endpoints`` on a context."""
+
+    def __init__(self, context: BrowserContext, endpoints: tuple[str, ...]) -> None:
+        self.endpoints = endpoints
+        self.inflight: set = set()
+        self.started = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_done)
+        context.on("requestfailed", self._on_done)
+
+    def _on_request(self, request) -> None:
+        if any(e in request.url for e in self.endpoints):
+            self.inflight.add(request)
+            self.started += 1
+            self.idle.clear()
+
+    def _on_done(self, request) -> None:
+        self.inflight.discard(request)
+        if not self.inflight:
+            self.idle.set()
+
+    async def wait_idle(self, quiet_s: float, timeout_s: float) -> None:
+        deadline = time.perf_counter() + timeout_s
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            await asyncio.wait_for(self.idle.wait(), remaining)
+            started = self.started
+            await asyncio.sleep(min(quiet_s, max(0.0, deadline - time.perf_counter())))
+            if self.idle.is_set() and self.started == started:
+                return
+
+
+def track(context: BrowserContext, endpoints: tuple[str, ...] = SUPABASE_ENDPOINTS) -> None:
+    """Start counting requests on ``context``.
+
+    The runner calls this when it creates a context; otherwise tracking
+    starts on the first :func:`network_idle`, missing earlier requests.
+    """
+    if context not in _trackers:
+        _trackers[context] = _NetworkTracker(context, endpoints)
+
+
+async def actionable(locator: Locator, timeout: float = DEFAULT_TIMEOUT) -> float:
+    """Wait until ``locator`` is visible and enabled; return seconds waited.
+
+    Raises Playwright's ``TimeoutError`` either way, so the runner reports a
+    wait that ran out as an error rather than a failed assertion.
+    """
+    context = locator.page.context
+    t0 = time.perf_counter()
+    deadline = t0 + timeout / 1000
+    try:
+        await locator.wait_for(state="visible", timeout=timeout)
+        while not await locator.is_enabled(timeout=max(1.0, (deadline - time.perf_counter()) * 1000)):
+            if time.perf_counter() >= deadline:
+                raise PlaywrightTimeoutError(f"{locator} still disabled after {timeout:.0f}ms")
+            await asyncio.sleep(ENABLED_POLL_S)
+    except PlaywrightTimeoutError:
+        _record(context, "actionable", str(locator), t0, False)
+        raise
+    return _record(context, "actionable", str(locator), t0, True)
+
+
+async def fill(locator: Locator, value: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+    await actionable(locator, timeout)
+    await locator.fill(value, timeout=timeout)
+
+
+async def click(locator: Locator, timeout: float = DEFAULT_TIMEOUT) -> None:
+    await actionable(locator, timeout)
+    await locator.click(timeout=timeout)
+
+
+async def network_idle(page: Page, timeout: float = 15000, quiet_ms: float = 250) -> float:
+    """Wait until no Supabase request is in flight for ``quiet_ms``."""
+    track(page.context)
+    t0 = time.perf_counter()
+    try:
+        await _trackers[page.context].wait_idle(quiet_ms / 1000, timeout / 1000)
+    except asyncio.TimeoutError:
+        _record(page.context, "network_idle", "supabase", t0, False)
+        raise PlaywrightTimeoutError(f"Supabase requests still in flight after {timeout:.0f}ms") from None
+    return _record(page.context, "network_idle", "supabase", t0, True)
+
+
+async def route_change(
+    page: Page,
+    url: str | Pattern[str] | Callable[[str], bool],
+    timeout: float = 15000,
+) -> float:
+    """Wait for the page URL to match ``url`` (glob, regex or predicate)."""
+    t0 = time.perf_counter()
+    target = getattr(url, "pattern", url if isinstance(url, str) else "predicate")
+    try:
+        await page.wait_for_url(url, wait_until="commit", timeout=timeout)
+    except PlaywrightTimeoutError:
+        _record(page.context, "route_change", target, t0, False)
+        raise
+    return _record(page.context, "route_change", target, t0, True)
+
+
+async def condition(page: Page, expression: str, timeout: float = 15000, name: str = "js") -> float:
+    """Wait until the JS ``expression`` evaluates truthy in the page."""
+    t0 = time.perf_counter()
+    try:
+        await page.wait_for_function(expression, timeout=timeout)
+    except PlaywrightTimeoutError:
+        _record(page.context, "condition", name, t0, False)
+        raise
+    return _record(page.context, "condition", name, t0, True)
@@ -0,0 +1,240 @@
+"""Warm contexts: reuse a signed-in page on the dashboard across cases.
+
+Every case used to open a context, load the app and wait for the Vite dev
+bundle - hundreds of module requests - before doing anything.
+:class:`WarmPool` keeps contexts open between cases, one page each,
+already on the app and signed in as the case's ``AUTH_ROLE``.  After a
+passing case the context is *reset* instead of closed: extra pages are
+closed, cookies, ``sessionStorage`` and IndexedDB are cleared, and
+``localStorage`` keeps only the Supabase session (nothing at all for
+signed-out cases).  The page then reloads the app from the warm HTTP cache
+and waits for Supabase to go quiet.  A case that failed, lost its session
+or outlived the token is not trusted: its context is closed and the next
+case on that role starts cold.
+
+TC scripts get the page with :func:`page`, which hands out the warm page
+when it already shows the requested URL and opens one otherwise, so they
+run unchanged outside the runner::
+
+    page = await warm.page(context, "http://localhost:8080")
+
+    python -m harness.runner --warm
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from . import locators, perf, waits
+from .auth import SESSION_EXPIRY_JS, AuthCache
+from .config import app_url, base_url
+from .pool import BrowserPool
+
+# Clears app state; with ``keepSession`` the Supabase session survives.
+RESET_JS = """async (keepSession) => {
+    for (const key of Object.keys(localStorage)) {
+        if (!(keepSession && /^sb-.+-auth-token$/.test(key))) localStorage.removeItem(key);
+    }
+    sessionStorage.clear();
+    if (indexedDB.databases) {
+        for (const db of await indexedDB.databases()) indexedDB.deleteDatabase(db.name);
+    }
+}"""
+
+NAVIGATION_TIMEOUT = 30000
+
+_ready: "weakref.WeakKeyDictionary[BrowserContext, tuple[Page, str]]" = weakref.WeakKeyDictionary()
+
+
+def _same_url(a: str, b: str) -> bool:
+    return a.rstrip("/") == b.rstrip("/")
+
+
+async def page(context: BrowserContext, url: str, timeout: float = 10000) -> Page:
+    """The context's warm page if it was prepared for ``url``, else a new page there."""
+    url = app_url(url)
+    ready = _ready.pop(context, None)
+    if ready is not None:
+        warm_page, warmed_for = ready
+        if not warm_page.is_closed() and _same_url(warmed_for, url):
+            return warm_page
+    new_page = await context.new_page()
+    await new_page.goto(url, wait_until="commit", timeout=timeout)
+    return new_page
+
+
+@dataclass
+class _Entry:
+    role: str | None
+    context: BrowserContext
+    stack: AsyncExitStack
+    expires_at: float | None = None
+    idle_since: float = 0.0
+
+
+@dataclass
+class WarmStats:
+    hits: int = 0
+    misses: int = 0
+    discarded: int = 0
+    evicted: int = 0
+    reset_s: list[float] = field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        leases = self.hits + self.misses
+        return self.hits / leases if leases else 0.0
+
+    def summary(self) -> str:
+        resets = sorted(self.reset_s)
+        median = resets[len(resets) // 2] if resets else 0.0
+        worst = resets[-1] if resets else 0.0
+        return (
+            f"warm pool: {self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.0%}), "
+            f"{len(resets)} resets (median {median:.2f}s, max {worst:.2f}s), "
+            f"{self.discarded} discarded, {self.evicted} evicted"
+        )
+
+
+class WarmPool:
+    """Contexts of ``pool`` kept open and reset between cases, per auth role.
+
+    ``capacity`` must not exceed what ``pool`` can hold open; idle contexts
+    count against it, so an idle context of another role is closed when a
+    case needs a slot.  ``margin_s`` mirrors :class:`~harness.auth.AuthCache`:
+    a context whose token expires sooner than that is not reused.
+    """
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        capacity: int,
+        auth_cache: AuthCache | None = None,
+        url: str | None = None,
+        margin_s: float = 120.0,
+    ) -> None:
+        self.pool = pool
+        self.capacity = capacity
+        self.auth_cache = auth_cache
+        self.url = url or base_url()
+        self.margin_s = margin_s
+        self.stats = WarmStats()
+        self._idle: list[_Entry] = []
+        self._active = 0
+        self._slots = asyncio.Semaphore(capacity)
+
+    def _fresh(self, entry: _Entry) -> bool:
+        return entry.expires_at is None or entry.expires_at - self.margin_s > time.time()
+
+    def _take(self, role: str | None) -> _Entry | None:
+        for entry in sorted(self._idle, key=lambda e: -e.idle_since):
+            if entry.role == role:
+                self._idle.remove(entry)
+                return entry
+        return None
+
+    async def _open(self, role: str | None) -> _Entry:
+        # Idle contexts hold pool slots; free the oldest one if all are taken.
+        while self._idle and self._active + len(self._idle) > self.capacity:
+            oldest = min(self._idle, key=lambda e: e.idle_since)
+            self._idle.remove(oldest)
+            self.stats.evicted += 1
+            await oldest.stack.aclose()
+        options = {}
+        if self.auth_cache is not None and role:
+            options["storage_state"] = await self.auth_cache.storage_state(role)
+        stack = AsyncExitStack()
+        context = await stack.enter_async_context(self.pool.context(**options))
+        return _Entry(role, context, stack)
+
+    async def _reset(self, entry: _Entry) -> bool:
+        """Put ``entry`` back on a clean app page; False when it cannot be trusted."""
+        t0 = time.perf_counter()
+        context = entry.context
+        pages = [p for p in context.pages if not p.is_closed()]
+        if not pages:
+            return False
+        main, extra = pages[0], pages[1:]
+        try:
+            for other in extra:
+                await other.close()
+            await context.clear_cookies()
+            if not main.url.startswith(self.url.rstrip("/")):
+                await main.goto(self.url, wait_until="commit", timeout=NAVIGATION_TIMEOUT)
+            keep_session = self.auth_cache is not None and bool(entry.role)
+            await main.evaluate(RESET_JS, keep_session)
+            await main.goto(self.url, wait_until="load", timeout=NAVIGATION_TIMEOUT)
+            await waits.network_idle(main)
+            if keep_session:
+                entry.expires_at = await main.evaluate(SESSION_EXPIRY_JS)
+                if not entry.expires_at or not self._fresh(entry):
+                    return False
+        except Error:
+            return False
+        waits.reset(context)
+        locators.reset(context)
+        await perf.reset(context)
+        _ready[context] = (main, self.url)
+        self.stats.reset_s.append(round(time.perf_counter() - t0, 3))
+        return True
+
+    @asynccontextmanager
+    async def context(self, role: str | None = None) -> AsyncIterator[BrowserContext]:
+        """Lease a context for a case signed in as ``role`` (None: signed out)."""
+        async with self._slots:
+            self._active += 1
+            entry = self._take(role)
+            if entry is not None and self._fresh(entry):
+                self.stats.hits += 1
+            else:
+                if entry is not None:
+                    self.stats.discarded += 1
+                    await entry.stack.aclose()
+                self.stats.misses += 1
+                entry = await self._open(role)
+            keep = False
+            try:
+                yield entry.context
+                keep = await self._reset(entry)
+            finally:
+                self._active -= 1
+                if keep:
+                    entry.idle_since = time.monotonic()
+                    self._idle.append(entry)
+                else:
+                    if entry.context in _ready:
+                        del _ready[entry.context]
+                    self.stats.discarded += 1
+                    await entry.stack.aclose()
+
+    async def prewarm(self, roles: list[str | None]) -> None:
+        """Open and prepare one context per entry of ``roles`` ahead of the cases."""
+        roles = roles[: self.capacity]
+
+        async def one(role: str | None) -> None:
+            entry = await self._open(role)
+            try:
+                first = await entry.context.new_page()
+                await first.goto(self.url, wait_until="commit", timeout=NAVIGATION_TIMEOUT)
+                ready = await self._reset(entry)
+            except Error:
+                ready = False
+            if ready:
+                entry.idle_since = time.monotonic()
+                self._idle.append(entry)
+            else:
+                await entry.stack.aclose()
+
+        await asyncio.gather(*(one(role) for role in roles), return_exceptions=True)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for entry in idle:
+            await entry.stack.aclose()
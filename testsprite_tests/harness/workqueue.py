@@ -0,0 +1,109 @@
+"""The coordinator's case queue for :mod:`harness.shard`, without a browser.
+
+Cases wait in :class:`WorkQueue` longest first and are leased one at a
+time; a lease that outlives ``lease_s`` goes back to the front of the
+queue.  Retry rounds (:meth:`WorkQueue.extend`) queue a case again under a
+new attempt number, and results are only accepted for the attempt that is
+current, so a slow worker reporting an earlier attempt cannot close the
+retry.  :func:`balance` is the same longest-processing-time-first rule as a
+static split, for ``shard plan``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # kept importable without Playwright
+    from .runner import TestResult
+
+
+def balance(durations: dict[str, float], shards: int) -> list[list[str]]:
+    """Longest-processing-time-first split of ``durations`` into ``shards``."""
+    loads = [0.0] * shards
+    plan: list[list[str]] = [[] for _ in range(shards)]
+    for test_id in sorted(durations, key=lambda t: (-durations[t], t)):
+        index = loads.index(min(loads))
+        plan[index].append(test_id)
+        loads[index] += durations[test_id]
+    return plan
+
+
+@dataclass
+class Lease:
+    test_id: str
+    worker: str
+    deadline: float
+    attempt: int = 1
+
+
+@dataclass
+class WorkQueue:
+    """Cases waiting, leased and finished; all state lives in the coordinator."""
+
+    pending: list[str]
+    lease_s: float
+    leases: dict[str, Lease] = field(default_factory=dict)
+    results: dict[str, TestResult] = field(default_factory=dict)
+    worker_of: dict[str, str] = field(default_factory=dict)
+    # Current attempt per case; bumped by every extend() round.
+    attempts: dict[str, int] = field(default_factory=dict)
+    requeued: int = 0
+    stale: int = 0
+    # One lease at a time (quarantine lane, retries).
+    serial: bool = False
+    # Set once the last round is done; workers are then told to exit.
+    closed: bool = False
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __post_init__(self) -> None:
+        for test_id in self.pending:
+            self.attempts.setdefault(test_id, 1)
+        # complete() never runs for an empty queue, so it would never count as done.
+        if not self.pending:
+            self.done.set()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for test_id, lease in list(self.leases.items()):
+            if lease.deadline < now:
+                del self.leases[test_id]
+                self.pending.insert(0, test_id)
+                self.requeued += 1
+
+    def lease(self, worker: str) -> Lease | None:
+        self._expire()
+        if not self.pending or (self.serial and self.leases):
+            return None
+        test_id = self.pending.pop(0)
+        lease = Lease(test_id, worker, time.monotonic() + self.lease_s, self.attempts[test_id])
+        self.leases[test_id] = lease
+        return lease
+
+    def extend(self, test_ids: list[str], serial: bool = False) -> None:
+        """Queue another round once the previous one is done; its results replace earlier ones."""
+        for test_id in test_ids:
+            self.results.pop(test_id, None)
+            self.attempts[test_id] = self.attempts.get(test_id, 0) + 1
+        self.pending.extend(test_ids)
+        self.serial = serial
+        if self.pending:
+            self.done.clear()
+
+    def complete(self, worker: str, result: TestResult, attempt: int) -> bool:
+        """Record ``result`` for ``attempt``; False when that attempt is no longer current."""
+        if attempt != self.attempts.get(result.test_id):
+            self.stale += 1
+            return False
+        self.leases.pop(result.test_id, None)
+        if result.test_id in self.pending:
+            self.pending.remove(result.test_id)
+        # A requeued case may finish twice; the first result wins.
+        if result.test_id not in self.results:
+            self.results[result.test_id] = result
+            self.worker_of[result.test_id] = worker
+        if not self.pending and not self.leases:
+            self.done.set()
+        return True
@@ -0,0 +1,31 @@
+import os
+
+from harness.artifacts import MARKER, ArtifactStore
+
+
+def _artifact(directory, name, size, used_at):
+    path = directory / name
+    path.mkdir()
+    (path / "trace-001.zip").write_bytes(b"x" * size)
+    (path / MARKER).touch()
+    os.utime(path / MARKER, (used_at, used_at))
+    return path
+
+
+def test_enforce_evicts_least_recently_used_first(tmp_path):
+    old = _artifact(tmp_path, "20260101-000000_TC001", 400, 100)
+    kept = _artifact(tmp_path, "20260101-000001_TC002", 400, 200)
+    new = _artifact(tmp_path, "20260101-000002_TC003", 400, 300)
+    (tmp_path / ".videos").mkdir()
+    (tmp_path / ".videos" / "spool.webm").write_bytes(b"x" * 4000)
+    store = ArtifactStore(tmp_path, quota_bytes=900)
+    assert store.enforce() == [old]
+    assert kept.exists() and new.exists() and (tmp_path / ".videos").exists()
+
+
+def test_enforce_never_evicts_the_artifact_being_saved(tmp_path):
+    saving = _artifact(tmp_path, "20260101-000000_TC001", 600, 100)
+    other = _artifact(tmp_path, "20260101-000001_TC002", 600, 200)
+    store = ArtifactStore(tmp_path, quota_bytes=700)
+    assert store.enforce(keep=saving) == [other]
+    assert store.evicted == 1
@@ -0,0 +1,16 @@
+from harness.flaky import RetryBudget
+
+
+def test_retries_shortest_failures_first_within_the_budget():
+    budget = RetryBudget(seconds=30.0, per_test=2)
+    expected = {"TC001": 20.0, "TC002": 5.0, "TC003": 12.0}
+    assert budget.pick(["TC001", "TC002", "TC003"], expected) == ["TC002", "TC003"]
+
+
+def test_spent_time_and_attempts_limit_later_rounds():
+    budget = RetryBudget(seconds=30.0, per_test=1)
+    budget.charge("TC002", 6.0)
+    budget.charge("TC003", 14.0)
+    # TC002 and TC003 used their attempt; 10 s are left, so TC001 (20 s) does not fit.
+    assert budget.pick(["TC001", "TC002", "TC003"], {"TC001": 20.0, "TC002": 5.0, "TC003": 8.0}) == []
+    assert budget.pick(["TC004"], {"TC004": 9.0}) == ["TC004"]
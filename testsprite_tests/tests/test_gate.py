@@ -0,0 +1,63 @@
+"""Verdicts of :func:`harness.gate.compare` and the source filter of :func:`harness.gate.evaluate`."""
+
+import pytest
+
+from harness.gate import compare, evaluate
+from harness.results import ResultStore
+
+BASELINE = [10.0, 10.2, 9.8, 10.1, 9.9, 10.3, 9.7]
+
+
+def test_fewer_samples_than_minimum_is_insufficient():
+    result = compare("TC001", "duration_s", [12.0] * 3, BASELINE, alpha=0.05, min_samples=5)
+    assert result.verdict == "insufficient"
+    assert result.current_median is None
+
+
+def test_clear_slowdown_regresses():
+    current = [v * 1.3 for v in BASELINE]
+    result = compare("TC001", "duration_s", current, BASELINE, alpha=0.05, min_samples=5)
+    assert result.verdict == "regressed"
+    assert result.change == pytest.approx(0.3)
+    assert result.p_value < 0.05
+
+
+def test_significant_but_small_shift_is_unchanged():
+    # Every sample is slower, but by 5% - below duration_s's 15% min_change.
+    current = [v * 1.05 for v in BASELINE]
+    result = compare("TC001", "duration_s", current, BASELINE, alpha=0.05, min_samples=5)
+    assert result.verdict == "unchanged"
+
+
+def test_speedup_improves():
+    current = [v * 0.5 for v in BASELINE]
+    assert compare("TC001", "duration_s", current, BASELINE, 0.05, 5).verdict == "improved"
+
+
+def test_higher_is_better_metrics_are_inverted():
+    fps = [60.0, 59.0, 61.0, 60.5, 59.5]
+    assert compare("map 1000", "pan_zoom_fps", [v * 0.7 for v in fps], fps, 0.05, 5).verdict == "regressed"
+    assert compare("map 1000", "pan_zoom_fps", [v * 1.3 for v in fps], fps, 0.05, 5).verdict == "improved"
+
+
+def _run(store: ResultStore, source: str, values: list[float]) -> None:
+    run_id = store.add_run([], 0.0, source=source)
+    store.add_run_metrics(run_id, [("TC001", "duration_s", v) for v in values])
+
+
+def test_evaluate_compares_within_one_source(tmp_path):
+    with ResultStore(tmp_path / "results.db") as store:
+        for _ in range(5):
+            _run(store, "runner:online", [20.0, 21.0])
+        for _ in range(5):
+            _run(store, "runner:offline", [5.0, 5.5])
+        _run(store, "runner:retry", [50.0])
+        # Offline runs are the newest: compared with nothing but themselves, they are insufficient
+        # rather than a 4x "improvement" over the live runs.
+        [latest] = evaluate(store, 5, 20, None, alpha=0.05, min_samples=5)
+        assert latest.source == "runner:offline"
+        assert latest.verdict == "insufficient"
+        [online] = evaluate(store, 2, 3, None, alpha=0.05, min_samples=4, source="runner:online")
+        assert online.source == "runner:online"
+        assert online.verdict == "unchanged"
+        assert online.current_median == online.baseline_median == 20.5
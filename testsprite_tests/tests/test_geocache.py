@@ -0,0 +1,61 @@
+import asyncio
+
+from harness.geocache import GeoCache, Resolver
+
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    with GeoCache(tmp_path / "geo.db", ttl_s=100.0, negative_ttl_s=10.0) as cache:
+        cache.put_many("viacep", {"01310100": {"uf": "SP"}, "99999999": None}, now=0.0)
+        assert cache.get_many("viacep", ["01310100", "99999999"], now=5.0) == {"01310100": {"uf": "SP"},
+                                                                                "99999999": None}
+        # "Not found" lapses first.
+        assert cache.get_many("viacep", ["01310100", "99999999"], now=50.0) == {"01310100": {"uf": "SP"}}
+        assert cache.get_many("viacep", ["01310100"], now=150.0) == {}
+        assert cache.expired == 2
+        assert cache.prune(now=150.0) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    with GeoCache(tmp_path / "geo.db", max_entries=2) as cache:
+        cache.put_many("viacep", {"a": 1}, now=1.0)
+        cache.put_many("viacep", {"b": 2}, now=2.0)
+        cache.get_many("viacep", ["a"], now=3.0)
+        cache.put_many("viacep", {"c": 3}, now=4.0)
+        assert cache.get_many("viacep", ["a", "b", "c"], now=5.0) == {"a": 1, "c": 3}
+        assert cache.evicted == 1
+
+
+def test_resolver_fetches_each_missing_key_once(tmp_path):
+    calls: list[str] = []
+    running = peak = 0
+    release = asyncio.Event()
+
+    async def fetch(key: str):
+        nonlocal running, peak
+        calls.append(key)
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+        if key == "bad":
+            raise RuntimeError("upstream down")
+        return None if key == "gone" else key.upper()
+
+    async def scenario(cache: GeoCache) -> None:
+        resolver = Resolver(cache, "viacep", fetch, concurrency=2)
+        first = asyncio.ensure_future(resolver.resolve(["a", "a", "b", "gone", "bad"]))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(resolver.resolve(["b", "c"]))
+        await asyncio.sleep(0.01)
+        release.set()
+        assert await first == {"a": "A", "b": "B", "gone": None, "bad": None}
+        assert await second == {"b": "B", "c": "C"}
+        assert sorted(calls) == ["a", "b", "bad", "c", "gone"] and peak == 2
+        stats = resolver.stats
+        assert (stats.deduplicated, stats.coalesced, stats.misses, stats.errors) == (1, 1, 5, 1)
+        # Answers are cached, "not found" included; the failure is fetched again.
+        assert await resolver.resolve(["a", "gone", "bad"]) == {"a": "A", "gone": None, "bad": None}
+        assert calls.count("bad") == 2 and resolver.stats.hits == 2
+
+    with GeoCache(tmp_path / "geo.db") as cache:
+        asyncio.run(scenario(cache))
@@ -0,0 +1,22 @@
+from harness.impact import ImportGraph, select
+
+ALL = [f"TC{n:03d}" for n in range(1, 15)]
+
+
+def test_scripts_and_edge_functions_map_to_their_cases():
+    selection = select(["testsprite_tests/TC006_Create_and_edit_campaigns_and_link_venues.py",
+                        "supabase/functions/maps-heatmap/index.ts", "README.md"], ALL)
+    assert not selection.full
+    assert selection.test_ids == ["TC006", "TC008"]
+
+
+def test_shared_or_unmapped_files_select_everything(tmp_path):
+    assert select(["src/App.tsx"], ALL).full
+    unmapped = select(["public/unknown.svg"], ALL)
+    assert unmapped.full and unmapped.test_ids == ALL
+    assert unmapped.reasons["TC001"] == ["unmapped file public/unknown.svg"]
+    (tmp_path / "src").mkdir()
+    new_hook = select(["src/hooks/useBrandNew.ts"], ALL, ImportGraph(tmp_path))
+    assert new_hook.full and new_hook.reasons["TC001"] == ["unmapped file src/hooks/useBrandNew.ts"]
+    new_function = select(["supabase/functions/brand-new/index.ts"], ALL)
+    assert new_function.full and new_function.test_ids == ALL
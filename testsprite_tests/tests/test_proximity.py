@@ -0,0 +1,31 @@
+import pytest
+
+from harness.proximity import ScreenIndex, reference_batch, region_geocoder, synthetic_ceps
+from harness.synthetic import db_screen_records
+
+
+@pytest.mark.parametrize("radius_km", [5.0, 50.0])
+def test_batch_matches_the_per_cep_reference(radius_km):
+    rows = list(db_screen_records(400, 200, seed=1))
+    ceps = synthetic_ceps(80, seed=1)
+    located = region_geocoder(1)
+
+    def geocoder(batch):  # the first CEP does not geocode
+        return {c: p for c, p in located(batch).items() if c != ceps[0]}
+
+    got = ScreenIndex(rows, radius_km).batch(ceps, geocoder, radius_km)
+    assert got["screens"] and got["missing"] == [ceps[0]]
+    assert got == reference_batch(rows, ceps, geocoder, radius_km)
+
+
+def test_duplicates_keep_the_last_ceps_copy_and_integer_ids_first():
+    row = {"active": True, "display_name": "Clínica", "city": "Recife", "state": "PE", "lat": 0.0}
+    rows = [{**row, "id": "b7e1", "lng": 0.0}, {**row, "id": 10, "lng": 0.01}, {**row, "id": 2, "lng": 0.02}]
+    points = {"50000-000": (0.0, 0.0), "50000-001": (0.0, 0.02)}
+
+    def geocoder(ceps):
+        return {c: points[c] for c in ceps}
+
+    got = ScreenIndex(rows).batch(list(points), geocoder)
+    assert [(s["id"], s["distance"]) for s in got["screens"]] == [("2", 0.0), ("10", 1.1), ("b7e1", 2.2)]
+    assert got == reference_batch(rows, list(points), geocoder)
@@ -0,0 +1,11 @@
+from harness.results import ResultStore
+
+
+def test_regressions_skip_metric_only_runs(tmp_path):
+    with ResultStore(tmp_path / "results.db") as store:
+        store.add_run([{"test_id": "TC001", "status": "passed"}, {"test_id": "TC002", "status": "passed"}], 0.0)
+        store.add_run([{"test_id": "TC001", "status": "failed"}, {"test_id": "TC002", "status": "passed"}], 1.0)
+        bench = store.add_run([], 2.0, source="map_bench")
+        store.add_run_metrics(bench, [("map 1000", "pan_zoom_fps", 58.0)])
+        assert [row["test_id"] for row in store.regressions()] == ["TC001"]
+        assert store.regressions(bench) == []
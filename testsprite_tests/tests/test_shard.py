@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from harness.workqueue import WorkQueue, balance
+
+
+def _result(test_id: str, status: str) -> SimpleNamespace:
+    # complete() only needs the test id; runner.TestResult would pull in Playwright.
+    return SimpleNamespace(test_id=test_id, status=status)
+
+
+def test_balance_puts_longest_cases_first_on_the_lightest_shard():
+    plan = balance({"TC001": 10.0, "TC002": 8.0, "TC003": 5.0, "TC004": 4.0, "TC005": 1.0}, 2)
+    assert plan == [["TC001", "TC004"], ["TC002", "TC003", "TC005"]]
+
+
+def test_balance_leaves_extra_shards_empty():
+    assert balance({"TC001": 3.0}, 3) == [["TC001"], [], []]
+
+
+def test_serial_queue_leases_one_case_at_a_time():
+    queue = WorkQueue(["TC001", "TC002"], lease_s=60.0, serial=True)
+    assert queue.lease("w1").test_id == "TC001"
+    assert queue.lease("w2") is None
+
+
+def test_empty_queue_is_done_at_once():
+    assert WorkQueue([], lease_s=60.0).done.is_set()
+
+
+def test_late_result_of_an_earlier_attempt_does_not_close_a_retry():
+    queue = WorkQueue(["TC001"], lease_s=-1.0)
+    first = queue.lease("w1")
+    # The lease expires and the case is handed out again in the same round.
+    again = queue.lease("w2")
+    assert (first.attempt, again.attempt) == (1, 1)
+    assert queue.complete("w2", _result("TC001", "failed"), again.attempt)
+    assert queue.done.is_set()
+
+    queue.extend(["TC001"], serial=True)
+    retry = queue.lease("w2")
+    assert retry.attempt == 2
+    assert not queue.complete("w1", _result("TC001", "passed"), first.attempt)
+    assert not queue.done.is_set() and "TC001" not in queue.results
+    assert queue.complete("w2", _result("TC001", "failed"), retry.attempt)
+    assert queue.results["TC001"].status == "failed"
+    assert queue.stale == 1 and queue.done.is_set()
@@ -0,0 +1,46 @@
+"""Known-input checks for :mod:`harness.stats`."""
+
+import pytest
+
+from harness.stats import latency_summary, mann_whitney_u, percentile
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5, 1, 3], 0) == 1
+    assert percentile([5, 1, 3], 100) == 5
+    assert percentile([], 50) is None
+
+
+def test_latency_summary_in_ms():
+    summary = latency_summary([0.001, 0.002, 0.003], elapsed_s=1.0)
+    assert summary["count"] == 3
+    assert summary["p50_ms"] == 2.0
+    assert summary["max_ms"] == 3.0
+    assert summary["throughput_rps"] == 3.0
+
+
+def test_mann_whitney_separated_samples():
+    # U = 25 of 25; normal approximation with continuity correction: z = 12 / sqrt(25 * 11 / 12).
+    u, p = mann_whitney_u([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert u == 25
+    assert p == pytest.approx(0.006093, abs=1e-5)
+    u, p = mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 0
+    assert p > 0.99
+
+
+def test_mann_whitney_tie_correction():
+    # Rank sum 35 -> U = 20; ties of 3, 4 (pairs) and 5 (triple) shrink the variance to 25/12 * 10.6.
+    u, p = mann_whitney_u([3, 4, 5, 5, 6], [1, 2, 3, 4, 5])
+    assert u == 20
+    assert p == pytest.approx(0.06817, abs=1e-4)
+
+
+def test_mann_whitney_identical_samples():
+    assert mann_whitney_u([2, 2, 2], [2, 2, 2]) == (4.5, 1.0)
+
+
+def test_mann_whitney_rejects_empty():
+    with pytest.raises(ValueError):
+        mann_whitney_u([], [1.0])